@@ -30,7 +30,7 @@ type
 implementation
 
 uses
-  Pythia.Config, Pythia.GitHub.Auth;
+  Pythia.Config, Pythia.GitHub.Auth, Pythia.ModelCatalog;
 
 { TPythiaAIClient }
 
@@ -39,8 +39,11 @@ class function TPythiaAIClient.SendMessage(const Messages: TArray<TChatMessage>;
 var
   RequestBody: string;
   Response: string;
+  CatalogProvider: string;
 begin
   Result := '';
+  // 'OpenAI: o3-mini' style catalog items name their provider
+  CatalogProvider := TModelCatalog.ProviderOf(Model);
   
   try
     // Determine which API to use based on model name
@@ -51,14 +54,14 @@ begin
       Response := CallGitHubCopilot(RequestBody);
       Result := ParseOpenAIResponse(Response); // Same format as OpenAI
     end
-    else if Pos('GPT', UpperCase(Model)) > 0 then
+    else if (Pos('GPT', UpperCase(Model)) > 0) or (CatalogProvider = 'openai') then
     begin
       // OpenAI API
       RequestBody := BuildOpenAIRequest(Messages, Model);
       Response := CallOpenAI(RequestBody);
       Result := ParseOpenAIResponse(Response);
     end
-    else if Pos('CLAUDE', UpperCase(Model)) > 0 then
+    else if (Pos('CLAUDE', UpperCase(Model)) > 0) or (CatalogProvider = 'anthropic') then
     begin
       // Anthropic API
       RequestBody := BuildAnthropicRequest(Messages, Model);
@@ -115,13 +118,17 @@ var
 begin
   JSON := TJSONObject.Create;
   try
-    // Map display name to API model name
-    if Pos('GPT-4', Model) > 0 then
-      ModelName := 'gpt-4'
-    else if Pos('GPT-3.5', Model) > 0 then
-      ModelName := 'gpt-3.5-turbo'
-    else
-      ModelName := 'gpt-4';
+    // Catalog items carry the API model id; map built-in display names
+    ModelName := TModelCatalog.ModelIdOf(Model);
+    if ModelName = '' then
+    begin
+      if Pos('GPT-4', Model) > 0 then
+        ModelName := 'gpt-4'
+      else if Pos('GPT-3.5', Model) > 0 then
+        ModelName := 'gpt-3.5-turbo'
+      else
+        ModelName := 'gpt-4';
+    end;
       
     JSON.AddPair('model', ModelName);
     JSON.AddPair('temperature', TJSONNumber.Create(0.7));
@@ -163,13 +170,17 @@ var
 begin
   JSON := TJSONObject.Create;
   try
-    // Map display name to API model name
-    if Pos('3.5 SONNET', UpperCase(Model)) > 0 then
-      ModelName := 'claude-3-5-sonnet-20241022'
-    else if Pos('OPUS', UpperCase(Model)) > 0 then
-      ModelName := 'claude-3-opus-20240229'
-    else
-      ModelName := 'claude-3-5-sonnet-20241022';
+    // Catalog items carry the API model id; map built-in display names
+    ModelName := TModelCatalog.ModelIdOf(Model);
+    if ModelName = '' then
+    begin
+      if Pos('3.5 SONNET', UpperCase(Model)) > 0 then
+        ModelName := 'claude-3-5-sonnet-20241022'
+      else if Pos('OPUS', UpperCase(Model)) > 0 then
+        ModelName := 'claude-3-opus-20240229'
+      else
+        ModelName := 'claude-3-5-sonnet-20241022';
+    end;
       
     JSON.AddPair('model', ModelName);
     JSON.AddPair('max_tokens', TJSONNumber.Create(4096));
@@ -278,13 +289,17 @@ var
 begin
   JSON := TJSONObject.Create;
   try
-    // Map display name to API model name
-    if Pos('GPT-4', UpperCase(Model)) > 0 then
-      ModelName := 'gpt-4'
-    else if Pos('GPT-3.5', UpperCase(Model)) > 0 then
-      ModelName := 'gpt-3.5-turbo'
-    else
-      ModelName := 'gpt-4'; // Default to GPT-4
+    // Catalog items carry the API model id; map built-in display names
+    ModelName := TModelCatalog.ModelIdOf(Model);
+    if ModelName = '' then
+    begin
+      if Pos('GPT-4', UpperCase(Model)) > 0 then
+        ModelName := 'gpt-4'
+      else if Pos('GPT-3.5', UpperCase(Model)) > 0 then
+        ModelName := 'gpt-3.5-turbo'
+      else
+        ModelName := 'gpt-4'; // Default to GPT-4
+    end;
       
     JSON.AddPair('model', ModelName);
     JSON.AddPair('temperature', TJSONNumber.Create(0.7));
@@ -77,11 +77,14 @@ uses
   Pythia.AI.Client,
   Pythia.Config,
   Pythia.GitHub.Auth,
+  Pythia.ModelCatalog,
   Pythia.SettingsForm;
 
 {$R *.dfm}
 
 procedure TChatWindow.FormCreate(Sender: TObject);
+var
+  CatalogModel: TCatalogModel;
 begin
   Caption := 'Pythia - AI Chat Assistant';
   Width := 600;
@@ -128,6 +131,10 @@ begin
   ComboModel.Items.Add('GPT-3.5 Turbo');
   ComboModel.Items.Add('Claude 3.5 Sonnet');
   ComboModel.Items.Add('Claude 3 Opus');
+  // Models discovered by 'pythia-tools models' (cached file, no network)
+  for CatalogModel in TModelCatalog.LoadCached do
+    if ComboModel.Items.IndexOf(CatalogModel.DisplayName) < 0 then
+      ComboModel.Items.Add(CatalogModel.DisplayName);
   ComboModel.ItemIndex := 0;
   
   // Initialize context provider
@@ -313,7 +320,8 @@ begin
     Provider := 'GitHub Copilot';
     IsAuthenticated := TGitHubCopilotAuth.IsAuthenticated;
   end
-  else if Pos('Claude', ComboModel.Text) > 0 then
+  else if (Pos('Claude', ComboModel.Text) > 0) or
+    (TModelCatalog.ProviderOf(ComboModel.Text) = 'anthropic') then
   begin
     Provider := 'Anthropic';
     APIKey := TPythiaConfig.GetAnthropicKey;
@@ -351,7 +359,8 @@ begin
     Endpoint := 'https://api.githubcopilot.com/chat/completions';
     APIKey := 'GitHub OAuth'; // Display text only
   end
-  else if Pos('Claude', ComboModel.Text) > 0 then
+  else if (Pos('Claude', ComboModel.Text) > 0) or
+    (TModelCatalog.ProviderOf(ComboModel.Text) = 'anthropic') then
   begin
     APIKey := TPythiaConfig.GetAnthropicKey;
     Provider := 'Anthropic';
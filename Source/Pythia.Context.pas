@@ -5,7 +5,8 @@ interface
 uses
   System.SysUtils,
   System.Classes,
-  System.Generics.Collections;
+  System.Generics.Collections,
+  Pythia.SourceIndex;
 
 type
   TContextItemType = (
@@ -65,14 +66,19 @@ type
   private
     FProjectPath: string;
     FProjectFiles: TArray<string>;
+    FIndex: TSourceIndex;
     procedure ParseProjectFile;
   protected
     function GetCurrentFile: TContextItem; override;
     function GetSelection: TContextItem; override;
     function GetProjectFiles: TArray<string>; override;
+    function GetRelatedFiles(const FileName: string): TArray<string>; override;
     function IsAvailable: Boolean; override;
   public
     constructor Create(const AProjectPath: string);
+    destructor Destroy; override;
+    // Cached sizes, token counts and unit headers from tools/source_index.py
+    property SourceIndex: TSourceIndex read FIndex;
   end;
 
 implementation
@@ -109,9 +115,9 @@ end;
 function TBaseContextProvider.GatherContext(AIncludeProject: Boolean): TArray<TContextItem>;
 var
   Items: TList<TContextItem>;
-  CurrentFile, Selection: TContextItem;
+  CurrentFile, Selection, Related: TContextItem;
   ProjectFiles: TArray<string>;
-  ProjectFile: string;
+  ProjectFile, RelatedFile: string;
 begin
   Items := TList<TContextItem>.Create;
   try
@@ -129,9 +135,21 @@ begin
     begin
       CurrentFile.TokenCount := EstimateTokens(CurrentFile.Content);
       Items.Add(CurrentFile);
+
+      // Priority 3: Related files, e.g. the units the current file uses.
+      // PrioritizeAndTruncate drops them from the end, so the nearest stay.
+      for RelatedFile in GetRelatedFiles(CurrentFile.FilePath) do
+      begin
+        if SameText(RelatedFile, CurrentFile.FilePath) or not TFile.Exists(RelatedFile) then
+          Continue;
+        Related := TContextItem.Create(ctRelatedFile, RelatedFile,
+          TFile.ReadAllText(RelatedFile, TEncoding.UTF8));
+        Related.TokenCount := EstimateTokens(Related.Content);
+        Items.Add(Related);
+      end;
     end;
 
-    // Priority 3: Project file list (if requested)
+    // Priority 4: Project file list (if requested)
     if AIncludeProject then
     begin
       ProjectFiles := GetProjectFiles;
@@ -444,8 +462,18 @@ constructor TStandaloneContextProvider.Create(const AProjectPath: string);
 begin
   inherited Create;
   FProjectPath := AProjectPath;
+  FIndex := TSourceIndex.Create(AProjectPath);
   if FProjectPath <> '' then
+  begin
+    FIndex.Load;
     ParseProjectFile;
+  end;
+end;
+
+destructor TStandaloneContextProvider.Destroy;
+begin
+  FIndex.Free;
+  inherited;
 end;
 
 procedure TStandaloneContextProvider.ParseProjectFile;
@@ -456,6 +484,13 @@ var
   FileName: string;
   Files: TList<string>;
 begin
+  // A current index already holds the DCCReference list; skip the XML parse
+  if FIndex.IsProjectCurrent then
+  begin
+    FProjectFiles := FIndex.GetProjectFiles;
+    Exit;
+  end;
+
   Files := TList<string>.Create;
   try
     if not TFile.Exists(FProjectPath) then
@@ -540,6 +575,13 @@ begin
   Result := FProjectFiles;
 end;
 
+function TStandaloneContextProvider.GetRelatedFiles(const FileName: string): TArray<string>;
+begin
+  Result := inherited GetRelatedFiles(FileName);
+  // Project units this file uses directly, and its {$I} files
+  Result := Result + FIndex.GetDependencies(FileName, 1);
+end;
+
 function TStandaloneContextProvider.IsAvailable: Boolean;
 begin
   Result := FProjectPath <> '';
@@ -0,0 +1,195 @@
+unit Pythia.ModelCatalog;
+
+interface
+
+uses
+  System.SysUtils, System.Classes, System.JSON;
+
+type
+  TCatalogModel = record
+    Provider: string;         // openai, anthropic or copilot
+    Id: string;               // API model id, e.g. gpt-4o
+    Name: string;
+    Chat: Boolean;
+    ContextWindow: Integer;   // Tokens, 0 when unknown
+    InputPrice: Double;       // USD per 1K tokens, -1 when unknown
+    OutputPrice: Double;
+
+    function DisplayName: string; // Combo box item, e.g. 'OpenAI: gpt-4o'
+  end;
+
+  // Reader for model-catalog.json in the Pythia cache directory, written by
+  // tools/model_catalog.py (pythia-tools models). Only the file is read, so
+  // the chat window gets the last known model list without waiting on the
+  // network; the tools revalidate it with conditional requests.
+  TModelCatalog = class
+  private
+    class function ParseModel(ModelObj: TJSONObject): TCatalogModel;
+    class function ProviderLabel(const Provider: string): string;
+  public
+    const CatalogVersion = 1;
+    const CatalogFile = 'model-catalog.json';
+
+    class function CatalogPath: string;
+    // Models of the providers the plugin can call, in catalog order.
+    // Empty when the catalog is missing, unreadable or of another version.
+    class function LoadCached(ChatOnly: Boolean = True): TArray<TCatalogModel>;
+    // Splits a DisplayName back into provider and model id; False for the
+    // built-in combo box items
+    class function TryParseDisplayName(const DisplayName: string;
+      out Provider, ModelId: string): Boolean;
+    class function ModelIdOf(const DisplayName: string): string;
+    class function ProviderOf(const DisplayName: string): string;
+  end;
+
+implementation
+
+uses
+  System.IOUtils;
+
+const
+  PluginProviders: array[0..2] of string = ('openai', 'anthropic', 'copilot');
+  // 'GitHub Copilot: GPT-4' style built-in items never start with these
+  ProviderLabels: array[0..2] of string = ('OpenAI', 'Anthropic', 'Copilot');
+
+{ TCatalogModel }
+
+function TCatalogModel.DisplayName: string;
+begin
+  Result := TModelCatalog.ProviderLabel(Provider) + ': ' + Id;
+end;
+
+{ TModelCatalog }
+
+class function TModelCatalog.CatalogPath: string;
+begin
+  // Same directory as pythia_cache.get_cache_dir() on Windows
+  Result := TPath.Combine(TPath.Combine(TPath.Combine(
+    GetEnvironmentVariable('APPDATA'), 'Pythia'), 'cache'), CatalogFile);
+end;
+
+class function TModelCatalog.ProviderLabel(const Provider: string): string;
+var
+  I: Integer;
+begin
+  for I := Low(PluginProviders) to High(PluginProviders) do
+    if PluginProviders[I] = Provider then
+      Exit(ProviderLabels[I]);
+  Result := Provider;
+end;
+
+class function TModelCatalog.ParseModel(ModelObj: TJSONObject): TCatalogModel;
+
+  function NumberOr(const Name: string; Default: Double): Double;
+  var
+    Value: TJSONValue;
+  begin
+    // context_window and prices are null when the tools do not know them
+    Value := ModelObj.GetValue(Name);
+    if Value is TJSONNumber then
+      Result := TJSONNumber(Value).AsDouble
+    else
+      Result := Default;
+  end;
+
+begin
+  Result.Provider := ModelObj.GetValue<string>('provider');
+  Result.Id := ModelObj.GetValue<string>('id');
+  Result.Name := ModelObj.GetValue<string>('name', Result.Id);
+  Result.Chat := ModelObj.GetValue<Boolean>('chat', True);
+  Result.ContextWindow := Round(NumberOr('context_window', 0));
+  Result.InputPrice := NumberOr('input_price', -1);
+  Result.OutputPrice := NumberOr('output_price', -1);
+end;
+
+class function TModelCatalog.LoadCached(ChatOnly: Boolean): TArray<TCatalogModel>;
+var
+  Root: TJSONValue;
+  ProvidersObj: TJSONObject;
+  ProviderObj: TJSONObject;
+  Models: TJSONArray;
+  Model: TCatalogModel;
+  Item: TJSONValue;
+  Provider: string;
+  Count: Integer;
+begin
+  Result := nil;
+  if not TFile.Exists(CatalogPath) then
+    Exit;
+
+  try
+    Root := TJSONObject.ParseJSONValue(TFile.ReadAllText(CatalogPath, TEncoding.UTF8));
+  except
+    Exit; // Being replaced by the tools right now; try again next time
+  end;
+  if Root = nil then
+    Exit;
+
+  try
+    if not (Root is TJSONObject) or
+       (TJSONObject(Root).GetValue<Integer>('version', 0) <> CatalogVersion) then
+      Exit;
+    ProvidersObj := TJSONObject(Root).GetValue<TJSONObject>('providers', nil);
+    if ProvidersObj = nil then
+      Exit;
+
+    Count := 0;
+    for Provider in PluginProviders do
+    begin
+      ProviderObj := ProvidersObj.GetValue<TJSONObject>(Provider, nil);
+      if ProviderObj = nil then
+        Continue;
+      Models := ProviderObj.GetValue<TJSONArray>('models', nil);
+      if Models = nil then
+        Continue;
+      for Item in Models do
+      begin
+        if not (Item is TJSONObject) then
+          Continue;
+        Model := ParseModel(TJSONObject(Item));
+        if ChatOnly and not Model.Chat then
+          Continue;
+        if Count = Length(Result) then
+          SetLength(Result, Count * 2 + 8);
+        Result[Count] := Model;
+        Inc(Count);
+      end;
+    end;
+    SetLength(Result, Count);
+  finally
+    Root.Free;
+  end;
+end;
+
+class function TModelCatalog.TryParseDisplayName(const DisplayName: string;
+  out Provider, ModelId: string): Boolean;
+var
+  I: Integer;
+begin
+  for I := Low(ProviderLabels) to High(ProviderLabels) do
+    if DisplayName.StartsWith(ProviderLabels[I] + ': ') then
+    begin
+      Provider := PluginProviders[I];
+      ModelId := DisplayName.Substring(Length(ProviderLabels[I]) + 2).Trim;
+      Exit(ModelId <> '');
+    end;
+  Result := False;
+end;
+
+class function TModelCatalog.ModelIdOf(const DisplayName: string): string;
+var
+  Provider: string;
+begin
+  if not TryParseDisplayName(DisplayName, Provider, Result) then
+    Result := '';
+end;
+
+class function TModelCatalog.ProviderOf(const DisplayName: string): string;
+var
+  ModelId: string;
+begin
+  if not TryParseDisplayName(DisplayName, Result, ModelId) then
+    Result := '';
+end;
+
+end.
@@ -0,0 +1,347 @@
+unit Pythia.SourceIndex;
+
+interface
+
+uses
+  System.SysUtils, System.Classes, System.Generics.Collections, System.JSON;
+
+type
+  TSourceIndexEntry = record
+    Include: string;          // DCCReference Include value as written in the .dproj
+    FilePath: string;         // Include combined with the project directory
+    Size: Int64;
+    MTimeMs: Int64;           // Last write time, Unix milliseconds (UTC)
+    Hash: string;
+    Chars: Integer;           // Length of the file text (UTF-16 code units)
+    TokenCount: Integer;      // Same estimate as TBaseContextProvider.EstimateTokens
+    LineLengths: TArray<Integer>;
+    UnitName: string;
+    Kind: string;             // unit, program, library or package
+    InterfaceUses: TArray<string>;
+    ImplementationUses: TArray<string>;
+    IncludeFiles: TArray<string>; // {$I} names as written in the source
+
+    function LineCount: Integer;
+    function LineOffset(Line: Integer): Integer; // 1-based line -> 0-based char offset
+  end;
+
+  // Reader for <Project>.pythia-index.json, written by tools/source_index.py.
+  // Entries are only handed out while the file on disk still has the size
+  // and timestamp they were indexed with. The unit dependency graph (project
+  // units named in uses clauses plus {$I} files) is kept in both directions.
+  TSourceIndex = class
+  private
+    FProjectPath: string;
+    FProjectSize: Int64;
+    FProjectMTimeMs: Int64;
+    FIncludes: TArray<string>;
+    FEntries: TDictionary<string, TSourceIndexEntry>;
+    FDependencies: TDictionary<string, TArray<string>>;
+    FDependents: TDictionary<string, TArray<string>>;
+    function ParseEntry(const Include: string; EntryObj: TJSONObject): TSourceIndexEntry;
+    function IncludeToPath(const Include: string): string;
+    procedure ParseGraph(GraphObj: TJSONObject);
+  public
+    const IndexVersion = 2;
+    const IndexSuffix = '.pythia-index.json';
+
+    constructor Create(const AProjectPath: string);
+    destructor Destroy; override;
+
+    class function IndexPathFor(const ProjectPath: string): string;
+    class function GetFileStamp(const FileName: string; out Size, MTimeMs: Int64): Boolean;
+
+    function Load: Boolean;
+    function IsProjectCurrent: Boolean;
+    function GetProjectFiles: TArray<string>;
+    function TryGetEntry(const FileName: string; out Entry: TSourceIndexEntry): Boolean;
+    // Files within MaxHops uses/include edges of FileName, nearest first.
+    // Reverse walks the other way: files that depend on FileName.
+    function GetDependencies(const FileName: string; MaxHops: Integer = 1;
+      Reverse: Boolean = False): TArray<string>;
+
+    property Includes: TArray<string> read FIncludes;
+  end;
+
+implementation
+
+uses
+  System.IOUtils;
+
+{ TSourceIndexEntry }
+
+function TSourceIndexEntry.LineCount: Integer;
+begin
+  Result := Length(LineLengths);
+end;
+
+function TSourceIndexEntry.LineOffset(Line: Integer): Integer;
+var
+  I: Integer;
+begin
+  Result := 0;
+  for I := 0 to Line - 2 do
+  begin
+    if I > High(LineLengths) then
+      Break;
+    Inc(Result, LineLengths[I]);
+  end;
+end;
+
+{ TSourceIndex }
+
+constructor TSourceIndex.Create(const AProjectPath: string);
+begin
+  inherited Create;
+  FProjectPath := AProjectPath;
+  FEntries := TDictionary<string, TSourceIndexEntry>.Create;
+  FDependencies := TDictionary<string, TArray<string>>.Create;
+  FDependents := TDictionary<string, TArray<string>>.Create;
+end;
+
+destructor TSourceIndex.Destroy;
+begin
+  FDependents.Free;
+  FDependencies.Free;
+  FEntries.Free;
+  inherited;
+end;
+
+class function TSourceIndex.IndexPathFor(const ProjectPath: string): string;
+begin
+  Result := TPath.ChangeExtension(ProjectPath, IndexSuffix);
+end;
+
+class function TSourceIndex.GetFileStamp(const FileName: string; out Size, MTimeMs: Int64): Boolean;
+begin
+  Result := TFile.Exists(FileName);
+  if not Result then
+    Exit;
+  try
+    Size := TFile.GetSize(FileName);
+    // Same whole-millisecond Unix time the Python builder stores
+    MTimeMs := Round((TFile.GetLastWriteTimeUtc(FileName) - UnixDateDelta) * MSecsPerDay);
+  except
+    Result := False;
+  end;
+end;
+
+function TSourceIndex.IncludeToPath(const Include: string): string;
+begin
+  Result := TPath.Combine(TPath.GetDirectoryName(FProjectPath), Include);
+end;
+
+function TSourceIndex.ParseEntry(const Include: string; EntryObj: TJSONObject): TSourceIndexEntry;
+var
+  Arr: TJSONArray;
+  I: Integer;
+begin
+  Result.Include := Include;
+  Result.FilePath := IncludeToPath(Include);
+  Result.Size := EntryObj.GetValue<Int64>('size');
+  Result.MTimeMs := EntryObj.GetValue<Int64>('mtime_ms');
+  Result.Hash := EntryObj.GetValue<string>('hash');
+  Result.Chars := EntryObj.GetValue<Integer>('chars');
+  Result.TokenCount := EntryObj.GetValue<Integer>('tokens');
+  Result.UnitName := EntryObj.GetValue<string>('unit', '');
+  Result.Kind := EntryObj.GetValue<string>('kind', '');
+
+  Arr := EntryObj.GetValue<TJSONArray>('line_lengths');
+  SetLength(Result.LineLengths, Arr.Count);
+  for I := 0 to Arr.Count - 1 do
+    Result.LineLengths[I] := Arr.Items[I].GetValue<Integer>;
+
+  Arr := EntryObj.GetValue<TJSONArray>('interface_uses');
+  SetLength(Result.InterfaceUses, Arr.Count);
+  for I := 0 to Arr.Count - 1 do
+    Result.InterfaceUses[I] := Arr.Items[I].Value;
+
+  Arr := EntryObj.GetValue<TJSONArray>('implementation_uses');
+  SetLength(Result.ImplementationUses, Arr.Count);
+  for I := 0 to Arr.Count - 1 do
+    Result.ImplementationUses[I] := Arr.Items[I].Value;
+
+  Arr := EntryObj.GetValue<TJSONArray>('include_files');
+  SetLength(Result.IncludeFiles, Arr.Count);
+  for I := 0 to Arr.Count - 1 do
+    Result.IncludeFiles[I] := Arr.Items[I].Value;
+end;
+
+procedure TSourceIndex.ParseGraph(GraphObj: TJSONObject);
+var
+  Pair: TJSONPair;
+  Node: TJSONObject;
+  Edges: TList<string>;
+  Arr: TJSONArray;
+  Source, Target: string;
+  Dependents: TArray<string>;
+  I: Integer;
+begin
+  Edges := TList<string>.Create;
+  try
+    for Pair in GraphObj do
+    begin
+      Node := Pair.JsonValue as TJSONObject;
+      Source := LowerCase(IncludeToPath(Pair.JsonString.Value));
+      Edges.Clear;
+      Arr := Node.GetValue<TJSONArray>('uses');
+      for I := 0 to Arr.Count - 1 do
+        Edges.Add(LowerCase(IncludeToPath(Arr.Items[I].Value)));
+      Arr := Node.GetValue<TJSONArray>('includes');
+      for I := 0 to Arr.Count - 1 do
+        Edges.Add(LowerCase(IncludeToPath(Arr.Items[I].Value)));
+      FDependencies.AddOrSetValue(Source, Edges.ToArray);
+
+      for Target in Edges do
+      begin
+        if not FDependents.TryGetValue(Target, Dependents) then
+          Dependents := nil;
+        FDependents.AddOrSetValue(Target, Dependents + [Source]);
+      end;
+    end;
+  finally
+    Edges.Free;
+  end;
+end;
+
+function TSourceIndex.Load: Boolean;
+var
+  IndexPath: string;
+  Root: TJSONObject;
+  Stamp, IncludesArr: TJSONArray;
+  Entries: TJSONObject;
+  Pair: TJSONPair;
+  Entry: TSourceIndexEntry;
+  I: Integer;
+begin
+  Result := False;
+  FEntries.Clear;
+  FDependencies.Clear;
+  FDependents.Clear;
+  SetLength(FIncludes, 0);
+
+  IndexPath := IndexPathFor(FProjectPath);
+  if not TFile.Exists(IndexPath) then
+    Exit;
+
+  try
+    Root := TJSONObject.ParseJSONValue(TFile.ReadAllText(IndexPath, TEncoding.UTF8)) as TJSONObject;
+  except
+    Exit; // Unreadable index: callers fall back to parsing the project
+  end;
+  if not Assigned(Root) then
+    Exit;
+
+  try
+    try
+      if Root.GetValue<Integer>('version', 0) <> IndexVersion then
+        Exit;
+
+      Stamp := Root.GetValue<TJSONArray>('project_stamp');
+      FProjectSize := Stamp.Items[0].GetValue<Int64>;
+      FProjectMTimeMs := Stamp.Items[1].GetValue<Int64>;
+
+      IncludesArr := Root.GetValue<TJSONArray>('includes');
+      SetLength(FIncludes, IncludesArr.Count);
+      for I := 0 to IncludesArr.Count - 1 do
+        FIncludes[I] := IncludesArr.Items[I].Value;
+
+      Entries := Root.GetValue<TJSONObject>('entries');
+      for Pair in Entries do
+      begin
+        Entry := ParseEntry(Pair.JsonString.Value, Pair.JsonValue as TJSONObject);
+        FEntries.AddOrSetValue(LowerCase(Entry.FilePath), Entry);
+      end;
+
+      ParseGraph(Root.GetValue<TJSONObject>('graph'));
+
+      Result := True;
+    except
+      // Malformed or older layout
+      FEntries.Clear;
+      FDependencies.Clear;
+      FDependents.Clear;
+      SetLength(FIncludes, 0);
+    end;
+  finally
+    Root.Free;
+  end;
+end;
+
+function TSourceIndex.IsProjectCurrent: Boolean;
+var
+  Size, MTimeMs: Int64;
+begin
+  Result := GetFileStamp(FProjectPath, Size, MTimeMs) and
+            (Size = FProjectSize) and (MTimeMs = FProjectMTimeMs);
+end;
+
+function TSourceIndex.GetProjectFiles: TArray<string>;
+var
+  I: Integer;
+begin
+  // Same paths ParseProjectFile builds from the DCCReference entries
+  SetLength(Result, Length(FIncludes));
+  for I := 0 to High(FIncludes) do
+    Result[I] := TPath.Combine(TPath.GetDirectoryName(FProjectPath), FIncludes[I]);
+end;
+
+function TSourceIndex.TryGetEntry(const FileName: string; out Entry: TSourceIndexEntry): Boolean;
+var
+  Size, MTimeMs: Int64;
+begin
+  Result := FEntries.TryGetValue(LowerCase(FileName), Entry) and
+            GetFileStamp(FileName, Size, MTimeMs) and
+            (Size = Entry.Size) and (MTimeMs = Entry.MTimeMs);
+end;
+
+function TSourceIndex.GetDependencies(const FileName: string; MaxHops: Integer;
+  Reverse: Boolean): TArray<string>;
+var
+  Edges: TDictionary<string, TArray<string>>;
+  Distance: TDictionary<string, Integer>;
+  Queue: TQueue<string>;
+  Found: TList<string>;
+  Current, Target: string;
+  Targets: TArray<string>;
+  Entry: TSourceIndexEntry;
+begin
+  if Reverse then
+    Edges := FDependents
+  else
+    Edges := FDependencies;
+
+  Distance := TDictionary<string, Integer>.Create;
+  Queue := TQueue<string>.Create;
+  Found := TList<string>.Create;
+  try
+    // Breadth-first, so nearer files come first in the result
+    Current := LowerCase(FileName);
+    Distance.Add(Current, 0);
+    Queue.Enqueue(Current);
+    while Queue.Count > 0 do
+    begin
+      Current := Queue.Dequeue;
+      if Distance[Current] >= MaxHops then
+        Continue;
+      if not Edges.TryGetValue(Current, Targets) then
+        Continue;
+      for Target in Targets do
+      begin
+        if Distance.ContainsKey(Target) then
+          Continue;
+        Distance.Add(Target, Distance[Current] + 1);
+        Queue.Enqueue(Target);
+        if FEntries.TryGetValue(Target, Entry) then
+          Found.Add(Entry.FilePath);
+      end;
+    end;
+    Result := Found.ToArray;
+  finally
+    Found.Free;
+    Queue.Free;
+    Distance.Free;
+  end;
+end;
+
+end.
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Resumable batch prompt runner
+Reads prompts from a JSONL file, builds each request exactly like
+TPythiaAIClient does for the chosen combo-box model, sends them with bounded
+concurrency and appends results to an output JSONL as they finish.
+
+Input lines:  {"id": "q1", "prompt": "..."}  or
+              {"id": "q2", "messages": [{"role": "user", "content": "..."}], "context": "..."}
+Output lines: {"id", "model", "provider", "status", "latency", "reply", "usage", "error", "cached"}
+
+The output file doubles as the checkpoint: re-running with the same --output
+skips every id already recorded with status 200 and retries the rest. With
+--cache, prompts already answered in an earlier run (same model and request
+body) come from the response cache (pythia_responses.py) at no cost, so a
+--fresh re-run of an unchanged regression set only pays for what changed.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+import pythia_http
+import pythia_responses
+from pythia_config import read_config
+from pythia_copilot import CopilotTokenManager, read_oauth_token
+from pythia_providers import (PROVIDERS, BASE_URL_ENV, PYTHIA_BUILDERS, chat_url, build_headers,
+                              extract_reply, extract_usage, route_model, with_context,
+                              set_base_url_override)
+
+ROUTE_PROVIDERS = {
+    'openai': 'openai',
+    'anthropic': 'anthropic',
+    'copilot': 'copilot',
+}
+
+def load_credentials(provider_id):
+    """API key for a provider, or for 'copilot' a CopilotTokenManager over
+    the GitHub OAuth token; None (after printing why) when there is none"""
+    if provider_id == 'copilot':
+        oauth_token = read_oauth_token()
+        if not oauth_token:
+            print("ERROR: No GitHub OAuth token (sign in from Pythia Settings, or set GITHUB_TOKEN)")
+            return None
+        return CopilotTokenManager(oauth_token)
+    api_key = read_config(announce=True).get(provider_id)
+    if not api_key:
+        print(f"ERROR: No API key configured for {PROVIDERS[provider_id]['name']}")
+    return api_key or None
+
+def load_prompts(path):
+    """Yield (id, messages, context) from a prompts JSONL file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                print(f"⚠️ Skipping {path}:{line_no}: {e}")
+                continue
+            if 'messages' in item:
+                messages = item['messages']
+            elif 'prompt' in item:
+                messages = [{"role": "user", "content": item['prompt']}]
+            else:
+                print(f"⚠️ Skipping {path}:{line_no}: needs 'prompt' or 'messages'")
+                continue
+            yield str(item.get('id', line_no)), messages, item.get('context', '')
+
+def load_checkpoint(path):
+    """Ids already answered successfully in an existing output file"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash can leave a torn final line; that item is simply re-run
+                continue
+            if record.get('status') == 200:
+                done.add(record['id'])
+    return done
+
+def run_item(item_id, messages, context, route, provider_id, api_key, model, timeout):
+    """Send one prompt and return its output record
+
+    api_key is what load_credentials returned: a key, or the Copilot token
+    manager, whose token is exchanged (once, shared) when it runs out.
+    """
+    record = {'id': item_id, 'model': model, 'provider': provider_id,
+              'status': None, 'latency': None, 'reply': None, 'usage': None, 'error': None, 'cached': False}
+    started = time.perf_counter()
+    try:
+        # A malformed item (e.g. a message without 'role') fails here, as its own record
+        body = PYTHIA_BUILDERS[route](with_context(messages, context), model)
+        record['model'] = body['model']
+        manager = api_key if isinstance(api_key, CopilotTokenManager) else None
+        for attempt in range(2):
+            token, exchanged = manager.token() if manager else (api_key, False)
+            response = pythia_http.post_json(chat_url(provider_id), body,
+                                             build_headers(provider_id, token),
+                                             provider=provider_id, read_timeout=timeout)
+            # A cached Copilot token the server no longer accepts: drop it and exchange once more
+            if response.status_code == 401 and manager and attempt == 0 and not exchanged:
+                manager.invalidate()
+                continue
+            break
+        record['status'] = response.status_code
+        record['cached'] = response.headers.get(pythia_responses.CACHE_HEADER) == 'hit'
+        if response.status_code == 200:
+            data = response.json()
+            record['reply'] = extract_reply(provider_id, data)
+            prompt_tokens, completion_tokens = extract_usage(provider_id, data)
+            record['usage'] = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens}
+        else:
+            _, record['error'] = pythia_http.error_details(response)
+    except (requests.exceptions.RequestException, ValueError, KeyError, IndexError, TypeError) as e:
+        record['error'] = f"{type(e).__name__}: {e}" if isinstance(e, KeyError) else str(e)
+    record['latency'] = round(time.perf_counter() - started, 4)
+    record['finished_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    return record
+
+def run_batch(prompts, output_path, done, route, provider_id, api_key, model, concurrency, timeout):
+    """Run all pending prompts; returns {'ok', 'failed', 'skipped'} counts"""
+    write_lock = threading.Lock()
+    counts = {'ok': 0, 'failed': 0, 'skipped': 0}
+    started = time.perf_counter()
+
+    with open(output_path, 'a', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+
+        def finish(future):
+            # Runs as each future completes, so every record is on disk as soon as it is answered
+            try:
+                record = future.result()
+            except Exception as e:
+                print(f"⚠️ Batch item failed unexpectedly: {e}")
+                return
+            with write_lock:
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+                counts['ok' if record['status'] == 200 else 'failed'] += 1
+                finished = counts['ok'] + counts['failed']
+                mark = '✓' if record['status'] == 200 else '✗'
+                rate = finished / max(time.perf_counter() - started, 1e-9)
+                print(f"[{finished}] {mark} {record['id']} {record['status'] or 'ERR'} "
+                      f"{record['latency']:.2f}s ({rate:.1f}/s){' cached' if record['cached'] else ''}")
+
+        pending = set()
+        for item_id, messages, context in prompts:
+            if item_id in done:
+                counts['skipped'] += 1
+                continue
+            # Keep the queue bounded so huge prompt files are streamed, not loaded
+            if len(pending) >= concurrency * 2:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            future = pool.submit(run_item, item_id, messages, context, route,
+                                 provider_id, api_key, model, timeout)
+            future.add_done_callback(finish)
+            pending.add(future)
+            done.add(item_id)
+
+        wait(pending)
+
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL prompt set through a Pythia model")
+    parser.add_argument('prompts', help="Input JSONL file")
+    parser.add_argument('-o', '--output', required=True, help="Output JSONL file (also the checkpoint)")
+    parser.add_argument('--model', default='GPT-4',
+                        help="Model name as shown in Pythia's combo box, e.g. 'Claude 3.5 Sonnet'")
+    parser.add_argument('--provider', choices=list(PROVIDERS),
+                        help="Send to this provider instead of the one the model routes to")
+    parser.add_argument('-c', '--concurrency', type=int, default=4,
+                        help="Requests in flight at once (default: 4)")
+    parser.add_argument('--timeout', type=float, default=120, help="Per-request read timeout in seconds")
+    parser.add_argument('--fresh', action='store_true', help="Ignore the checkpoint and re-run everything")
+    cache = parser.add_mutually_exclusive_group()
+    cache.add_argument('--cache', action='store_true',
+                       help="Answer repeated requests from the response cache and store new answers")
+    cache.add_argument('--cache-bypass', action='store_true',
+                       help="Always send, but store the answers in the response cache (refresh it)")
+    parser.add_argument('--base-url',
+                        help=f"Send requests to this host instead (e.g. a mock server); also read from {BASE_URL_ENV}")
+    args = parser.parse_args()
+    set_base_url_override(args.base_url)
+
+    route = route_model(args.model)
+    if route is None:
+        print(f"ERROR: Unknown model '{args.model}' (expected a GPT, Claude or Copilot model name)")
+        sys.exit(2)
+    provider_id = args.provider or ROUTE_PROVIDERS[route]
+
+    print("Pythia Batch Prompt Runner")
+    print("="*70)
+    api_key = load_credentials(provider_id)
+    if not api_key:
+        sys.exit(1)
+
+    if args.fresh and os.path.exists(args.output):
+        os.remove(args.output)
+    done = load_checkpoint(args.output)
+    pythia_http.set_concurrency_limit(provider_id, args.concurrency)
+    if args.cache or args.cache_bypass:
+        pythia_responses.configure('bypass' if args.cache_bypass else 'on')
+
+    print(f"Model: {args.model} -> {PROVIDERS[provider_id]['name']} ({chat_url(provider_id)})")
+    print(f"Concurrency: {args.concurrency}  |  Already done: {len(done)}\n")
+
+    started = time.perf_counter()
+    counts = run_batch(load_prompts(args.prompts), args.output, done, route, provider_id,
+                       api_key, args.model, args.concurrency, args.timeout)
+    elapsed = time.perf_counter() - started
+
+    print("\n" + "="*70)
+    print("SUMMARY")
+    print("="*70)
+    print(f"Succeeded: {counts['ok']}  |  Failed: {counts['failed']}  |  "
+          f"Skipped (checkpoint): {counts['skipped']}")
+    print(f"Elapsed: {elapsed:.1f}s  |  Results: {args.output}")
+    if pythia_responses.is_active():
+        print(pythia_responses.format_stats(pythia_responses.session_stats()))
+    if counts['failed']:
+        print("Re-run the same command to retry the failed items.")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
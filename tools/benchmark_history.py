@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark history and latency regression check
+    benchmark_history.py list
+    benchmark_history.py show 42
+    benchmark_history.py compare [--run 42] [--tool benchmark_providers] [--baseline-runs 5]
+
+benchmark_providers.py and context_profiler.py record every run (see
+pythia_history.py). compare tests the latest run against the runs before it
+and exits with status 1 when any metric regressed, so a nightly job fails
+on it; runs without enough history are reported but never fail.
+"""
+
+import sys
+import json
+import time
+import argparse
+
+from pythia_history import (DEFAULT_ALPHA, DEFAULT_BASELINE_RUNS, DEFAULT_THRESHOLD, HISTORY_ENV,
+                            compare, get_history_path, list_runs, open_history, run_results)
+
+VERDICT_ICONS = {'regression': '❌', 'improved': '✅', 'ok': '  ', 'insufficient': '··'}
+
+def format_value(metric, value):
+    if value is None:
+        return '-'
+    if metric in ('latency', 'ttfb'):
+        return f"{value * 1000:.0f}ms"
+    if metric == 'tokens_per_sec':
+        return f"{value:.1f}/s"
+    return f"{value:,.0f}"
+
+def format_change(value):
+    return f"{value:+.0%}" if value is not None else '-'
+
+def format_p(value):
+    return f"{value:.4f}" if value is not None else '-'
+
+def list_main(conn, args):
+    runs = list_runs(conn, args.limit, args.tool)
+    print(f"{'Run':>5}  {'When':<19} {'Tool':<22} {'Commit':<9} {'Endpoint':<24} Label")
+    print("-"*96)
+    for run_id, ts, tool, label, commit, env in runs:
+        env = json.loads(env)
+        when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+        print(f"{run_id:>5}  {when:<19} {tool:<22} {commit or '-':<9} {env.get('endpoint', '-')[:24]:<24} "
+              f"{label or ''}")
+
+def show_main(conn, args):
+    run = conn.execute('SELECT ts, tool, label, git_commit, environment FROM runs WHERE id = ?',
+                       (args.run,)).fetchone()
+    if run is None:
+        print(f"ERROR: No run {args.run}")
+        sys.exit(1)
+    ts, tool, label, commit, env = run
+    print(f"Run {args.run}: {tool} at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))}"
+          f"{f'  [{label}]' if label else ''}")
+    print(f"Commit: {commit or '-'}")
+    for key, value in json.loads(env).items():
+        print(f"  {key}: {value}")
+    print("-"*96)
+    print(f"{'Target':<36} {'Metric':<15} {'n':>4} {'p50':>10} {'p95':>10}  Shape")
+    for target, shape, metric, n, p50, p95 in run_results(conn, args.run):
+        print(f"{target[:36]:<36} {metric:<15} {n:>4} {format_value(metric, p50):>10} "
+              f"{format_value(metric, p95):>10}  {shape}")
+
+def compare_main(conn, args):
+    run_id, rows = compare(conn, args.run, args.tool, args.baseline_runs, args.alpha, args.threshold)
+    if run_id is None:
+        print("No benchmark runs recorded yet")
+        return 0
+    if args.json:
+        print(json.dumps({'run': run_id, 'rows': rows}, indent=2))
+    else:
+        print(f"Run {run_id} vs up to {args.baseline_runs} earlier run(s) per series  "
+              f"(alpha {args.alpha}, threshold {args.threshold:.0%})")
+        print("="*110)
+        print(f"   {'Target':<34} {'Metric':<15} {'Runs':>4} {'Base p50':>9} {'p50':>9} {'Δp50':>6} "
+              f"{'Base tail':>9} {'Tail':>9} {'Δtail':>6} {'p shift':>7} {'p tail':>7}")
+        print("-"*110)
+        for row in rows:
+            metric = row['metric']
+            print(f"{VERDICT_ICONS[row['verdict']]} {row['target'][:34]:<34} {metric:<15} {row['runs']:>4} "
+                  f"{format_value(metric, row['baseline_p50']):>9} {format_value(metric, row['p50']):>9} "
+                  f"{format_change(row['change_p50']):>6} {format_value(metric, row['baseline_tail']):>9} "
+                  f"{format_value(metric, row['tail']):>9} {format_change(row['change_tail']):>6} "
+                  f"{format_p(row['p_shift']):>7} {format_p(row['p_tail']):>7}")
+        print("-"*110)
+        counts = {verdict: sum(1 for r in rows if r['verdict'] == verdict) for verdict in VERDICT_ICONS}
+        print(f"Regressions: {counts['regression']}  |  Improved: {counts['improved']}  |  "
+              f"Unchanged: {counts['ok']}  |  Not enough history: {counts['insufficient']}")
+        print("(tail = p95, or p5 for tokens_per_sec where lower is worse)")
+    return 1 if any(r['verdict'] == 'regression' for r in rows) else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history and regression check")
+    parser.add_argument('--history', help=f"History file (default: {HISTORY_ENV} or the data directory)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    listing = subparsers.add_parser('list', help="Recent runs")
+    listing.add_argument('--limit', type=int, default=20, help="Number of runs (default: 20)")
+    listing.add_argument('--tool', help="Only runs of this tool (e.g. benchmark_providers)")
+
+    show = subparsers.add_parser('show', help="Environment and per-series percentiles of one run")
+    show.add_argument('run', type=int, help="Run id")
+
+    check = subparsers.add_parser('compare', help="Latest run vs a rolling baseline; exit 1 on regression")
+    check.add_argument('--run', type=int, help="Run to check (default: the latest)")
+    check.add_argument('--tool', help="Latest run of this tool instead of the latest overall")
+    check.add_argument('--baseline-runs', type=int, default=DEFAULT_BASELINE_RUNS,
+                       help=f"Earlier runs pooled into the baseline (default: {DEFAULT_BASELINE_RUNS})")
+    check.add_argument('--alpha', type=float, default=DEFAULT_ALPHA,
+                       help=f"Significance level of both tests (default: {DEFAULT_ALPHA})")
+    check.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help=f"Smallest relative change that counts (default: {DEFAULT_THRESHOLD})")
+    check.add_argument('--json', action='store_true', help="Print the comparison as JSON")
+    args = parser.parse_args()
+
+    path = args.history or get_history_path()
+    if path is None:
+        print(f"ERROR: Benchmark history is disabled ({HISTORY_ENV}=off)")
+        sys.exit(2)
+    conn = open_history(path)
+    try:
+        if args.command == 'list':
+            list_main(conn, args)
+        elif args.command == 'show':
+            show_main(conn, args)
+        else:
+            sys.exit(compare_main(conn, args))
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
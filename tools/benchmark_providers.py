@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the AI providers Pythia talks to
+Runs warm (reused connection) and cold (fresh connection) iterations per
+provider/model with Pythia-shaped payloads and reports p50/p95/p99 latency,
+time-to-first-byte and output tokens per second. Each run is recorded in the
+benchmark history (pythia_history.py); 'history compare' checks it against
+earlier runs.
+"""
+
+import sys
+import csv
+import json
+import time
+import argparse
+import requests
+
+import pythia_http
+import pythia_ledger
+import pythia_history
+from pythia_providers import (KEY_PROVIDERS, PROVIDERS, BASE_URL_ENV, chat_url, get_base_url, build_headers,
+                              build_pythia_payload, extract_usage, set_base_url_override)
+from pythia_config import read_config
+from pythia_history import percentile
+
+DEFAULT_PROMPT = "Explain in two sentences what TStringList.Sorted does in Delphi."
+MODES = ('warm', 'cold')
+
+def run_iteration(session, provider_id, api_key, model, prompt, max_tokens, timeout):
+    """Send one request and time it; returns a sample dict"""
+    sample = {
+        'provider': provider_id,
+        'model': model,
+        'status': None,
+        'ttfb': None,
+        'total': None,
+        'prompt_tokens': None,
+        'output_tokens': None,
+        'tokens_per_sec': None,
+        'error': ''
+    }
+    payload = build_pythia_payload(provider_id, prompt, model=model, max_tokens=max_tokens)
+    started = time.perf_counter()
+    try:
+        # stream=True returns as soon as the status line and headers arrive
+        # No retries: a retried request would hide the latency being measured
+        response = pythia_http.post_json(chat_url(provider_id), payload,
+                                         build_headers(provider_id, api_key),
+                                         session=session, retries=0,
+                                         read_timeout=timeout, stream=True)
+        sample['ttfb'] = time.perf_counter() - started
+        body = response.content
+        sample['total'] = time.perf_counter() - started
+        sample['status'] = response.status_code
+        if response.status_code == 200:
+            input_tokens, output_tokens = extract_usage(provider_id, json.loads(body))
+            pythia_ledger.add_usage(getattr(response, 'ledger_id', None), input_tokens, output_tokens)
+            sample['prompt_tokens'] = input_tokens
+            sample['output_tokens'] = output_tokens
+            if output_tokens and sample['total'] > 0:
+                sample['tokens_per_sec'] = output_tokens / sample['total']
+        else:
+            sample['error'] = body[:200].decode('utf-8', errors='replace')
+    except (requests.exceptions.RequestException, ValueError) as e:
+        sample['error'] = str(e)
+    return sample
+
+def benchmark_target(provider_id, api_key, model, mode, iterations, prompt, max_tokens, timeout):
+    """Run all iterations for one provider/model/mode combination"""
+    samples = []
+    session = pythia_http.new_session()
+    if mode == 'warm':
+        # Discarded request so DNS/TCP/TLS setup is not part of the warm numbers
+        run_iteration(session, provider_id, api_key, model, prompt, max_tokens, timeout)
+
+    for i in range(iterations):
+        if mode == 'cold':
+            session.close()
+            session = pythia_http.new_session()
+        sample = run_iteration(session, provider_id, api_key, model, prompt, max_tokens, timeout)
+        sample['mode'] = mode
+        sample['iteration'] = i + 1
+        samples.append(sample)
+        status = sample['status'] if sample['status'] is not None else 'ERR'
+        total = f"{sample['total']:.3f}s" if sample['total'] is not None else '-'
+        print(f"  [{mode} {i + 1}/{iterations}] {status} {total}")
+
+    session.close()
+    return samples
+
+def summarize(samples):
+    """Aggregate samples into one row per provider/model/mode"""
+    groups = {}
+    for sample in samples:
+        key = (sample['provider'], sample['model'], sample['mode'])
+        groups.setdefault(key, []).append(sample)
+
+    summary = []
+    for (provider_id, model, mode), group in groups.items():
+        ok = [s for s in group if s['status'] == 200]
+        totals = [s['total'] for s in ok]
+        ttfbs = [s['ttfb'] for s in ok]
+        rates = [s['tokens_per_sec'] for s in ok if s['tokens_per_sec']]
+        summary.append({
+            'provider': provider_id,
+            'model': model,
+            'mode': mode,
+            'requests': len(group),
+            'errors': len(group) - len(ok),
+            'p50': percentile(totals, 50),
+            'p95': percentile(totals, 95),
+            'p99': percentile(totals, 99),
+            'ttfb_p50': percentile(ttfbs, 50),
+            'ttfb_p95': percentile(ttfbs, 95),
+            'tokens_per_sec_p50': percentile(rates, 50)
+        })
+    return summary
+
+def format_seconds(value):
+    return f"{value:.3f}" if value is not None else '-'
+
+def print_summary(summary):
+    print("\n" + "="*96)
+    print("BENCHMARK SUMMARY (seconds)")
+    print("="*96)
+    print(f"{'Provider':<14} {'Model':<28} {'Mode':<5} {'OK':>5} "
+          f"{'p50':>7} {'p95':>7} {'p99':>7} {'TTFB50':>7} {'tok/s':>7}")
+    print("-"*96)
+    for row in summary:
+        ok = f"{row['requests'] - row['errors']}/{row['requests']}"
+        rate = f"{row['tokens_per_sec_p50']:.1f}" if row['tokens_per_sec_p50'] else '-'
+        print(f"{PROVIDERS[row['provider']]['name']:<14} {row['model'][:28]:<28} {row['mode']:<5} "
+              f"{ok:>5} {format_seconds(row['p50']):>7} {format_seconds(row['p95']):>7} "
+              f"{format_seconds(row['p99']):>7} {format_seconds(row['ttfb_p50']):>7} {rate:>7}")
+
+def write_json(path, summary, samples, args):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'iterations': args.iterations,
+            'prompt': args.prompt,
+            'max_tokens': args.max_tokens,
+            'summary': summary,
+            'samples': samples
+        }, f, indent=2)
+    print(f"\nWrote JSON results to {path}")
+
+def write_csv(path, samples):
+    fields = ['provider', 'model', 'mode', 'iteration', 'status', 'ttfb', 'total',
+              'prompt_tokens', 'output_tokens', 'tokens_per_sec', 'error']
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(samples)
+    print(f"Wrote CSV samples to {path}")
+
+def record_history(samples, args):
+    """Store the run's samples per provider/model/mode; returns the run id"""
+    groups = {}
+    for sample in samples:
+        if sample['status'] == 200:
+            groups.setdefault((sample['provider'], sample['model'], sample['mode']), []).append(sample)
+    series = []
+    for (provider_id, model, mode), group in groups.items():
+        payload = build_pythia_payload(provider_id, args.prompt, model=model, max_tokens=args.max_tokens)
+        # Results are only comparable for the same payload against the same host
+        shape = (f"msgs={len(payload['messages'])} prompt={len(args.prompt)}c "
+                 f"max_tokens={payload['max_tokens']} host={get_base_url(provider_id).split('://')[-1]}")
+        series.append({
+            'target': f"{provider_id}/{model}/{mode}",
+            'shape': shape,
+            'metrics': {
+                'latency': [s['total'] for s in group],
+                'ttfb': [s['ttfb'] for s in group],
+                'tokens_per_sec': [s['tokens_per_sec'] for s in group],
+                'prompt_tokens': [s['prompt_tokens'] for s in group],
+            }
+        })
+    return pythia_history.record_run('benchmark_providers', series, args.label,
+                                     {'iterations': args.iterations})
+
+def parse_targets(args, config):
+    """List of (provider_id, model) pairs to benchmark"""
+    models = {}
+    for item in args.model:
+        provider_id, _, model = item.partition('=')
+        if provider_id not in KEY_PROVIDERS or not model:
+            print(f"ERROR: Invalid --model '{item}' (expected PROVIDER=MODEL)")
+            sys.exit(2)
+        models.setdefault(provider_id, []).append(model)
+
+    providers = args.providers.split(',') if args.providers else list(KEY_PROVIDERS)
+    targets = []
+    for provider_id in providers:
+        if provider_id not in KEY_PROVIDERS:
+            print(f"ERROR: Unknown provider '{provider_id}'")
+            sys.exit(2)
+        if not config.get(provider_id):
+            print(f"Skipping {PROVIDERS[provider_id]['name']} - no API key configured")
+            continue
+        for model in models.get(provider_id, [PROVIDERS[provider_id]['default_model']]):
+            targets.append((provider_id, model))
+    return targets
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AI provider latency for Pythia payloads")
+    parser.add_argument('--providers', help=f"Comma-separated subset of: {', '.join(KEY_PROVIDERS)}")
+    parser.add_argument('--model', action='append', default=[], metavar='PROVIDER=MODEL',
+                        help="Model to benchmark for a provider (repeatable)")
+    parser.add_argument('-n', '--iterations', type=int, default=10,
+                        help="Iterations per provider/model/mode (default: 10)")
+    parser.add_argument('--modes', default=','.join(MODES),
+                        help="Comma-separated connection modes: warm, cold (default: both)")
+    parser.add_argument('--prompt', default=DEFAULT_PROMPT, help="User message to send")
+    parser.add_argument('--max-tokens', type=int,
+                        help="Override max_tokens (default: what Pythia sends per provider)")
+    parser.add_argument('--timeout', type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument('--base-url',
+                        help=f"Benchmark this host instead (e.g. a mock server); also read from {BASE_URL_ENV}")
+    parser.add_argument('--json', metavar='FILE', help="Write summary and samples as JSON")
+    parser.add_argument('--csv', metavar='FILE', help="Write per-request samples as CSV")
+    parser.add_argument('--label', help="Note stored with the run in the benchmark history")
+    parser.add_argument('--no-history', action='store_true', help="Do not record this run in the benchmark history")
+    args = parser.parse_args()
+    set_base_url_override(args.base_url)
+
+    modes = [m for m in args.modes.split(',') if m]
+    for mode in modes:
+        if mode not in MODES:
+            print(f"ERROR: Unknown mode '{mode}' (expected warm or cold)")
+            sys.exit(2)
+
+    print("Pythia Provider Latency Benchmark")
+    print("="*70)
+
+    config = read_config(announce=True)
+    targets = parse_targets(args, config)
+    if not targets:
+        print("ERROR: No configured providers to benchmark")
+        sys.exit(1)
+
+    samples = []
+    for provider_id, model in targets:
+        for mode in modes:
+            print(f"\n{PROVIDERS[provider_id]['name']} / {model} ({mode})")
+            samples.extend(benchmark_target(provider_id, config[provider_id], model, mode,
+                                            args.iterations, args.prompt, args.max_tokens,
+                                            args.timeout))
+
+    summary = summarize(samples)
+    print_summary(summary)
+
+    if args.json:
+        write_json(args.json, summary, samples, args)
+    if args.csv:
+        write_csv(args.csv, samples)
+    if not args.no_history:
+        run_id = record_history(samples, args)
+        if run_id:
+            print(f"\nRecorded as run {run_id} in {pythia_history.get_history_path()}")
+
+if __name__ == '__main__':
+    main()
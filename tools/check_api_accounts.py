@@ -2,36 +2,52 @@
 """
 Check OpenAI and Anthropic API account status
 Shows usage, limits, and billing information
+
+--fast checks key status via the free model-listing endpoints instead of a
+billable completion and caches the result on disk (--refresh forces a live check)
 """
 
-import os
 import sys
 import json
-import configparser
-import requests
+import time
+import argparse
 from datetime import datetime
 
-def get_config_path():
-    appdata = os.environ.get('APPDATA')
-    config_file = os.path.join(appdata, 'Pythia', 'pythia.ini')
-    return config_file
+# pythia_http (and with it requests) is imported inside the functions that
+# send requests, so a --fast check answered from the cache never loads it
+from pythia_cache import TTLCache, fingerprint
+from pythia_config import read_config
+from pythia_providers import PROVIDERS, chat_url, models_url, build_headers, get_base_url
 
-def read_config():
-    config_file = get_config_path()
-    if not os.path.exists(config_file):
-        print(f"ERROR: Config file not found: {config_file}")
-        sys.exit(1)
-    
-    config = configparser.ConfigParser()
-    config.read(config_file)
-    
-    return {
-        'openai': config.get('API', 'OpenAIKey', fallback=''),
-        'anthropic': config.get('API', 'AnthropicKey', fallback='')
-    }
+# How long a fast status result is served from the on-disk cache (seconds)
+STATUS_CACHE_TTL = 300
+# Statuses that hold until the key or the account changes; others are re-checked
+CACHED_STATUSES = ('active', 'invalid', 'no_quota')
+
+# (input, output) tokens of a typical Pythia chat turn, for the cost examples
+TYPICAL_MESSAGE_TOKENS = (500, 300)
+
+def print_prices(provider_id, models):
+    """Per-1K-token prices from pricing.json, so there is one table to keep current"""
+    import pythia_ledger
+    pricing = pythia_ledger.load_pricing()
+    for model in models:
+        price = pythia_ledger.find_price(pricing, provider_id, model)
+        if price:
+            print(f"   - {model}: ${price[0]:g}/1K input tokens, ${price[1]:g}/1K output tokens")
+
+def typical_cost(provider_id, model, messages=100):
+    """Estimated USD for a number of typical chat turns with a model"""
+    import pythia_ledger
+    cost = pythia_ledger.estimate_cost(pythia_ledger.load_pricing(), provider_id, model,
+                                       TYPICAL_MESSAGE_TOKENS[0] * messages,
+                                       TYPICAL_MESSAGE_TOKENS[1] * messages)
+    return 0.0 if cost is None else cost
 
 def check_openai_account(api_key):
     """Check OpenAI API account status and usage"""
+    import pythia_http
+    
     print("\n" + "="*80)
     print("OPENAI API ACCOUNT STATUS")
     print("="*80)
@@ -43,15 +59,13 @@ def check_openai_account(api_key):
     print(f"API Key: {api_key[:20]}...{api_key[-5:]}")
     
     # Try to get usage/billing info
-    headers = {
-        "Authorization": f"Bearer {api_key}"
-    }
+    headers = build_headers('openai', api_key)
     
     print("\n📊 Checking Account Status...")
     print("-" * 80)
     
     # Test with minimal request to see error details
-    test_url = "https://api.openai.com/v1/chat/completions"
+    test_url = chat_url('openai')
     test_payload = {
         "model": "gpt-3.5-turbo",
         "messages": [{"role": "user", "content": "test"}],
@@ -59,7 +73,8 @@ def check_openai_account(api_key):
     }
     
     try:
-        response = requests.post(test_url, headers=headers, json=test_payload, timeout=10)
+        response = pythia_http.post_json(test_url, test_payload, headers, provider='openai',
+                                         read_timeout=10)
         
         if response.status_code == 200:
             print("✅ API Key is ACTIVE and has available credits")
@@ -68,9 +83,7 @@ def check_openai_account(api_key):
             print("❌ API Key is INVALID")
             print("   Error: Authentication failed")
         elif response.status_code == 429:
-            error_data = response.json()
-            error_type = error_data.get('error', {}).get('type', '')
-            error_msg = error_data.get('error', {}).get('message', '')
+            error_type, error_msg = pythia_http.error_details(response)
             
             if 'insufficient_quota' in error_type:
                 print("❌ INSUFFICIENT QUOTA / NO CREDITS")
@@ -83,12 +96,11 @@ def check_openai_account(api_key):
                 print("   1. Go to: https://platform.openai.com/settings/organization/billing")
                 print("   2. Click 'Add payment method'")
                 print("   3. Add at least $5-10 in credits")
-                print("   4. API costs: ~$0.03 per 1K tokens (GPT-4)")
-                print("      Example: ~$0.30 for 100 messages")
+                print("   4. API costs are per token (see pricing below)")
+                print(f"      Example: ~${typical_cost('openai', 'gpt-4'):.2f} for 100 messages with GPT-4")
                 
-                print("\n💰 Pricing Info:")
-                print("   - GPT-4: $0.03/1K input tokens, $0.06/1K output tokens")
-                print("   - GPT-3.5-Turbo: $0.0015/1K input, $0.002/1K output")
+                print("\n💰 Pricing Info (tools/pricing.json):")
+                print_prices('openai', ['gpt-4', 'gpt-4o', 'gpt-3.5-turbo'])
                 print("   - Pay-as-you-go (no monthly fee)")
                 
             elif 'rate_limit' in error_type:
@@ -111,6 +123,8 @@ def check_openai_account(api_key):
 
 def check_anthropic_account(api_key):
     """Check Anthropic API account status"""
+    import pythia_http
+    
     print("\n" + "="*80)
     print("ANTHROPIC API ACCOUNT STATUS")
     print("="*80)
@@ -119,22 +133,19 @@ def check_anthropic_account(api_key):
         print("❌ No Anthropic API key configured")
         print("\n💡 Anthropic Claude API:")
         print("   • Sign up: https://console.anthropic.com/")
-        print("   • Pricing: ~$0.003/1K input tokens (Claude Haiku)")
+        print("   • Pricing (tools/pricing.json):")
+        print_prices('anthropic', ['claude-3-5-sonnet', 'claude-3-haiku'])
         print("   • Also pay-as-you-go, no fixed monthly fee")
         return
     
     print(f"API Key: {api_key[:20]}...{api_key[-5:]}")
     
-    headers = {
-        "x-api-key": api_key,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json"
-    }
+    headers = build_headers('anthropic', api_key)
     
     print("\n📊 Checking Account Status...")
     print("-" * 80)
     
-    test_url = "https://api.anthropic.com/v1/messages"
+    test_url = chat_url('anthropic')
     test_payload = {
         "model": "claude-3-5-sonnet-20241022",
         "max_tokens": 5,
@@ -142,7 +153,8 @@ def check_anthropic_account(api_key):
     }
     
     try:
-        response = requests.post(test_url, headers=headers, json=test_payload, timeout=10)
+        response = pythia_http.post_json(test_url, test_payload, headers, provider='anthropic',
+                                         read_timeout=10)
         
         if response.status_code == 200:
             print("✅ API Key is ACTIVE and has available credits")
@@ -162,7 +174,92 @@ def check_anthropic_account(api_key):
     print("   • Console: https://console.anthropic.com/")
     print("   • Pricing: https://www.anthropic.com/pricing")
 
+def classify_status(response):
+    """Short status label for a model-listing response"""
+    import pythia_http
+    if response.status_code == 200:
+        return 'active'
+    if response.status_code in (401, 403):
+        return 'invalid'
+    if response.status_code == 429:
+        error_type, _ = pythia_http.error_details(response)
+        return 'no_quota' if 'insufficient_quota' in error_type else 'rate_limited'
+    return f"http_{response.status_code}"
+
+def fast_account_status(provider_id, api_key, cache, refresh=False):
+    """Key status from GET /v1/models, served from the TTL cache when fresh
+    
+    Listing models is free and does not run inference, so it proves the key
+    is valid and the endpoint reachable; it cannot see prepaid credit balance.
+    """
+    cache_key = fingerprint(provider_id, get_base_url(provider_id), api_key)
+    if not refresh:
+        cached, age = cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, cached=True, age=age)
+    
+    import pythia_http
+    
+    started = time.perf_counter()
+    try:
+        response = pythia_http.get(models_url(provider_id),
+                                   headers=build_headers(provider_id, api_key),
+                                   provider=provider_id, retries=1, read_timeout=10)
+        result = {'status': classify_status(response), 'http_status': response.status_code}
+        if response.status_code == 200:
+            result['models'] = len(response.json().get('data', []))
+    except Exception as e:
+        # Network failures are not cached; the next poll retries live
+        return {'status': 'unreachable', 'error': str(e), 'cached': False,
+                'elapsed_ms': (time.perf_counter() - started) * 1000}
+    
+    result['checked_at'] = datetime.now().isoformat(timespec='seconds')
+    # Rate limits and 5xx answers are transient too; only settled verdicts are cached
+    if result['status'] in CACHED_STATUSES:
+        cache.set(cache_key, result)
+    return dict(result, cached=False, elapsed_ms=(time.perf_counter() - started) * 1000)
+
+def fast_main(config, args):
+    cache = TTLCache('account_status', args.ttl)
+    results = {}
+    for provider_id in ('openai', 'anthropic'):
+        if config[provider_id]:
+            started = time.perf_counter()
+            results[provider_id] = fast_account_status(provider_id, config[provider_id],
+                                                       cache, refresh=args.refresh)
+            results[provider_id]['lookup_ms'] = (time.perf_counter() - started) * 1000
+        else:
+            results[provider_id] = {'status': 'not_configured', 'cached': False}
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        icons = {'active': '✅', 'not_configured': '➖', 'rate_limited': '⚠️'}
+        for provider_id, result in results.items():
+            source = (f"cached {result['age']:.0f}s ago" if result.get('cached')
+                      else 'live' if 'lookup_ms' in result else '')
+            timing = f", {result['lookup_ms']:.1f} ms" if 'lookup_ms' in result else ''
+            print(f"{icons.get(result['status'], '❌')} {PROVIDERS[provider_id]['name']}: "
+                  f"{result['status'].upper()}" + (f" ({source}{timing})" if source else ''))
+    
+    if any(r['status'] not in ('active', 'not_configured') for r in results.values()):
+        sys.exit(1)
+
 def main():
+    parser = argparse.ArgumentParser(description="Check OpenAI and Anthropic API account status")
+    parser.add_argument('--fast', action='store_true',
+                        help="Check key status via /v1/models (no billable completion), cached on disk")
+    parser.add_argument('--refresh', action='store_true',
+                        help="With --fast, ignore the cache and check live")
+    parser.add_argument('--ttl', type=float, default=STATUS_CACHE_TTL,
+                        help=f"With --fast, cache lifetime in seconds (default: {STATUS_CACHE_TTL})")
+    parser.add_argument('--json', action='store_true', help="With --fast, print results as JSON")
+    args = parser.parse_args()
+    
+    if args.fast:
+        fast_main(read_config(), args)
+        return
+    
     print("="*80)
     print(" API ACCOUNT STATUS CHECKER")
     print("="*80)
@@ -189,9 +286,10 @@ def main():
     print("   4. Start with small credit amount ($5-10)")
     
     print("\n📊 Typical Costs for Light Usage:")
-    print("   • 100 messages/month with GPT-3.5: ~$0.50")
-    print("   • 100 messages/month with GPT-4: ~$3-5")
+    print(f"   • 100 messages/month with GPT-3.5: ~${typical_cost('openai', 'gpt-3.5-turbo'):.2f}")
+    print(f"   • 100 messages/month with GPT-4: ~${typical_cost('openai', 'gpt-4'):.2f}")
     print("   • Much cheaper than $20/month ChatGPT Plus")
+    print("   • Your actual spend from these tools: pythia-tools cost --by model")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Retrieve the code chunks relevant to a question instead of whole files
+    code_search.py build Project.dproj
+    code_search.py query Project.dproj "why does the token refresh fail" --file Pythia.GitHub.Auth --line 120
+    code_search.py query Project.dproj "how is the context truncated" --budget 4000 --context
+
+Queries refresh the chunk index first (only changed files are re-chunked),
+then print the top-K chunks under the token budget and how that compares
+with sending the files they came from whole.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from pythia_chunks import ChunkIndex, build_chunks, format_chunks
+from pythia_context import DEFAULT_MAX_TOKENS
+from pythia_graph import DependencyGraph
+
+def build_main(args):
+    started = time.perf_counter()
+    data, _, stats = build_chunks(args.project, args.chunks, args.full)
+    elapsed = time.perf_counter() - started
+    total = sum(len(f['chunks']) for f in data['files'].values())
+    print(f"Files: {len(data['files'])}  |  Chunks: {total:,}")
+    print(f"Reused: {stats['reused']}  |  Re-chunked: {stats['chunked']}  |  "
+          f"Removed: {stats['removed']}  |  Unreadable: {stats['errors']}")
+    print(f"Time: {elapsed:.2f}s")
+
+def query_main(args):
+    timings = {}
+    started = time.perf_counter()
+    data, index, _ = build_chunks(args.project, args.chunks)
+    timings['update'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    chunk_index = ChunkIndex(data)
+    graph = DependencyGraph(index)
+    timings['load'] = time.perf_counter() - started
+
+    current = None
+    related = []
+    if args.file:
+        current = graph.resolve(args.file)
+        if current is None:
+            project_dir = os.path.dirname(os.path.abspath(args.project))
+            current = graph.resolve(os.path.relpath(os.path.abspath(args.file), project_dir))
+        if current is None:
+            print(f"ERROR: '{args.file}' is not a unit or file in the project")
+            sys.exit(1)
+        related = [row['key'] for row in graph.dependencies(current, hops=1)]
+
+    started = time.perf_counter()
+    chunks = chunk_index.search(args.question, args.budget, args.top_k, current, args.line, related)
+    timings['search'] = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(chunks, indent=2))
+        return
+    if args.context:
+        print(format_chunks(os.path.dirname(os.path.abspath(args.project)), chunks, args.minify))
+        return
+
+    print(f"Top {len(chunks)} chunk(s) for: {args.question}")
+    print("="*80)
+    print(f"{'Score':>7} {'Tokens':>7}  {'Lines':<11} {'Routine':<30} File")
+    print("-"*80)
+    for chunk in chunks:
+        score = 'cursor' if chunk['pinned'] else f"{chunk['score']:.2f}"
+        lines = f"{chunk['first']}-{chunk['last']}"
+        print(f"{score:>7} {chunk['tokens']:>7}  {lines:<11} {chunk['name'][:30]:<30} {chunk['key']}")
+    print("-"*80)
+    for chunk in chunks:
+        if chunk.get('trimmed'):
+            print(f"Cursor chunk {chunk['name'] or chunk['key']} (lines {chunk['trimmed'][0]}-{chunk['trimmed'][1]}) "
+                  f"is over the budget; sent lines {chunk['first']}-{chunk['last']} around the cursor")
+
+    used = sum(c['tokens'] for c in chunks)
+    files = {c['key'] for c in chunks}
+    whole = sum(index['entries'][key]['tokens'] for key in files)
+    saved = f"{1 - used / whole:.0%} less" if whole else "n/a"
+    print(f"Chunks: ~{used:,} tokens of {args.budget:,} budget  |  "
+          f"Same {len(files)} file(s) whole: ~{whole:,} tokens ({saved})")
+    print(f"Index: {len(chunk_index.chunks):,} chunks, {len(chunk_index.postings):,} terms  |  "
+          f"update {timings['update'] * 1000:.0f} ms, load {timings['load'] * 1000:.0f} ms, "
+          f"search {timings['search'] * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk-level BM25 retrieval over a Delphi project")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Create or incrementally update the chunk index")
+    build.add_argument('project', help=".dproj file")
+    build.add_argument('--chunks', help="Chunk file (default: <Project>.pythia-chunks.json)")
+    build.add_argument('--full', action='store_true', help="Re-index and re-chunk everything")
+
+    query = subparsers.add_parser('query', help="Top chunks for a question under a token budget")
+    query.add_argument('project', help=".dproj file")
+    query.add_argument('question', help="The user question (identifiers in it weigh most)")
+    query.add_argument('--chunks', help="Chunk file (default: <Project>.pythia-chunks.json)")
+    query.add_argument('--file', help="Current file: unit name, Include path or file path")
+    query.add_argument('--line', type=int, help="Cursor line in --file; its chunk is always included")
+    query.add_argument('--budget', type=int, default=DEFAULT_MAX_TOKENS,
+                       help=f"Token budget for the chunks (default: {DEFAULT_MAX_TOKENS})")
+    query.add_argument('--top-k', type=int, default=10, help="Maximum number of chunks (default: 10)")
+    output = query.add_mutually_exclusive_group()
+    output.add_argument('--context', action='store_true', help="Print the chunks as prompt context")
+    output.add_argument('--json', action='store_true', help="Print the ranked chunks as JSON")
+    query.add_argument('--minify', action='store_true',
+                       help="With --context, strip comments and blank runs (see context_minifier.py)")
+
+    args = parser.parse_args()
+    if not os.path.isfile(args.project):
+        print(f"ERROR: Project file not found: {args.project}")
+        sys.exit(1)
+    if args.command == 'build':
+        build_main(args)
+    else:
+        query_main(args)
+
+if __name__ == '__main__':
+    main()
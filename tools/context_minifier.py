@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Context minifier: token savings and throughput
+    context_minifier.py Project.dproj                 savings per unit and form
+    context_minifier.py Unit1.pas --show              print the minified unit
+    context_minifier.py Project.dproj --benchmark     MB/s over the whole project
+
+Runs pythia_minify.py over a project's units plus the .dfm/.fmx next to
+them and reports, per file, characters, Length div 3 estimates and BPE
+tokens before and after, how many units now fit MaxTokens as the current
+file, and what the saved input tokens are worth per 1,000 requests.
+--line-map writes the output-to-original line runs for citations.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+import pythia_ledger
+from pythia_context import DEFAULT_MAX_TOKENS, estimate_tokens, utf16_length
+from pythia_history import percentile
+from pythia_minify import DFM_EXTENSIONS, compress_line_map, minify
+from pythia_providers import route_model
+from pythia_tokens import encoding_for_model, get_counter
+from token_counter import collect_sources
+
+def collect_files(inputs):
+    """Source paths for the inputs, plus the form file of every unit that has one"""
+    paths = []
+    seen = set()
+    for _, path, _ in collect_sources(inputs):
+        candidates = [path] + [os.path.splitext(path)[0] + ext for ext in DFM_EXTENSIONS]
+        for candidate in candidates:
+            if candidate not in seen and (candidate == path or os.path.isfile(candidate)):
+                seen.add(candidate)
+                paths.append(candidate)
+    return paths
+
+def read_text(path):
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8-sig', errors='replace')
+
+def measure(path, text, count, keep_docs):
+    """Before/after figures for one file"""
+    started = time.perf_counter()
+    minified, line_map, kind = minify(text, os.path.splitext(path)[1], keep_docs)
+    elapsed = time.perf_counter() - started
+    return {
+        'path': path,
+        'kind': kind,
+        'bytes': len(text.encode('utf-8')),
+        'lines': text.count('\n') + 1,
+        'lines_after': len(line_map),
+        'chars': utf16_length(text),
+        'chars_after': utf16_length(minified),
+        'estimate': estimate_tokens(text),
+        'estimate_after': estimate_tokens(minified),
+        'tokens': count(text),
+        'tokens_after': count(minified),
+        'seconds': elapsed,
+        'line_map': compress_line_map(line_map),
+    }
+
+def saving(before, after):
+    return 1 - after / before if before else 0.0
+
+def print_report(rows, encoding, model, max_tokens, top):
+    print(f"\nLargest savings ({encoding} tokens)")
+    print("="*96)
+    print(f"{'File':<36} {'Kind':<9} {'Lines':>11} {'Tokens':>8} {'After':>8} {'Saved':>7} {'div 3 after':>12}")
+    print("-"*96)
+    for row in sorted(rows, key=lambda r: r['tokens'] - r['tokens_after'], reverse=True)[:top]:
+        print(f"{os.path.basename(row['path'])[:36]:<36} {row['kind']:<9} "
+              f"{row['lines']:>5}>{row['lines_after']:<5} {row['tokens']:>8,} {row['tokens_after']:>8,} "
+              f"{saving(row['tokens'], row['tokens_after']):>7.1%} {row['estimate_after']:>12,}")
+
+    print("\n" + "="*96)
+    print("SUMMARY")
+    print("="*96)
+    for kind in ('pascal', 'dfm'):
+        subset = [r for r in rows if r['kind'] == kind]
+        if not subset:
+            continue
+        before = sum(r['tokens'] for r in subset)
+        after = sum(r['tokens_after'] for r in subset)
+        chars = sum(r['chars'] for r in subset)
+        chars_after = sum(r['chars_after'] for r in subset)
+        print(f"{kind:<7} {len(subset):>5} files: {before:,} -> {after:,} tokens ({saving(before, after):.1%} saved), "
+              f"{chars:,} -> {chars_after:,} chars")
+    unchanged = sum(1 for r in rows if r['kind'] == 'unchanged')
+    if unchanged:
+        print(f"Left unchanged (binary forms, other types): {unchanged}")
+
+    units = [r for r in rows if r['kind'] == 'pascal']
+    if units:
+        fits = sum(1 for r in units if r['estimate'] <= max_tokens)
+        fits_after = sum(1 for r in units if r['estimate_after'] <= max_tokens)
+        print(f"Units within MaxTokens {max_tokens} as the current file (Length div 3): "
+              f"{fits} -> {fits_after} of {len(units)}")
+        saved = sorted(r['tokens'] - r['tokens_after'] for r in units)
+        median_saved = percentile(saved, 50)
+        print(f"Tokens saved per request with a unit as the current file: median {median_saved:,.0f}, "
+              f"max {saved[-1]:,}")
+        provider = route_model(model) or 'openai'
+        price = pythia_ledger.find_price(pythia_ledger.load_pricing(), provider, model)
+        if price:
+            print(f"At {model}'s input price: ${median_saved * price[0]:,.2f} "
+                  f"saved per 1,000 requests (median unit)")
+
+def run_benchmark(texts, keep_docs, repeat):
+    """Minify every file repeat times (already in memory) and report throughput"""
+    print("\nTHROUGHPUT BENCHMARK")
+    print("="*96)
+    per_kind = {}
+    file_ms = []
+    for path, text in texts:
+        ext = os.path.splitext(path)[1]
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            _, _, kind = minify(text, ext, keep_docs)
+            times.append(time.perf_counter() - started)
+        best = min(times)
+        file_ms.append(best * 1000)
+        stats = per_kind.setdefault(kind, {'files': 0, 'bytes': 0, 'lines': 0, 'seconds': 0.0})
+        stats['files'] += 1
+        stats['bytes'] += len(text.encode('utf-8'))
+        stats['lines'] += text.count('\n') + 1
+        stats['seconds'] += best
+    for kind, stats in per_kind.items():
+        mb = stats['bytes'] / (1024 * 1024)
+        print(f"{kind:<9} {stats['files']:>6} files  {mb:8.2f} MB  {stats['seconds']:7.3f}s  "
+              f"{mb / max(stats['seconds'], 1e-9):7.1f} MB/s  {stats['lines'] / max(stats['seconds'], 1e-9):>12,.0f} lines/s")
+    total_mb = sum(s['bytes'] for s in per_kind.values()) / (1024 * 1024)
+    total_seconds = sum(s['seconds'] for s in per_kind.values())
+    print(f"{'all':<9} {len(texts):>6} files  {total_mb:8.2f} MB  {total_seconds:7.3f}s  "
+          f"{total_mb / max(total_seconds, 1e-9):7.1f} MB/s   (best of {repeat} per file)")
+    print(f"Per file: p50 {percentile(file_ms, 50):.2f} ms, p95 {percentile(file_ms, 95):.2f} ms, "
+          f"max {max(file_ms):.2f} ms")
+
+def write_rows(path, rows):
+    fields = [k for k in rows[0] if k != 'line_map']
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([{k: r[k] for k in fields} for r in rows], f, indent=2)
+    print(f"Per-file results written to {path}")
+
+def show(path, keep_docs, line_numbers):
+    minified, line_map, _ = minify(read_text(path), os.path.splitext(path)[1], keep_docs)
+    if not line_numbers:
+        print(minified)
+        return
+    for number, line in zip(line_map, minified.splitlines()):
+        print(f"{number:>6}| {line}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify Pascal and DFM context and report the token savings")
+    parser.add_argument('inputs', nargs='+', help=".dproj files, directories or source files")
+    parser.add_argument('--show', action='store_true', help="Print the minified text of each file instead")
+    parser.add_argument('--line-numbers', action='store_true', help="With --show, prefix original line numbers")
+    parser.add_argument('--no-docs', action='store_true', help="Drop /// doc comments too")
+    parser.add_argument('--model', default='gpt-4', help="Model whose tokenizer and price to use (default: gpt-4)")
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS,
+                        help=f"MaxTokens for the fit count (default: {DEFAULT_MAX_TOKENS})")
+    parser.add_argument('--top', type=int, default=15, help="Rows in the savings table")
+    parser.add_argument('--benchmark', action='store_true', help="Also measure minification throughput")
+    parser.add_argument('--repeat', type=int, default=5, help="Benchmark passes per file (default: 5)")
+    parser.add_argument('--line-map', metavar='FILE', help="Write {path: [[out line, original line, count]]} JSON")
+    parser.add_argument('--output', help="Write per-file results to a .json or .csv file")
+    args = parser.parse_args()
+    keep_docs = not args.no_docs
+
+    paths = collect_files(args.inputs)
+    if not paths:
+        parser.error("no source files found")
+    if args.show:
+        for path in paths:
+            if len(paths) > 1:
+                print(f"// ---- {path}")
+            show(path, keep_docs, args.line_numbers)
+        return
+
+    encoding, count = get_counter(encoding_for_model(args.model))
+    print("Pythia Context Minifier")
+    print("="*96)
+    print(f"Files: {len(paths)}  |  Tokenizer: {encoding}  |  /// docs {'kept' if keep_docs else 'dropped'}")
+    texts = []
+    for path in paths:
+        try:
+            texts.append((path, read_text(path)))
+        except OSError as e:
+            print(f"⚠️ Skipping {path}: {e}")
+    if not texts:
+        sys.exit(1)
+    rows = [measure(path, text, count, keep_docs) for path, text in texts]
+    print_report(rows, encoding, args.model, args.max_tokens, args.top)
+
+    if args.benchmark:
+        run_benchmark(texts, keep_docs, args.repeat)
+    if args.line_map:
+        with open(args.line_map, 'w', encoding='utf-8') as f:
+            json.dump({r['path']: r['line_map'] for r in rows}, f)
+        print(f"Line maps written to {args.line_map}")
+    if args.output:
+        write_rows(args.output, rows)
+
+if __name__ == '__main__':
+    main()
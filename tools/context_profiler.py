@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Project context-size profiler
+Resolves a .dproj's DCCReference entries the way TStandaloneContextProvider
+does, reads every unit in parallel and reports, per file, how big the prompt
+context would be with that file as the current file plus the units it uses
+directly (the related files GatherContext adds from the source index), its
+estimated tokens (Length div 3) and what PrioritizeAndTruncate would drop or
+cut at MaxTokens.
+The per-unit prompt tokens are recorded in the benchmark history
+(pythia_history.py) so 'history compare' catches context growth.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import pythia_history
+
+from pythia_context import (CT_CURRENT_FILE, CT_PROJECT_FILE, CT_RELATED_FILE, DEFAULT_MAX_TOKENS,
+                            CURRENT_FILE_CUT, SOURCE_EXTENSIONS, parse_project_file, resolve_include,
+                            measure_source, context_item, format_context, estimate_tokens, utf16_length)
+from pythia_graph import DependencyGraph
+from pythia_index import build_index
+
+def profile_file(path, max_tokens, related=()):
+    """Size, token and truncation figures for one unit as the current file
+
+    related is [(path, chars)] of the files GetRelatedFiles returns, in
+    GatherContext order. PrioritizeAndTruncate drops them from the end until
+    the budget holds, and only then keeps the first 50,000 characters of the
+    current file. Sizes come from the bytes and the index without decoding.
+    """
+    row = {
+        'path': path,
+        'status': None,
+        'bytes': None,
+        'chars': None,
+        'tokens': None,
+        'related_files': len(related),
+        'related_tokens': sum(max(1, chars // 3) for _, chars in related),
+        'related_dropped': 0,
+        'formatted_chars': None,
+        'formatted_tokens': None,
+        'tokens_after_cut': None,
+    }
+    if not path.lower().endswith(SOURCE_EXTENSIONS):
+        row['status'] = 'skipped'  # e.g. rtl.dcp package references
+        return row
+    try:
+        row['bytes'], chars = measure_source(path)
+    except OSError:
+        row['status'] = 'missing'
+        return row
+
+    # FormatContextForAI wraps each content in a fixed header and code fence
+    overhead = utf16_length(format_context([context_item(CT_CURRENT_FILE, path, '')] +
+                                           [context_item(CT_RELATED_FILE, p, '') for p, _ in related]))
+    row['chars'] = chars
+    row['tokens'] = max(1, chars // 3)
+    row['formatted_chars'] = overhead + chars + sum(c for _, c in related)
+    row['formatted_tokens'] = max(1, row['formatted_chars'] // 3)
+
+    total = row['tokens'] + row['related_tokens']
+    if total <= max_tokens:
+        row['status'] = 'fits'
+        return row
+    for _, related_chars in reversed(related):
+        if total <= max_tokens:
+            break
+        total -= max(1, related_chars // 3)
+        row['related_dropped'] += 1
+    if total <= max_tokens:
+        row['tokens_after_cut'] = total
+        row['status'] = 'trimmed'
+    else:
+        row['tokens_after_cut'] = max(1, min(chars, CURRENT_FILE_CUT) // 3)
+        row['status'] = 'over' if row['tokens_after_cut'] > max_tokens else 'truncated'
+    return row
+
+def related_files(index, project_dir):
+    """{current file path: [(path, chars)]} of the units each file uses directly
+
+    The same 1-hop uses/{$I} neighbours, in the same order, as
+    TSourceIndex.GetDependencies(FileName, 1) in the standalone provider.
+    """
+    graph = DependencyGraph(index)
+    related = {}
+    for key in index['entries']:
+        files = []
+        for target, _ in graph.neighbours(key, hops=1):
+            entry = index['entries'].get(target)
+            if entry:
+                files.append((resolve_include(project_dir, target), entry['chars']))
+        related[resolve_include(project_dir, key)] = files
+    return related
+
+def profile_project(project_path, max_tokens, workers=None):
+    """(rows, project_list_stats, timings) for every DCCReference in a project
+
+    Brings the project's source index up to date first, as source_index.py
+    would, since the related files come from its graph.
+    """
+    started = time.perf_counter()
+    project_dir = os.path.dirname(os.path.abspath(project_path))
+    files = parse_project_file(project_path)
+    parsed = time.perf_counter()
+    index, _ = build_index(project_path, workers=workers)
+    related = related_files(index, project_dir)
+    indexed = time.perf_counter()
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(lambda f: profile_file(f, max_tokens, related.get(f, ())), files))
+    finished = time.perf_counter()
+
+    # GatherContext(True) adds one entry per file; their TokenCount stays 0, so
+    # the budget never sees them even though they are sent
+    project_section = format_context([context_item(CT_PROJECT_FILE, f, '') for f in files])
+    project_list = {'files': len(files), 'formatted_chars': utf16_length(project_section),
+                    'formatted_tokens': estimate_tokens(project_section)}
+    timings = {'parse': parsed - started, 'index': indexed - parsed, 'read': finished - indexed,
+               'total': finished - started, 'bytes_read': sum(r['bytes'] or 0 for r in rows)}
+    return rows, project_list, timings
+
+def print_report(rows, project_list, timings, max_tokens, top):
+    counts = {}
+    for row in rows:
+        counts[row['status']] = counts.get(row['status'], 0) + 1
+    profiled = [r for r in rows if r['tokens'] is not None]
+
+    print(f"\nLargest units as current file (MaxTokens {max_tokens})")
+    print("="*80)
+    print(f"{'Unit':<28} {'KB':>7} {'Tokens':>7} {'Related':>8} {'Prompt tok':>10} {'After cut':>9}  Status")
+    print("-"*80)
+    for row in sorted(profiled, key=lambda r: r['tokens'], reverse=True)[:top]:
+        after_cut = '' if row['tokens_after_cut'] is None else row['tokens_after_cut']
+        print(f"{os.path.basename(row['path'])[:28]:<28} {row['bytes'] / 1024:>7.1f} {row['tokens']:>7} "
+              f"{row['related_tokens']:>8} {row['formatted_tokens']:>10} {after_cut:>9}  {row['status']}")
+
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+    print(f"References: {len(rows)}  |  Fit: {counts.get('fits', 0)}  |  "
+          f"Fit once related files dropped: {counts.get('trimmed', 0)}")
+    print(f"Cut to {CURRENT_FILE_CUT:,} chars: {counts.get('truncated', 0)}  |  "
+          f"Still over after cut: {counts.get('over', 0)}")
+    if counts.get('missing') or counts.get('skipped'):
+        print(f"Missing: {counts.get('missing', 0)}  |  Not source (skipped): {counts.get('skipped', 0)}")
+    if profiled:
+        tokens = sorted(r['tokens'] for r in profiled)
+        print(f"Tokens per unit: median {tokens[len(tokens) // 2]}, max {tokens[-1]}, "
+              f"total {sum(tokens):,}")
+    print(f"Project file list (GatherContext(True)): {project_list['formatted_chars']:,} chars, "
+          f"~{project_list['formatted_tokens']:,} tokens, not counted against MaxTokens")
+    mb = timings['bytes_read'] / (1024 * 1024)
+    print(f"Time: {timings['total']:.2f}s (parse {timings['parse']:.2f}s, index {timings['index']:.2f}s, "
+          f"read {timings['read']:.2f}s)  |  "
+          f"{mb:.1f} MB at {mb / max(timings['read'], 1e-9):.0f} MB/s")
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ['path'])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Per-file results written to {path}")
+
+def record_history(rows, args):
+    """Store the prompt tokens each unit would send as the current file"""
+    tokens = [row['tokens_after_cut'] or row['formatted_tokens'] for row in rows if row['formatted_tokens']]
+    series = [{'target': os.path.basename(args.project), 'shape': f"max_tokens={args.max_tokens}",
+               'metrics': {'prompt_tokens': tokens}}]
+    return pythia_history.record_run('context_profiler', series, args.label,
+                                     {'project': os.path.abspath(args.project)})
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile prompt context size for every unit in a Delphi project")
+    parser.add_argument('project', help=".dproj file")
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS,
+                        help=f"Budget passed to PrioritizeAndTruncate (default: {DEFAULT_MAX_TOKENS})")
+    parser.add_argument('--top', type=int, default=20, help="Rows in the largest-units table (default: 20)")
+    parser.add_argument('--workers', type=int, help="Parallel file readers (default: 4 per CPU, max 32)")
+    parser.add_argument('--json', metavar='FILE', help="Write per-file results as JSON")
+    parser.add_argument('--csv', metavar='FILE', help="Write per-file results as CSV")
+    parser.add_argument('--label', help="Note stored with the run in the benchmark history")
+    parser.add_argument('--no-history', action='store_true', help="Do not record this run in the benchmark history")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.project):
+        print(f"ERROR: Project file not found: {args.project}")
+        sys.exit(1)
+
+    print("Pythia Context Profiler")
+    print("="*80)
+    print(f"Project: {args.project}")
+    rows, project_list, timings = profile_project(args.project, args.max_tokens, args.workers)
+    if not rows:
+        print("No DCCReference entries found")
+        sys.exit(1)
+    print_report(rows, project_list, timings, args.max_tokens, args.top)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'project': args.project, 'max_tokens': args.max_tokens,
+                       'project_list': project_list, 'timings': timings, 'files': rows}, f, indent=2)
+        print(f"Per-file results written to {args.json}")
+    if args.csv:
+        write_csv(args.csv, rows)
+    if not args.no_history:
+        run_id = record_history(rows, args)
+        if run_id:
+            print(f"Recorded as run {run_id} in {pythia_history.get_history_path()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Replay recorded chat sessions under history-compaction strategies
+Each turn is sent the way SendMessageWithContext does it (fresh context as a
+system message, then the history), once per strategy:
+
+    full       the whole history, as the plugin does today
+    window     the most recent messages that fit the budget
+    drop-code  code blocks in older turns replaced by a marker, then window
+    summarize  older turns folded into an extractive summary
+
+Every strategy except 'full' is held to --budget prompt tokens. History is
+taken from the recorded assistant replies, so all strategies see the same
+conversation. The report shows prompt-token and latency growth per turn, and
+two quality proxies against 'full': recall of the identifiers and words in the
+full prompt, and difflib similarity of the replies. --cache answers turns
+that were already sent with the same prompt from the response cache, so
+re-running a suite after changing one strategy only pays for that strategy
+(cached turns report their lookup time as latency).
+
+Input JSONL, one session per line:
+    {"id": "s1", "turns": [{"user": "...", "context": "...", "assistant": "..."}, ...]}
+"""
+
+import re
+import sys
+import json
+import difflib
+import argparse
+
+import pythia_responses
+from pythia_context import estimate_tokens
+from pythia_chunks import tokenize
+from pythia_providers import PROVIDERS, BASE_URL_ENV, route_model, with_context, set_base_url_override
+from batch_runner import ROUTE_PROVIDERS, load_credentials, run_item
+from pythia_history import percentile
+
+STRATEGIES = ('full', 'window', 'drop-code', 'summarize')
+DEFAULT_BUDGET = 6000
+# Turns (user + assistant pairs) that drop-code and summarize always keep verbatim
+KEEP_RECENT_TURNS = 2
+SUMMARY_CHARS = 160
+CODE_MARKER = '[code omitted]'
+
+_CODE_BLOCK = re.compile(r'```.*?(?:```|$)', re.DOTALL)
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+def load_sessions(path):
+    """[(id, turns)] from a sessions JSONL file"""
+    sessions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+                turns = [t for t in item['turns'] if t.get('user')]
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"⚠️ Skipping {path}:{line_no}: {e}")
+                continue
+            if turns:
+                sessions.append((str(item.get('id', line_no)), turns))
+    return sessions
+
+def message_tokens(messages):
+    return sum(estimate_tokens(m['content']) for m in messages)
+
+def fit_window(history, current, budget):
+    """The newest history messages that fit next to current (whole user/assistant pairs)"""
+    room = budget - message_tokens(current)
+    kept = []
+    for i in range(len(history) - 2, -1, -2):
+        pair = history[i:i + 2]
+        cost = message_tokens(pair)
+        if cost > room:
+            break
+        kept[:0] = pair
+        room -= cost
+    return kept + current
+
+def strip_code(message):
+    return dict(message, content=_CODE_BLOCK.sub(CODE_MARKER, message['content']))
+
+def first_sentence(text):
+    text = ' '.join(_CODE_BLOCK.sub(' ', text).split())
+    sentence = _SENTENCE_END.split(text, 1)[0]
+    return sentence if len(sentence) <= SUMMARY_CHARS else sentence[:SUMMARY_CHARS - 3] + '...'
+
+def summarize_turns(history, max_tokens):
+    """A user/assistant pair recapping older turns by their first sentences
+
+    A pair rather than one message keeps roles alternating for Anthropic.
+    The oldest turns are left out until the pair fits in max_tokens; [] if
+    not even one turn does.
+    """
+    lines = [f"- Asked: {first_sentence(history[i]['content'])} "
+             f"Answer: {first_sentence(history[i + 1]['content'])}"
+             for i in range(0, len(history) - 1, 2)]
+    for skipped in range(len(lines)):
+        header = 'Summary of the earlier conversation'
+        header += f" ({skipped} oldest turn(s) left out):" if skipped else ':'
+        summary = [{"role": "user", "content": '\n'.join([header] + lines[skipped:])},
+                   {"role": "assistant", "content": "Understood, continuing from that summary."}]
+        if message_tokens(summary) <= max_tokens:
+            return summary
+    return []
+
+def compact(strategy, history, current, context, budget):
+    """(messages, context) a strategy sends; budget covers both"""
+    room = budget - estimate_tokens(context) if context else budget
+    if strategy == 'full':
+        return history + current, context
+    if strategy == 'window':
+        return fit_window(history, current, room), context
+    split = max(0, len(history) - 2 * KEEP_RECENT_TURNS)
+    older, recent = history[:split], history[split:]
+    if strategy == 'drop-code':
+        return fit_window([strip_code(m) for m in older] + recent, current, room), context
+    # summarize: the recent turns are windowed first; the summary leads them,
+    # recapping whatever did not fit, cut to the room they leave
+    window = fit_window(recent, current, room)
+    left_out = older + recent[:len(recent) - (len(window) - len(current))]
+    summary = summarize_turns(left_out, room - message_tokens(window)) if left_out else []
+    return summary + window, context
+
+def term_recall(full_text, text):
+    """Share of the distinct terms in full_text that text still contains"""
+    full_terms = set(tokenize(full_text))
+    if not full_terms:
+        return 1.0
+    return len(full_terms & set(tokenize(text))) / len(full_terms)
+
+def prompt_text(messages, context):
+    return '\n'.join(m['content'] for m in with_context(messages, context))
+
+def replay_session(session_id, turns, strategies, args, target):
+    """Per-turn rows for one session under every strategy"""
+    rows = []
+    history = []
+    for number, turn in enumerate(turns, 1):
+        current = [{"role": "user", "content": turn['user']}]
+        context = turn.get('context', '')
+        full_prompt = prompt_text(history + current, context)
+        replies = {}
+        for strategy in strategies:
+            messages, sent_context = compact(strategy, history, current, context, args.budget)
+            row = {'session': session_id, 'turn': number, 'strategy': strategy,
+                   'messages': len(messages),
+                   'prompt_tokens': estimate_tokens(sent_context) + message_tokens(messages),
+                   'recall': term_recall(full_prompt, prompt_text(messages, sent_context)),
+                   'latency': None, 'reported_prompt_tokens': None, 'similarity': None, 'error': ''}
+            if target:
+                route, provider_id, api_key = target
+                record = run_item(f"{session_id}#{number}", messages, sent_context, route, provider_id,
+                                  api_key, args.model, args.timeout)
+                row['latency'] = record['latency']
+                row['error'] = record['error'] or ''
+                if record['usage']:
+                    row['reported_prompt_tokens'] = record['usage']['prompt_tokens']
+                replies[strategy] = record['reply'] or ''
+            rows.append(row)
+        reference = replies.get('full', '')
+        for row in rows[-len(strategies):]:
+            if row['strategy'] in replies and reference:
+                row['similarity'] = difflib.SequenceMatcher(None, reference, replies[row['strategy']]).ratio()
+        # Recorded replies keep the conversation identical across strategies
+        history += current + [{"role": "assistant",
+                               "content": turn.get('assistant') or reference or ''}]
+    return rows
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+def summarize(rows, strategies):
+    summary = {}
+    for strategy in strategies:
+        group = [r for r in rows if r['strategy'] == strategy]
+        by_turn = {}
+        for row in group:
+            by_turn.setdefault(row['turn'], []).append(row)
+        latencies = [r['latency'] for r in group if r['latency'] is not None and not r['error']]
+        summary[strategy] = {
+            'per_turn': {turn: {'prompt_tokens': mean(r['prompt_tokens'] for r in turn_rows),
+                                'latency': mean(r['latency'] for r in turn_rows)}
+                         for turn, turn_rows in sorted(by_turn.items())},
+            'prompt_tokens': sum(r['prompt_tokens'] for r in group),
+            'max_prompt_tokens': max((r['prompt_tokens'] for r in group), default=0),
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'recall': mean(r['recall'] for r in group),
+            'similarity': mean(r['similarity'] for r in group),
+            'errors': sum(1 for r in group if r['error']),
+        }
+    return summary
+
+def format_value(value, fmt):
+    return format(value, fmt) if value is not None else '-'
+
+def print_report(summary, strategies, budget):
+    turns = sorted(summary[strategies[0]]['per_turn'])
+    print("\n" + "="*80)
+    print("PROMPT TOKENS PER TURN (mean over sessions; latency ms in brackets when replayed live)")
+    print("="*80)
+    print(f"{'Turn':>4}  " + ''.join(f"{s:>18}" for s in strategies))
+    print("-"*80)
+    step = max(1, len(turns) // 20)
+    for turn in turns[::step] + ([turns[-1]] if turns[::step][-1] != turns[-1] else []):
+        cells = []
+        for strategy in strategies:
+            cell = summary[strategy]['per_turn'][turn]
+            text = f"{cell['prompt_tokens']:,.0f}"
+            if cell['latency'] is not None:
+                text += f" [{cell['latency'] * 1000:.0f}]"
+            cells.append(f"{text:>18}")
+        print(f"{turn:>4}  " + ''.join(cells))
+
+    print("\n" + "="*80)
+    print(f"STRATEGIES (budget {budget:,} tokens)")
+    print("="*80)
+    print(f"{'Strategy':<11} {'Total tok':>11} {'Max tok':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'Recall':>7} {'Reply sim':>10} {'Errors':>7}")
+    print("-"*80)
+    full_total = summary['full']['prompt_tokens'] if 'full' in summary else None
+    for strategy in strategies:
+        s = summary[strategy]
+        print(f"{strategy:<11} {s['prompt_tokens']:>11,} {s['max_prompt_tokens']:>8,} "
+              f"{format_value(s['latency_p50'] and s['latency_p50'] * 1000, '.0f'):>8} "
+              f"{format_value(s['latency_p95'] and s['latency_p95'] * 1000, '.0f'):>8} "
+              f"{format_value(s['recall'], '.1%'):>7} {format_value(s['similarity'], '.2f'):>10} {s['errors']:>7}")
+    if full_total:
+        print("-"*80)
+        for strategy in strategies:
+            if strategy != 'full':
+                print(f"{strategy}: {1 - summary[strategy]['prompt_tokens'] / full_total:.0%} fewer prompt "
+                      f"tokens than full history, keeping {summary[strategy]['recall']:.0%} of its terms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay chat sessions under history-compaction strategies")
+    parser.add_argument('sessions', help="Sessions JSONL file")
+    parser.add_argument('--model', default='GPT-4',
+                        help="Model name as shown in Pythia's combo box, e.g. 'Claude 3.5 Sonnet'")
+    parser.add_argument('--provider', choices=list(PROVIDERS),
+                        help="Send to this provider instead of the one the model routes to")
+    parser.add_argument('--strategy', action='append', choices=STRATEGIES,
+                        help="Strategy to run (repeatable; default: all). 'full' is always included")
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                        help=f"Prompt token budget for the compacting strategies (default: {DEFAULT_BUDGET})")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only measure prompt sizes and recall; send nothing")
+    parser.add_argument('--timeout', type=float, default=120, help="Per-request read timeout in seconds")
+    parser.add_argument('--base-url',
+                        help=f"Send requests to this host instead (e.g. a mock server); also read from {BASE_URL_ENV}")
+    parser.add_argument('--json', metavar='FILE', help="Write per-turn rows and the summary as JSON")
+    cache = parser.add_mutually_exclusive_group()
+    cache.add_argument('--cache', action='store_true',
+                       help="Answer repeated requests from the response cache and store new answers")
+    cache.add_argument('--cache-bypass', action='store_true',
+                       help="Always send, but store the answers in the response cache (refresh it)")
+    args = parser.parse_args()
+    set_base_url_override(args.base_url)
+    if args.cache or args.cache_bypass:
+        pythia_responses.configure('bypass' if args.cache_bypass else 'on')
+
+    strategies = ['full'] + [s for s in (args.strategy or STRATEGIES) if s != 'full']
+    sessions = load_sessions(args.sessions)
+    if not sessions:
+        print(f"ERROR: No sessions in {args.sessions}")
+        sys.exit(1)
+
+    print("Pythia Conversation Replay")
+    print("="*80)
+    target = None
+    if not args.dry_run:
+        route = route_model(args.model)
+        if route is None:
+            print(f"ERROR: Unknown model '{args.model}' (expected a GPT, Claude or Copilot model name)")
+            sys.exit(2)
+        provider_id = args.provider or ROUTE_PROVIDERS[route]
+        api_key = load_credentials(provider_id)
+        if not api_key:
+            sys.exit(1)
+        target = (route, provider_id, api_key)
+        print(f"Model: {args.model} -> {PROVIDERS[provider_id]['name']}")
+    print(f"Sessions: {len(sessions)}  |  Turns: {sum(len(t) for _, t in sessions)}  |  "
+          f"Strategies: {', '.join(strategies)}")
+
+    rows = []
+    for session_id, turns in sessions:
+        rows.extend(replay_session(session_id, turns, strategies, args, target))
+        print(f"  {session_id}: {len(turns)} turns replayed")
+
+    summary = summarize(rows, strategies)
+    print_report(summary, strategies, args.budget)
+    if pythia_responses.is_active():
+        print(pythia_responses.format_stats(pythia_responses.session_stats()))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'budget': args.budget, 'summary': summary, 'rows': rows}, f, indent=2)
+        print(f"\nWrote JSON results to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+GitHub Copilot chat client: how much latency goes to the token exchange
+Sends Pythia-shaped requests to api.githubcopilot.com/chat/completions under
+three token strategies and times the exchange separately from the chat call:
+
+    exchange  re-exchange the OAuth token before every request
+    memory    cache the Copilot token in the process only (TGitHubCopilotAuth
+              today); every run starts with an exchange
+    disk      pythia_copilot.CopilotTokenManager: disk cache plus background
+              refresh shortly before expires_at
+
+Requests are grouped into runs of --run-size; each run gets a fresh token
+manager, like a new tool process or IDE session. Strategies alternate per run.
+Offline, start the mock server and use a short token lifetime:
+
+    python mock_provider_server.py --exchange-latency fixed:0.2 --copilot-token-ttl 600
+    python copilot_client.py --base-url http://127.0.0.1:8787
+"""
+
+import sys
+import json
+import time
+import argparse
+import requests
+
+import pythia_http
+from pythia_copilot import CopilotTokenManager, exchange_token, read_oauth_token
+from pythia_providers import (BASE_URL_ENV, chat_url, copilot_token_url, build_headers,
+                              build_github_copilot_request, extract_reply, set_base_url_override)
+from pythia_history import percentile
+
+DEFAULT_MODEL = 'Copilot GPT-4'
+DEFAULT_PROMPT = "Explain what a Delphi class helper is in two sentences."
+STRATEGIES = ('exchange', 'memory', 'disk')
+
+class ExchangeEveryTime:
+    """Token source that re-exchanges on every call (the behaviour under test)"""
+
+    def __init__(self, oauth_token, timeout):
+        self.oauth_token = oauth_token
+        self.timeout = timeout
+        self.stats = {'exchanges': 0, 'exchange_time': 0.0}
+
+    def token(self):
+        entry = exchange_token(self.oauth_token, self.timeout)
+        self.stats['exchanges'] += 1
+        self.stats['exchange_time'] += entry['elapsed']
+        return entry['token'], True
+
+    def invalidate(self):
+        pass
+
+def token_source(strategy, oauth_token, timeout):
+    if strategy == 'exchange':
+        return ExchangeEveryTime(oauth_token, timeout)
+    return CopilotTokenManager(oauth_token, use_disk=(strategy == 'disk'), timeout=timeout)
+
+def send(source, payload, timeout):
+    """One chat request; returns (sample, reply)"""
+    sample = {'status': None, 'auth': 0.0, 'chat': 0.0, 'latency': None,
+              'exchanges': 0, 'reauth': False, 'error': ''}
+    reply = ''
+    started = time.perf_counter()
+    try:
+        for attempt in range(2):
+            auth_started = time.perf_counter()
+            token, exchanged = source.token()
+            sample['auth'] += time.perf_counter() - auth_started
+            sample['exchanges'] += int(exchanged)
+            chat_started = time.perf_counter()
+            response = pythia_http.post_json(chat_url('copilot'), payload, build_headers('copilot', token),
+                                             provider='copilot', retries=0, read_timeout=timeout)
+            sample['chat'] += time.perf_counter() - chat_started
+            sample['status'] = response.status_code
+            # A cached token the server no longer accepts: drop it and exchange once more
+            if response.status_code == 401 and attempt == 0 and not exchanged:
+                source.invalidate()
+                sample['reauth'] = True
+                continue
+            break
+        sample['latency'] = time.perf_counter() - started
+        if response.status_code != 200:
+            sample['error'] = f"HTTP {response.status_code}: {response.text[:160]}"
+        else:
+            reply = extract_reply('copilot', response.json())
+    except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+        sample['error'] = str(e)
+    return sample, reply
+
+def run_strategy(strategy, run, oauth_token, payload, run_size, interval, timeout):
+    """One run of run_size requests with a fresh token source"""
+    source = token_source(strategy, oauth_token, timeout)
+    samples = []
+    refreshing = False
+    try:
+        for number in range(1, run_size + 1):
+            sample, _ = send(source, payload, timeout)
+            sample.update(strategy=strategy, run=run, request=number)
+            samples.append(sample)
+            if strategy == 'disk' and source.current is not None and not refreshing:
+                # The first successful exchange is paid for inline; from here on
+                # the thread keeps the token fresh
+                try:
+                    source.start_refresh()
+                    refreshing = True
+                except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                    print(f"  ⚠️ Background refresh not started: {e}")
+            mark = 'x' if sample['exchanges'] else '.'
+            status = sample['error'][:60] if sample['error'] else f"{sample['latency'] * 1000:.0f} ms"
+            print(f"  [{strategy:<8} run {run} #{number:>2}] {mark} auth {sample['auth'] * 1000:>6.1f} ms  {status}")
+            if interval:
+                time.sleep(interval)
+    finally:
+        if strategy == 'disk':
+            source.stop_refresh()
+    return samples, source.stats
+
+def summarize(samples, stats):
+    summary = {}
+    for strategy in STRATEGIES:
+        group = [s for s in samples if s['strategy'] == strategy]
+        if not group:
+            continue
+        ok = [s for s in group if not s['error']]
+        latencies = [s['latency'] for s in ok]
+        total = sum(latencies)
+        auth = sum(s['auth'] for s in ok)
+        summary[strategy] = {
+            'requests': len(group),
+            'errors': len(group) - len(ok),
+            'exchanges': sum(st['exchanges'] for st in stats[strategy]),
+            'background_refreshes': sum(st.get('background_refreshes', 0) for st in stats[strategy]),
+            'reauth': sum(1 for s in group if s['reauth']),
+            'auth_mean': auth / len(ok) if ok else None,
+            'auth_share': auth / total if total else None,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'latency_mean': total / len(ok) if ok else None,
+        }
+    return summary
+
+def print_report(summary):
+    print("\n" + "="*86)
+    print("COPILOT TOKEN EXCHANGE REPORT")
+    print("="*86)
+    print(f"{'Strategy':<10} {'Requests':>8} {'Exchanges':>9} {'Bg refresh':>10} {'Auth ms':>8} "
+          f"{'Auth share':>10} {'p50 ms':>7} {'p95 ms':>7} {'Errors':>6}")
+    print("-"*86)
+    for strategy, row in summary.items():
+        if row['latency_mean'] is None:
+            print(f"{strategy:<10} {row['requests']:>8} {row['exchanges']:>9}  all requests failed")
+            continue
+        print(f"{strategy:<10} {row['requests']:>8} {row['exchanges']:>9} {row['background_refreshes']:>10} "
+              f"{row['auth_mean'] * 1000:>8.1f} {row['auth_share']:>10.1%} {row['latency_p50'] * 1000:>7.0f} "
+              f"{row['latency_p95'] * 1000:>7.0f} {row['errors']:>6}")
+    print("-"*86)
+    base = summary.get('exchange')
+    for strategy in ('memory', 'disk'):
+        row = summary.get(strategy)
+        if not (base and row and base['latency_mean'] and row['latency_mean']):
+            continue
+        change = 1 - row['latency_mean'] / base['latency_mean']
+        print(f"{strategy}: {base['exchanges']} -> {row['exchanges']} exchanges, mean latency "
+              f"{abs(change):.0%} {'lower' if change >= 0 else 'higher'} than exchanging every request")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the Copilot token exchange's share of request latency")
+    parser.add_argument('--strategies', default=','.join(STRATEGIES),
+                        help=f"Comma-separated subset of: {', '.join(STRATEGIES)}")
+    parser.add_argument('--runs', type=int, default=3, help="Runs per strategy (default: 3)")
+    parser.add_argument('--run-size', type=int, default=10, help="Requests per run (default: 10)")
+    parser.add_argument('--interval', type=float, default=0.0, help="Seconds between requests (default: 0)")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help=f"Pythia model name (default: {DEFAULT_MODEL})")
+    parser.add_argument('--prompt', default=DEFAULT_PROMPT, help="User message to send")
+    parser.add_argument('--timeout', type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument('--base-url',
+                        help=f"Send to this host instead (e.g. a mock server); also read from {BASE_URL_ENV}")
+    parser.add_argument('--json', metavar='FILE', help="Write the summary and samples as JSON")
+    args = parser.parse_args()
+    set_base_url_override(args.base_url)
+
+    strategies = [s.strip() for s in args.strategies.split(',') if s.strip()]
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            print(f"ERROR: Unknown strategy '{strategy}' (expected one of {', '.join(STRATEGIES)})")
+            sys.exit(2)
+
+    print("Pythia Copilot Token Exchange Benchmark")
+    print("="*86)
+    oauth_token = read_oauth_token()
+    if not oauth_token:
+        print("ERROR: No GitHub OAuth token (sign in from Pythia Settings, or set GITHUB_TOKEN)")
+        sys.exit(1)
+    print(f"Exchange: {copilot_token_url()}")
+    print(f"Chat:     {chat_url('copilot')}")
+    print(f"{args.runs} run(s) x {args.run_size} request(s) per strategy  ('x' = request waited for an exchange)")
+
+    if 'disk' in strategies:
+        # Start from a cold disk cache so the first disk run pays for its exchange too
+        CopilotTokenManager(oauth_token).invalidate()
+
+    payload = build_github_copilot_request([{"role": "user", "content": args.prompt}], args.model)
+    samples = []
+    stats = {strategy: [] for strategy in STRATEGIES}
+    for run in range(1, args.runs + 1):
+        for strategy in strategies:
+            run_samples, run_stats = run_strategy(strategy, run, oauth_token, payload, args.run_size,
+                                                  args.interval, args.timeout)
+            samples.extend(run_samples)
+            stats[strategy].append(run_stats)
+
+    summary = summarize(samples, stats)
+    print_report(summary)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'model': args.model, 'summary': summary, 'samples': samples}, f, indent=2)
+        print(f"\nWrote JSON results to {args.json}")
+    if not any(not s['error'] for s in samples):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Usage and cost report from the local ledger
+Aggregates the daily rollup kept by pythia_ledger.py by day, provider and/or
+model and prices it with pricing.json (edit it, or pass --pricing), with
+Anthropic prompt-cache writes and reads at their input-price multiples. Reads
+only the rollup, so it stays fast however many requests have been recorded.
+"""
+
+import sys
+import json
+import time
+import argparse
+
+import pythia_ledger
+
+DIMENSIONS = ('day', 'provider', 'model')
+
+def load_rollup(conn, since):
+    """Rollup rows on or after since (YYYY-MM-DD) as dicts"""
+    cursor = conn.execute(
+        'SELECT day, provider, model, requests, errors, prompt_tokens, completion_tokens, latency_ms, '
+        'cache_creation_tokens, cache_read_tokens FROM daily_rollup WHERE day >= ? ORDER BY day', (since,))
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+def aggregate(rows, pricing, group_by):
+    """Sum rollup rows by the group_by dimensions and price them"""
+    groups = {}
+    unpriced = set()
+    for row in rows:
+        key = tuple(row[d] for d in group_by)
+        group = groups.setdefault(key, {
+            **dict(zip(group_by, key)),
+            'requests': 0, 'errors': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+            'cache_creation_tokens': 0, 'cache_read_tokens': 0, 'latency_ms': 0.0, 'cost': 0.0
+        })
+        for field in ('requests', 'errors', 'prompt_tokens', 'completion_tokens',
+                      'cache_creation_tokens', 'cache_read_tokens', 'latency_ms'):
+            group[field] += row[field]
+        # Prices are per model, so cost is computed before rows are merged
+        cost = pythia_ledger.estimate_cost(pricing, row['provider'], row['model'],
+                                           row['prompt_tokens'], row['completion_tokens'],
+                                           row['cache_creation_tokens'], row['cache_read_tokens'])
+        if cost is None:
+            if row['prompt_tokens'] or row['completion_tokens'] or row['cache_read_tokens']:
+                unpriced.add(f"{row['provider']}/{row['model']}")
+        else:
+            group['cost'] += cost
+
+    result = []
+    for key in sorted(groups):
+        group = groups[key]
+        group['avg_latency_ms'] = group['latency_ms'] / group['requests'] if group['requests'] else 0
+        del group['latency_ms']
+        group['cost'] = round(group['cost'], 6)
+        result.append(group)
+    return result, sorted(unpriced)
+
+def print_report(groups, group_by, unpriced, since):
+    print(f"Usage since {since} (UTC days)")
+    print("="*102)
+    widths = {'day': 10, 'provider': 10, 'model': 30}
+    header = "".join(f"{d.capitalize():<{widths[d] + 2}}" for d in group_by)
+    print(f"{header}{'Requests':>9} {'Errors':>7} {'Input tok':>11} {'Cache wr':>10} {'Cache rd':>10} "
+          f"{'Output tok':>11} {'Avg ms':>8} {'Cost $':>10}")
+    print("-"*102)
+    totals = {'requests': 0, 'errors': 0, 'prompt_tokens': 0, 'cache_creation_tokens': 0,
+              'cache_read_tokens': 0, 'completion_tokens': 0, 'cost': 0.0}
+    for group in groups:
+        label = "".join(f"{str(group[d])[:widths[d]]:<{widths[d] + 2}}" for d in group_by)
+        print(f"{label}{group['requests']:>9} {group['errors']:>7} {group['prompt_tokens']:>11} "
+              f"{group['cache_creation_tokens']:>10} {group['cache_read_tokens']:>10} "
+              f"{group['completion_tokens']:>11} {group['avg_latency_ms']:>8.0f} {group['cost']:>10.4f}")
+        for field in totals:
+            totals[field] += group[field]
+    print("-"*102)
+    label = f"{'TOTAL':<{sum(widths[d] + 2 for d in group_by)}}"
+    print(f"{label}{totals['requests']:>9} {totals['errors']:>7} {totals['prompt_tokens']:>11} "
+          f"{totals['cache_creation_tokens']:>10} {totals['cache_read_tokens']:>10} "
+          f"{totals['completion_tokens']:>11} {'':>8} {totals['cost']:>10.4f}")
+    if unpriced:
+        print(f"\n⚠️ No price for: {', '.join(unpriced)} (add them to pricing.json)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Usage and cost report from the Pythia tools' ledger")
+    parser.add_argument('--days', type=int, default=30, help="Report the last N days (default: 30)")
+    parser.add_argument('--since', help="Report from this UTC day (YYYY-MM-DD) instead of --days")
+    parser.add_argument('--by', default='day,provider,model',
+                        help="Comma-separated grouping: day, provider, model (default: all three)")
+    parser.add_argument('--pricing', help=f"Pricing table (default: {pythia_ledger.PRICING_FILE})")
+    parser.add_argument('--ledger', help="Ledger file (default: PYTHIA_LEDGER or the data directory)")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Recompute the rollup from the raw request rows first")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    group_by = [d.strip() for d in args.by.split(',') if d.strip()]
+    unknown = [d for d in group_by if d not in DIMENSIONS]
+    if unknown or not group_by:
+        print(f"ERROR: --by takes {', '.join(DIMENSIONS)} (got '{args.by}')")
+        sys.exit(2)
+
+    path = args.ledger or pythia_ledger.get_ledger_path()
+    if path is None:
+        print(f"ERROR: The ledger is disabled ({pythia_ledger.LEDGER_ENV}=off)")
+        sys.exit(1)
+    try:
+        pricing = pythia_ledger.load_pricing(args.pricing)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"ERROR: Could not read pricing table: {e}")
+        sys.exit(1)
+
+    since = args.since or time.strftime('%Y-%m-%d', time.gmtime(time.time() - (args.days - 1) * 86400))
+    conn = pythia_ledger.open_ledger(path)
+    if args.rebuild:
+        pythia_ledger.rebuild_rollup(conn)
+    groups, unpriced = aggregate(load_rollup(conn, since), pricing, group_by)
+
+    if args.json:
+        print(json.dumps({'since': since, 'group_by': group_by, 'rows': groups,
+                          'unpriced': unpriced}, indent=2))
+    else:
+        print(f"Ledger: {path}\n")
+        print_report(groups, group_by, unpriced, since)
+
+if __name__ == '__main__':
+    main()
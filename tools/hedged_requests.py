@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Hedged chat requests across providers/models
+Sends each prompt to a primary target and, if no first token has arrived
+after a delay (a percentile of the primary's recent time-to-first-token, or
+a fixed --delay), fires the next backup target. The first stream to produce
+a token wins and is read to the end; the others are cancelled. Baseline
+(primary only) and hedged calls are interleaved so both see the same slow
+spells, and the report shows the p99 gain against the extra requests and cost.
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+import pythia_http
+import pythia_ledger
+from pythia_providers import (KEY_PROVIDERS, PROVIDERS, BASE_URL_ENV, chat_url, build_headers,
+                              build_pythia_payload, set_base_url_override)
+from pythia_sse import iter_sse_events, parse_stream_event
+from benchmark_providers import DEFAULT_PROMPT
+from pythia_history import percentile
+from pythia_config import read_config
+
+DEFAULT_DELAY_PCT = 95
+# Baseline TTFTs the hedge delay percentile is taken over
+DELAY_WINDOW = 100
+
+def parse_target(value):
+    """(provider_id, model) from PROVIDER=MODEL or PROVIDER (default model)"""
+    provider_id, _, model = value.partition('=')
+    if provider_id not in KEY_PROVIDERS:
+        print(f"ERROR: Unknown provider in '{value}' (expected one of {', '.join(KEY_PROVIDERS)})")
+        sys.exit(2)
+    return provider_id, model or PROVIDERS[provider_id]['default_model']
+
+def stream_payload(provider_id, model, prompt, max_tokens):
+    payload = build_pythia_payload(provider_id, prompt, model=model, max_tokens=max_tokens)
+    payload['stream'] = True
+    if PROVIDERS[provider_id]['format'] == 'openai':
+        payload['stream_options'] = {"include_usage": True}
+    return payload
+
+def run_attempt(target, api_key, payload, cancel, on_first_token, timeout):
+    """Stream one attempt until it ends or cancel is set; returns its record"""
+    provider_id, model = target
+    record = {'provider': provider_id, 'model': model, 'status': None, 'first_token_at': None,
+              'finished_at': None, 'prompt_tokens': None, 'completion_tokens': None,
+              'chunks': 0, 'cancelled': False, 'error': ''}
+    response = None
+    try:
+        # No retries: a retry would hide exactly the latency hedging is for
+        response = pythia_http.post_json(chat_url(provider_id), payload,
+                                         build_headers(provider_id, api_key),
+                                         provider=provider_id, retries=0,
+                                         read_timeout=timeout, stream=True)
+        record['status'] = response.status_code
+        if response.status_code != 200:
+            record['error'] = response.text[:200]
+        elif not cancel.is_set():
+            for event_name, data in iter_sse_events(response):
+                text, prompt_tokens, completion_tokens, done = parse_stream_event(provider_id, event_name, data)
+                if prompt_tokens is not None:
+                    record['prompt_tokens'] = prompt_tokens
+                if completion_tokens is not None:
+                    record['completion_tokens'] = completion_tokens
+                if text:
+                    record['chunks'] += 1
+                    if record['first_token_at'] is None:
+                        record['first_token_at'] = time.perf_counter()
+                        on_first_token()
+                if done or cancel.is_set():
+                    break
+        record['cancelled'] = cancel.is_set()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        record['error'] = str(e)
+        record['cancelled'] = cancel.is_set()
+    finally:
+        if response is not None:
+            response.close()
+            if record['completion_tokens'] is None:
+                # Cancelled or usage-less stream: one token per content delta
+                record['completion_tokens'] = record['chunks']
+            pythia_ledger.add_usage(getattr(response, 'ledger_id', None),
+                                    record['prompt_tokens'], record['completion_tokens'])
+    record['finished_at'] = time.perf_counter()
+    return record
+
+def hedged_call(pool, targets, keys, prompt, delay, max_tokens, timeout):
+    """Send prompt to targets[0], hedging with the next target every delay seconds
+
+    Returns (result, futures): result has the winner's ttft/total measured
+    from the start of the call; futures of cancelled attempts may still be
+    running when this returns and are collected later for cost accounting.
+    """
+    condition = threading.Condition()
+    state = {'winner': None}
+    cancels = []
+    futures = []
+
+    def launch(index):
+        cancel = threading.Event()
+
+        def on_first_token():
+            with condition:
+                if state['winner'] is None:
+                    state['winner'] = index
+                    for i, other in enumerate(cancels):
+                        if i != index:
+                            other.set()
+                else:
+                    cancel.set()
+                condition.notify_all()
+
+        payload = stream_payload(*targets[index], prompt, max_tokens)
+        cancels.append(cancel)
+        future = pool.submit(run_attempt, targets[index], keys[targets[index][0]], payload,
+                             cancel, on_first_token, timeout)
+        future.add_done_callback(lambda _: _notify(condition))
+        futures.append(future)
+
+    def settled():
+        # A winner exists, or every launched attempt has failed
+        return state['winner'] is not None or all(f.done() for f in futures)
+
+    started = time.perf_counter()
+    with condition:
+        launch(0)
+        for index in range(1, len(targets)):
+            deadline = started + delay * index
+            while not settled() and time.perf_counter() < deadline:
+                condition.wait(deadline - time.perf_counter())
+            if state['winner'] is not None:
+                break
+            launch(index)
+        condition.wait_for(settled)
+
+    result = {'hedged': len(futures) > 1, 'attempts': len(futures), 'winner': state['winner'],
+              'ttft': None, 'total': None, 'error': ''}
+    if state['winner'] is None:
+        result['error'] = next((f.result()['error'] or f"HTTP {f.result()['status']}" for f in futures), '')
+        return result, futures
+    record = futures[state['winner']].result()
+    result['ttft'] = record['first_token_at'] - started
+    result['total'] = record['finished_at'] - started
+    if record['error']:
+        result['error'] = record['error']
+    return result, futures
+
+def _notify(condition):
+    with condition:
+        condition.notify_all()
+
+def attempt_cost(pricing, record, prompt_estimate):
+    """(prompt_tokens, completion_tokens, usd) one attempt is billed for"""
+    if record['status'] != 200:
+        return 0, 0, 0.0
+    prompt_tokens = record['prompt_tokens'] or prompt_estimate
+    completion_tokens = record['completion_tokens'] or 0
+    cost = pythia_ledger.estimate_cost(pricing, record['provider'], record['model'],
+                                       prompt_tokens, completion_tokens)
+    return prompt_tokens, completion_tokens, cost or 0.0
+
+def summarize(results, pricing, prompt_estimate):
+    ok = [r for r in results if not r['error']]
+    ttfts = [r['ttft'] for r in ok]
+    totals = [r['total'] for r in ok]
+    tokens = cost = requests_sent = 0
+    for r in results:
+        for record in r['records']:
+            requests_sent += 1
+            p, c, usd = attempt_cost(pricing, record, prompt_estimate)
+            tokens += p + c
+            cost += usd
+    return {
+        'calls': len(results),
+        'errors': len(results) - len(ok),
+        'requests': requests_sent,
+        'hedged': sum(1 for r in results if r['hedged']),
+        'backup_wins': sum(1 for r in results if r['winner']),
+        'cancelled': sum(1 for r in results for rec in r['records'] if rec['cancelled']),
+        'tokens': tokens,
+        'cost': cost,
+        **{f"ttft_p{p}": percentile(ttfts, p) for p in (50, 95, 99)},
+        **{f"total_p{p}": percentile(totals, p) for p in (50, 95, 99)},
+    }
+
+def format_ms(value):
+    return f"{value * 1000:.0f}" if value is not None else '-'
+
+def print_report(baseline, hedged, targets):
+    print("\n" + "="*80)
+    print("HEDGING REPORT (milliseconds)")
+    print("="*80)
+    print(f"Primary: {targets[0][0]}={targets[0][1]}  |  Backups: "
+          f"{', '.join(f'{p}={m}' for p, m in targets[1:])}")
+    print(f"\n{'':<10} {'Calls':>6} {'Err':>4} {'Reqs':>6} {'TTFT p50':>9} {'p95':>7} {'p99':>7} "
+          f"{'Total p50':>10} {'p99':>7} {'Cost $':>10}")
+    print("-"*80)
+    for name, s in (('baseline', baseline), ('hedged', hedged)):
+        print(f"{name:<10} {s['calls']:>6} {s['errors']:>4} {s['requests']:>6} "
+              f"{format_ms(s['ttft_p50']):>9} {format_ms(s['ttft_p95']):>7} {format_ms(s['ttft_p99']):>7} "
+              f"{format_ms(s['total_p50']):>10} {format_ms(s['total_p99']):>7} {s['cost']:>10.4f}")
+    print("-"*80)
+    if hedged['calls']:
+        print(f"Hedge fired on {hedged['hedged']} of {hedged['calls']} calls "
+              f"({hedged['hedged'] / hedged['calls']:.0%}); a backup won {hedged['backup_wins']}; "
+              f"{hedged['cancelled']} attempt(s) cancelled")
+    for metric in ('ttft_p99', 'total_p99'):
+        if baseline[metric] and hedged[metric]:
+            gain = (baseline[metric] - hedged[metric]) / baseline[metric]
+            print(f"{metric.replace('_', ' ')}: {format_ms(baseline[metric])} -> {format_ms(hedged[metric])} ms "
+                  f"({abs(gain):.0%} {'faster' if gain >= 0 else 'slower'})")
+    if baseline['calls'] and hedged['calls']:
+        extra_requests = hedged['requests'] / hedged['calls'] - baseline['requests'] / baseline['calls']
+        extra_tokens = hedged['tokens'] / baseline['tokens'] - 1 if baseline['tokens'] else 0
+        line = f"Extra cost: {extra_requests:+.2f} requests per call, {extra_tokens:+.1%} tokens"
+        if baseline['cost']:
+            line += f", {hedged['cost'] / baseline['cost'] - 1:+.1%} spend"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure hedged requests against a single provider")
+    parser.add_argument('--primary', required=True, metavar='PROVIDER[=MODEL]', help="Target tried first")
+    parser.add_argument('--backup', action='append', required=True, metavar='PROVIDER[=MODEL]',
+                        help="Target fired when no token arrived in time (repeatable, fired in order)")
+    parser.add_argument('-n', '--calls', type=int, default=50,
+                        help="Baseline and hedged calls each, interleaved (default: 50)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--delay', type=float, help="Fixed hedge delay in seconds")
+    group.add_argument('--delay-pct', type=float, default=DEFAULT_DELAY_PCT,
+                       help=f"Hedge after this percentile of recent primary TTFT (default: {DEFAULT_DELAY_PCT})")
+    parser.add_argument('--warmup', type=int, default=10,
+                        help="Unhedged primary calls that seed the delay percentile (default: 10)")
+    parser.add_argument('--prompt', default=DEFAULT_PROMPT, help="User message to send")
+    parser.add_argument('--max-tokens', type=int, help="Override max_tokens")
+    parser.add_argument('--timeout', type=float, default=60, help="Read timeout per attempt in seconds")
+    parser.add_argument('--pricing', help="Pricing table (default: tools/pricing.json)")
+    parser.add_argument('--base-url',
+                        help=f"Send to this host instead (e.g. a mock server); also read from {BASE_URL_ENV}")
+    parser.add_argument('--json', metavar='FILE', help="Write per-call results and the summary as JSON")
+    args = parser.parse_args()
+    set_base_url_override(args.base_url)
+
+    targets = [parse_target(args.primary)] + [parse_target(b) for b in args.backup]
+    print("Pythia Hedged Request Benchmark")
+    print("="*80)
+    config = read_config(announce=True)
+    for provider_id, _ in targets:
+        if not config.get(provider_id):
+            print(f"ERROR: No API key configured for {PROVIDERS[provider_id]['name']}")
+            sys.exit(1)
+    pricing = pythia_ledger.load_pricing(args.pricing)
+    prompt_estimate = len(args.prompt) // 3
+
+    baseline, hedged, futures = [], [], []
+    recent = []
+    with ThreadPoolExecutor(max_workers=4 * len(targets)) as pool:
+        def call(call_targets, delay):
+            result, call_futures = hedged_call(pool, call_targets, config, args.prompt, delay,
+                                               args.max_tokens, args.timeout)
+            futures.append((result, call_futures))
+            return result
+
+        for i in range(args.warmup):
+            result = call(targets[:1], 0)
+            if result['ttft'] is not None:
+                recent.append(result['ttft'])
+        for i in range(args.calls):
+            delay = args.delay if args.delay is not None else \
+                (percentile(recent[-DELAY_WINDOW:], args.delay_pct) or 1.0)
+            for name in ('baseline', 'hedged') if i % 2 == 0 else ('hedged', 'baseline'):
+                if name == 'baseline':
+                    result = call(targets[:1], delay)
+                    baseline.append(result)
+                    if result['ttft'] is not None:
+                        recent.append(result['ttft'])
+                else:
+                    result = call(targets, delay)
+                    result['delay'] = delay
+                    hedged.append(result)
+            print(f"  [{i + 1}/{args.calls}] delay {format_ms(delay)} ms  baseline {format_ms(baseline[-1]['ttft'])}"
+                  f"  hedged {format_ms(hedged[-1]['ttft'])}{' (backup)' if hedged[-1]['winner'] else ''}")
+    # Every attempt, including cancelled ones, has finished once the pool shuts down
+    for result, call_futures in futures:
+        result['records'] = [f.result() for f in call_futures]
+
+    baseline_summary = summarize(baseline, pricing, prompt_estimate)
+    hedged_summary = summarize(hedged, pricing, prompt_estimate)
+    print_report(baseline_summary, hedged_summary, targets)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'targets': targets, 'baseline': baseline_summary, 'hedged': hedged_summary,
+                       'calls': {'baseline': baseline, 'hedged': hedged}}, f, indent=2)
+        print(f"\nWrote JSON results to {args.json}")
+    pythia_http.close_sessions()
+
+if __name__ == '__main__':
+    main()
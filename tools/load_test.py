@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Rate-limit-aware sustained load generator for the AI providers
+Holds a target request rate (--rate) or concurrency (--concurrency) against one
+provider, steering with an adaptive token bucket driven by the
+x-ratelimit-* headers and Retry-After, and reports achieved throughput,
+429 rate and the latency curve over time
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import requests
+
+import pythia_http
+from pythia_providers import (KEY_PROVIDERS, PROVIDERS, BASE_URL_ENV, chat_url, build_headers,
+                              build_pythia_payload, set_base_url_override)
+from pythia_history import percentile
+from pythia_config import read_config
+
+DEFAULT_PROMPT = "Reply with the single word: ok"
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_SCALE = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+def parse_reset_duration(value):
+    """Seconds from an x-ratelimit-reset-* header ('20ms', '6m0s', '1.5s', '30')"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_SCALE[unit] for amount, unit in parts)
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds form only)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+class AdaptiveTokenBucket:
+    """Token bucket whose refill rate follows the provider's rate-limit feedback
+
+    Starts at the target rate, halves on 429 (and pauses for Retry-After),
+    clamps to remaining/reset from the x-ratelimit headers, and creeps back
+    toward the target after successes (AIMD).
+    """
+
+    def __init__(self, target_rate, burst=None, min_rate=0.1):
+        self.target_rate = target_rate
+        self.rate = target_rate
+        self.min_rate = min_rate
+        self.capacity = burst or max(1.0, target_rate)
+        self.tokens = self.capacity
+        self.paused_until = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        if self.rate == float('inf'):
+            self.tokens = self.capacity
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, stop_event):
+        """Block until a token is available; False if stop_event fires first"""
+        while not stop_event.is_set():
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            stop_event.wait(min(wait, 0.5))
+        return False
+
+    def observe(self, status, headers):
+        """Adjust the rate from one response's status and rate-limit headers"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if status == 429:
+                retry_after = parse_retry_after(headers.get('Retry-After'))
+                if retry_after is None:
+                    retry_after = parse_reset_duration(headers.get('x-ratelimit-reset-requests')) or 1.0
+                self.paused_until = max(self.paused_until, now + retry_after)
+                if self.rate != float('inf'):
+                    # Unbounded (--concurrency) buckets only pause
+                    self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = 0
+                return
+
+            remaining = headers.get('x-ratelimit-remaining-requests')
+            reset = parse_reset_duration(headers.get('x-ratelimit-reset-requests'))
+            if remaining is not None and reset:
+                try:
+                    sustainable = max(self.min_rate, int(remaining) / reset)
+                except ValueError:
+                    sustainable = None
+                if sustainable is not None and sustainable < self.rate:
+                    self.rate = sustainable
+                    return
+
+            if self.rate < self.target_rate:
+                step = self.target_rate * 0.05 if self.target_rate != float('inf') else self.rate * 0.1
+                self.rate = min(self.target_rate, self.rate + max(step, self.min_rate))
+
+def run_load(session, provider_id, api_key, payload, bucket, workers, duration, timeout):
+    """Drive load for `duration` seconds; returns the list of request records"""
+    records = []
+    records_lock = threading.Lock()
+    stop_event = threading.Event()
+    url = chat_url(provider_id)
+    headers = build_headers(provider_id, api_key)
+    started = time.perf_counter()
+
+    def worker():
+        while bucket.acquire(stop_event):
+            sent = time.perf_counter()
+            record = {'t': sent - started, 'status': None, 'latency': None, 'rate': bucket.rate}
+            try:
+                # No retries or provider cap: the load shape is the bucket's job
+                response = pythia_http.post_json(url, payload, headers, session=session,
+                                                 retries=0, read_timeout=timeout)
+                record['status'] = response.status_code
+                bucket.observe(response.status_code, response.headers)
+            except requests.exceptions.RequestException as e:
+                record['error'] = str(e)[:120]
+            record['latency'] = time.perf_counter() - sent
+            with records_lock:
+                records.append(record)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        stop_event.wait(duration)
+    except KeyboardInterrupt:
+        print("\nInterrupted - stopping load")
+    stop_event.set()
+    for thread in threads:
+        thread.join(timeout)
+    return records, time.perf_counter() - started
+
+def summarize_windows(records, window):
+    """Per-window throughput, 429 rate and latency percentiles"""
+    rows = []
+    if not records:
+        return rows
+    last = max(r['t'] for r in records)
+    start = 0.0
+    while start <= last:
+        group = [r for r in records if start <= r['t'] < start + window]
+        ok = [r for r in group if r['status'] == 200]
+        limited = [r for r in group if r['status'] == 429]
+        latencies = [r['latency'] for r in ok]
+        rows.append({
+            'start': start,
+            'requests': len(group),
+            'ok_rps': len(ok) / window,
+            'rate_limited': len(limited),
+            'errors': len(group) - len(ok) - len(limited),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'bucket_rate': group[-1]['rate'] if group else None
+        })
+        start += window
+    return rows
+
+def json_safe(items, key):
+    """Copies of items with an unbounded rate written as null (JSON has no Infinity)"""
+    return [dict(item, **{key: None}) if item.get(key) == float('inf') else item for item in items]
+
+def print_report(records, elapsed, rows):
+    ok = sum(1 for r in records if r['status'] == 200)
+    limited = sum(1 for r in records if r['status'] == 429)
+    total = len(records)
+    latencies = [r['latency'] for r in records if r['status'] == 200]
+
+    print("\n" + "="*78)
+    print("LATENCY AND THROUGHPUT OVER TIME")
+    print("="*78)
+    print(f"{'t(s)':>6} {'sent':>6} {'ok/s':>8} {'429':>6} {'err':>5} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'bucket/s':>9}")
+    print("-"*78)
+    for row in rows:
+        p50 = f"{row['p50'] * 1000:.0f}" if row['p50'] is not None else '-'
+        p95 = f"{row['p95'] * 1000:.0f}" if row['p95'] is not None else '-'
+        rate = row['bucket_rate']
+        rate = '-' if rate is None else ('max' if rate == float('inf') else f"{rate:.1f}")
+        print(f"{row['start']:>6.0f} {row['requests']:>6} {row['ok_rps']:>8.2f} {row['rate_limited']:>6} "
+              f"{row['errors']:>5} {p50:>8} {p95:>8} {rate:>9}")
+
+    print("\n" + "="*78)
+    print("SUMMARY")
+    print("="*78)
+    print(f"Duration:            {elapsed:.1f}s")
+    print(f"Requests sent:       {total}")
+    print(f"Achieved throughput: {ok / elapsed:.2f} successful req/s ({ok * 60 / elapsed:.0f} RPM)")
+    if total:
+        print(f"429 rate:            {limited / total:.1%} ({limited} responses)")
+        print(f"Other errors:        {total - ok - limited}")
+    if latencies:
+        print(f"Latency p50/p95/p99: {percentile(latencies, 50) * 1000:.0f} / "
+              f"{percentile(latencies, 95) * 1000:.0f} / {percentile(latencies, 99) * 1000:.0f} ms")
+
+    # The second half of the run is where the bucket has settled
+    settled = [r for r in records if r['t'] >= elapsed / 2]
+    if settled:
+        settled_ok = sum(1 for r in settled if r['status'] == 200)
+        print(f"Sustainable rate:    ~{settled_ok / (elapsed / 2):.2f} req/s "
+              f"(successful requests in the second half of the run)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sustained, rate-limit-aware load against one provider")
+    parser.add_argument('--provider', default='openai', choices=KEY_PROVIDERS)
+    parser.add_argument('--model', help="Model to request (default: provider default)")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--rate', type=float, help="Target requests per second")
+    mode.add_argument('--concurrency', type=int, help="Number of requests kept in flight")
+    parser.add_argument('--workers', type=int,
+                        help="Worker threads in --rate mode (default: enough for ~5s of latency)")
+    parser.add_argument('--duration', type=float, default=60, help="Seconds to run (default: 60)")
+    parser.add_argument('--window', type=float, default=5, help="Report bucket in seconds (default: 5)")
+    parser.add_argument('--prompt', default=DEFAULT_PROMPT, help="User message to send")
+    parser.add_argument('--max-tokens', type=int, default=5,
+                        help="max_tokens per request, kept small to limit cost (default: 5)")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument('--base-url',
+                        help=f"Load this host instead (e.g. a mock server); also read from {BASE_URL_ENV}")
+    parser.add_argument('--json', metavar='FILE', help="Write per-window results and records as JSON")
+    args = parser.parse_args()
+    set_base_url_override(args.base_url)
+
+    print("Pythia Provider Load Generator")
+    print("="*70)
+
+    config = read_config(announce=True)
+    api_key = config.get(args.provider)
+    if not api_key:
+        print(f"ERROR: No API key configured for {PROVIDERS[args.provider]['name']}")
+        sys.exit(1)
+
+    if args.rate:
+        bucket = AdaptiveTokenBucket(args.rate)
+        workers = args.workers or min(512, max(4, int(args.rate * 5)))
+        print(f"Target: {args.rate} req/s with up to {workers} workers")
+    else:
+        bucket = AdaptiveTokenBucket(float('inf'), burst=args.concurrency)
+        workers = args.concurrency
+        print(f"Target: {workers} concurrent requests")
+    print(f"Provider: {PROVIDERS[args.provider]['name']} ({chat_url(args.provider)})")
+    print(f"Duration: {args.duration:.0f}s\n")
+
+    session = pythia_http.new_session(pool_size=workers)
+
+    payload = build_pythia_payload(args.provider, args.prompt, model=args.model,
+                                   max_tokens=args.max_tokens)
+    records, elapsed = run_load(session, args.provider, api_key, payload, bucket,
+                                workers, args.duration, args.timeout)
+    rows = summarize_windows(records, args.window)
+    print_report(records, elapsed, rows)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'provider': args.provider, 'target_rate': args.rate,
+                       'concurrency': args.concurrency, 'elapsed': elapsed,
+                       'windows': json_safe(rows, 'bucket_rate'), 'records': json_safe(records, 'rate')},
+                      f, indent=2, default=str, allow_nan=False)
+        print(f"\nWrote results to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI, Anthropic, GitHub Models and Copilot chat APIs
+Serves /v1/chat/completions, /v1/messages and /chat/completions with the same
+response shapes Pythia.AI.Client.pas parses (plus the /v1/models and /models
+listings, with ETag/Last-Modified revalidation, and the
+/copilot_internal/v2/token exchange), so the tools can be tested and
+benchmarked offline. Anthropic cache_control breakpoints are honoured with
+an in-memory prompt cache (5 minute TTL, 1024-token minimum) that reports
+cache_creation/cache_read tokens; --prefill-rate makes uncached prompt tokens
+cost time. Point a tool at it with --base-url or PYTHIA_API_BASE_URL:
+
+    python mock_provider_server.py --port 8787 --latency lognormal:0.4,0.5
+    set PYTHIA_API_BASE_URL=http://127.0.0.1:8787
+
+Standard library only, so it runs on air-gapped build agents.
+"""
+
+import sys
+import json
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "Connection successful. This is the Pythia mock provider answering your request."
+MOCK_MODELS = ['gpt-4', 'gpt-3.5-turbo', 'claude-3-5-sonnet-20241022', 'claude-3-opus-20240229']
+# Anthropic's ephemeral cache lifetime and smallest cacheable prefix
+PROMPT_CACHE_TTL = 300
+MIN_CACHE_TOKENS = 1024
+# Prefix of the Copilot tokens the mock hands out; chat requests bearing an
+# unknown or expired one get a 401 like api.githubcopilot.com
+COPILOT_TOKEN_PREFIX = 'tid=mock;'
+
+class LatencyModel:
+    """Samples response delays from a named distribution
+
+    Spec format: fixed:SECONDS, uniform:LOW,HIGH, normal:MEAN,STDDEV or
+    lognormal:MEDIAN,SIGMA (all in seconds).
+    """
+
+    def __init__(self, spec, rng):
+        self.spec = spec
+        self.rng = rng
+        kind, _, params = spec.partition(':')
+        try:
+            values = [float(v) for v in params.split(',')] if params else []
+        except ValueError:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"Invalid latency spec '{spec}' "
+                             "(use fixed:S, uniform:LO,HI, normal:MEAN,SD or lognormal:MEDIAN,SIGMA)")
+        self.kind = kind
+        self.values = values
+
+    def sample(self):
+        if self.kind == 'fixed':
+            delay = self.values[0]
+        elif self.kind == 'uniform':
+            delay = self.rng.uniform(*self.values)
+        elif self.kind == 'normal':
+            delay = self.rng.gauss(*self.values)
+        else:
+            median, sigma = self.values
+            delay = self.rng.lognormvariate(0, sigma) * median
+        return max(0.0, delay)
+
+class MockState:
+    """Shared server state: RNG, rate-limit window and request counters"""
+
+    def __init__(self, args):
+        self.lock = threading.Lock()
+        self.rng = random.Random(args.seed)
+        self.latency = LatencyModel(args.latency, self.rng)
+        self.token_interval = args.token_interval
+        self.rate_limit_rate = args.rate_limit_rate
+        self.quota_error_rate = args.quota_error_rate
+        self.rpm_limit = args.rpm_limit
+        self.reply = args.reply
+        self.prefill_rate = args.prefill_rate
+        self.prompt_cache = {}
+        self.models = args.models.split(',') if args.models else list(MOCK_MODELS)
+        # Listing validators: the list never changes while the server runs
+        self.models_body = {"object": "list", "data": [
+            {"id": model, "object": "model", "created": 0, "owned_by": "pythia-mock"} for model in self.models]}
+        self.models_etag = '"' + hashlib.sha256(json.dumps(self.models_body).encode('utf-8')).hexdigest()[:16] + '"'
+        self.models_modified = formatdate(time.time(), usegmt=True)
+        self.exchange_latency = LatencyModel(args.exchange_latency, self.rng)
+        self.copilot_token_ttl = args.copilot_token_ttl
+        self.copilot_tokens = {}
+        self.window_start = time.time()
+        self.window_count = 0
+        self.stats = {'requests': 0, 'ok': 0, 'rate_limited': 0, 'quota_errors': 0,
+                      'auth_errors': 0, 'streamed': 0, 'cache_writes': 0, 'cache_reads': 0,
+                      'token_exchanges': 0, 'not_modified': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def admit(self):
+        """Take a slot in the current one-minute window
+
+        Returns (fault, remaining, reset_seconds) where fault is None,
+        'rate_limit' or 'quota'.
+        """
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= 60:
+                self.window_start = now
+                self.window_count = 0
+            reset = max(0.0, 60 - (now - self.window_start))
+            roll = self.rng.random()
+            if roll < self.quota_error_rate:
+                return 'quota', max(0, self.rpm_limit - self.window_count), reset
+            if roll < self.quota_error_rate + self.rate_limit_rate:
+                return 'rate_limit', max(0, self.rpm_limit - self.window_count), reset
+            if self.window_count >= self.rpm_limit:
+                return 'rate_limit', 0, reset
+            self.window_count += 1
+            return None, self.rpm_limit - self.window_count, reset
+
+    def issue_copilot_token(self):
+        """(token, expires_at) for a new short-lived Copilot token"""
+        with self.lock:
+            now = time.time()
+            for token in [t for t, expires in self.copilot_tokens.items() if expires <= now]:
+                del self.copilot_tokens[token]
+            expires_at = int(now + self.copilot_token_ttl)
+            token = f"{COPILOT_TOKEN_PREFIX}exp={expires_at};sku=mock:{uuid.uuid4().hex[:16]}"
+            self.copilot_tokens[token] = expires_at
+            self.stats['token_exchanges'] += 1
+            return token, expires_at
+
+    def copilot_token_valid(self, token):
+        with self.lock:
+            return self.copilot_tokens.get(token, 0) > time.time()
+
+    def use_prompt_cache(self, prefixes):
+        """(cache_creation_tokens, cache_read_tokens) for a request's block prefixes
+
+        Like the real API, a cached prefix ending at any block boundary up
+        to the last breakpoint is read (the longest wins); every breakpoint
+        prefix that is long enough is then (re)written, refreshing its TTL.
+        """
+        with self.lock:
+            now = time.time()
+            for digest in [d for d, expires in self.prompt_cache.items() if expires <= now]:
+                del self.prompt_cache[digest]
+            last = max((i for i, prefix in enumerate(prefixes) if prefix[2]), default=-1)
+            read = max((tokens for digest, tokens, _ in prefixes[:last + 1] if digest in self.prompt_cache),
+                       default=0)
+            cacheable = [(digest, tokens) for digest, tokens, breakpoint in prefixes
+                         if breakpoint and tokens >= MIN_CACHE_TOKENS]
+            for digest, _ in cacheable:
+                self.prompt_cache[digest] = now + PROMPT_CACHE_TTL
+            creation = max((tokens for _, tokens in cacheable), default=0) - read
+            if read:
+                self.stats['cache_reads'] += 1
+            if creation > 0:
+                self.stats['cache_writes'] += 1
+            return max(0, creation), read
+
+def estimate_tokens(text):
+    """Rough tokenizer for usage blocks: ~4 characters per token"""
+    return max(1, len(text) // 4)
+
+def content_blocks(content):
+    """Text blocks of a system/message content field (string or block list)"""
+    if isinstance(content, list):
+        return [block for block in content if isinstance(block, dict)]
+    return [{'type': 'text', 'text': content or ''}]
+
+def prompt_text(payload):
+    parts = [block.get('text', '') for block in content_blocks(payload.get('system', ''))]
+    for message in payload.get('messages', []):
+        parts.append(' '.join(block.get('text', '') for block in content_blocks(message.get('content', ''))))
+    return '\n'.join(parts)
+
+def prompt_prefixes(payload):
+    """[(prefix digest, prefix tokens, has cache_control)] at the end of every block
+
+    The prefix runs system blocks first, then message blocks in order, the
+    same order Anthropic caches in.
+    """
+    digest = hashlib.sha256(str(payload.get('model')).encode('utf-8'))
+    tokens = 0
+    prefixes = []
+    sections = [('system', payload.get('system', ''))] + \
+        [(m.get('role', ''), m.get('content', '')) for m in payload.get('messages', [])]
+    for role, content in sections:
+        for block in content_blocks(content):
+            text = block.get('text', '')
+            digest.update(f"{role}\0{text}\0".encode('utf-8'))
+            tokens += estimate_tokens(text)
+            prefixes.append((digest.copy().hexdigest(), tokens, bool(block.get('cache_control'))))
+    return prefixes
+
+def reply_tokens(reply, max_tokens):
+    """Split the canned reply into word tokens, honoring max_tokens"""
+    words = reply.split(' ')
+    tokens = [w if i == 0 else ' ' + w for i, w in enumerate(words)]
+    return tokens[:max_tokens] if max_tokens else tokens
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PythiaMock/1.0'
+    # Headers and body go out in separate writes; Nagle would add ~40ms on keep-alive
+    disable_nagle_algorithm = True
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def do_GET(self):
+        route = self.path.split('?', 1)[0]
+        if route == '/mock/stats':
+            with self.state.lock:
+                self.send_json(200, dict(self.state.stats))
+        elif route in ('/v1/models', '/models'):
+            if not (self.headers.get('Authorization') or self.headers.get('x-api-key')):
+                self.send_json(401, {"error": {"message": "Missing API key", "type": "authentication_error"}})
+                return
+            validators = {'ETag': self.state.models_etag, 'Last-Modified': self.state.models_modified}
+            if (self.headers.get('If-None-Match') == self.state.models_etag or
+                    (not self.headers.get('If-None-Match') and
+                     self.headers.get('If-Modified-Since') == self.state.models_modified)):
+                self.state.count('not_modified')
+                self.send_response(304)
+                for key, value in validators.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                return
+            self.send_json(200, self.state.models_body, validators)
+        elif route == '/copilot_internal/v2/token':
+            self.copilot_token()
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown route {self.path}", "type": "not_found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length) if length else b''
+        route = self.path.split('?', 1)[0]
+
+        if route in ('/v1/chat/completions', '/chat/completions'):
+            api_format = 'openai'
+        elif route == '/v1/messages':
+            api_format = 'anthropic'
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown route {self.path}", "type": "not_found"}})
+            return
+
+        self.state.count('requests')
+        try:
+            payload = json.loads(raw or b'{}')
+        except ValueError:
+            self.send_error_body(api_format, 400, 'invalid_request_error', 'Request body is not valid JSON')
+            return
+
+        if not (self.headers.get('Authorization') or self.headers.get('x-api-key')):
+            self.state.count('auth_errors')
+            self.send_error_body(api_format, 401, 'authentication_error', 'Missing API key')
+            return
+        bearer = self.headers.get('Authorization', '').split(' ', 1)[-1]
+        if bearer.startswith(COPILOT_TOKEN_PREFIX) and not self.state.copilot_token_valid(bearer):
+            self.state.count('auth_errors')
+            self.send_error_body(api_format, 401, 'authentication_error', 'Copilot token expired or unknown')
+            return
+
+        fault, remaining, reset = self.state.admit()
+        limit_headers = {
+            'x-ratelimit-limit-requests': str(self.state.rpm_limit),
+            'x-ratelimit-remaining-requests': str(remaining),
+            'x-ratelimit-reset-requests': f"{reset:.3f}s"
+        }
+        if fault == 'quota':
+            self.state.count('quota_errors')
+            self.send_error_body(api_format, 429, 'insufficient_quota',
+                                 'You exceeded your current quota, please check your plan and billing details.',
+                                 limit_headers)
+            return
+        if fault == 'rate_limit':
+            self.state.count('rate_limited')
+            limit_headers['Retry-After'] = str(max(1, int(reset)) if remaining == 0 else 1)
+            self.send_error_body(api_format, 429,
+                                 'rate_limit_exceeded' if api_format == 'openai' else 'rate_limit_error',
+                                 'Rate limit reached for requests', limit_headers)
+            return
+
+        model = payload.get('model', 'mock-model')
+        tokens = reply_tokens(self.state.reply, payload.get('max_tokens'))
+        prompt_tokens = estimate_tokens(prompt_text(payload))
+        creation = read = 0
+        if api_format == 'anthropic':
+            prefixes = prompt_prefixes(payload)
+            if any(breakpoint for _, _, breakpoint in prefixes):
+                creation, read = self.state.use_prompt_cache(prefixes)
+        # (input, output, cache creation, cache read); Anthropic's input_tokens excludes cached parts
+        usage = (max(0, prompt_tokens - creation - read), len(tokens), creation, read)
+
+        delay = self.state.latency.sample()
+        if self.state.prefill_rate:
+            # Cached prefix tokens skip prompt processing
+            delay += (prompt_tokens - read) / self.state.prefill_rate
+        time.sleep(delay)
+
+        if payload.get('stream'):
+            self.state.count('streamed')
+            self.stream_response(api_format, model, tokens, usage, payload, limit_headers)
+        elif api_format == 'anthropic':
+            self.send_json(200, {
+                "id": f"msg_{uuid.uuid4().hex[:24]}",
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": ''.join(tokens)}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": usage[0], "output_tokens": usage[1],
+                          "cache_creation_input_tokens": usage[2], "cache_read_input_tokens": usage[3]}
+            }, limit_headers)
+        else:
+            self.send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": ''.join(tokens)},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": usage[0], "completion_tokens": usage[1],
+                          "total_tokens": usage[0] + usage[1]}
+            }, limit_headers)
+        self.state.count('ok')
+
+    def copilot_token(self):
+        """GitHub's OAuth -> Copilot token exchange ('Authorization: token <oauth>')"""
+        if not self.headers.get('Authorization', '').startswith('token '):
+            self.send_json(401, {"message": "Requires authentication",
+                                 "documentation_url": "https://docs.github.com/rest"})
+            return
+        time.sleep(self.state.exchange_latency.sample())
+        token, expires_at = self.state.issue_copilot_token()
+        ttl = self.state.copilot_token_ttl
+        self.send_json(200, {"token": token, "expires_at": expires_at,
+                             "refresh_in": max(1, int(ttl * 5 / 6)), "chat_enabled": True})
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_body(self, api_format, status, error_type, message, headers=None):
+        if api_format == 'anthropic':
+            body = {"type": "error", "error": {"type": error_type, "message": message}}
+        else:
+            body = {"error": {"message": message, "type": error_type, "param": None, "code": error_type}}
+        self.send_json(status, body, headers)
+
+    def write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def stream_response(self, api_format, model, tokens, usage, payload, headers):
+        """Send the reply as server-sent events, one word per event"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+
+        if api_format == 'anthropic':
+            events = self.anthropic_events(model, tokens, usage)
+        else:
+            include_usage = (payload.get('stream_options') or {}).get('include_usage', False)
+            events = self.openai_events(model, tokens, usage, include_usage)
+
+        for i, event in enumerate(events):
+            if i and self.state.token_interval:
+                time.sleep(self.state.token_interval)
+            self.write_chunk(event)
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def openai_events(self, model, tokens, usage, include_usage):
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        def chunk(delta, finish_reason=None, extra=None):
+            body = {"id": chunk_id, "object": "chat.completion.chunk", "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            body.update(extra or {})
+            return f"data: {json.dumps(body)}\n\n"
+
+        yield chunk({"role": "assistant", "content": ""})
+        for token in tokens:
+            yield chunk({"content": token})
+        yield chunk({}, "stop")
+        if include_usage:
+            yield chunk({}, extra={"choices": [], "usage": {
+                "prompt_tokens": usage[0], "completion_tokens": usage[1],
+                "total_tokens": usage[0] + usage[1]}})
+        yield "data: [DONE]\n\n"
+
+    def anthropic_events(self, model, tokens, usage):
+        def event(name, body):
+            return f"event: {name}\ndata: {json.dumps(body)}\n\n"
+
+        yield event('message_start', {"type": "message_start", "message": {
+            "id": f"msg_{uuid.uuid4().hex[:24]}", "type": "message", "role": "assistant",
+            "model": model, "content": [], "stop_reason": None,
+            "usage": {"input_tokens": usage[0], "output_tokens": 1,
+                      "cache_creation_input_tokens": usage[2], "cache_read_input_tokens": usage[3]}}})
+        yield event('content_block_start', {"type": "content_block_start", "index": 0,
+                                            "content_block": {"type": "text", "text": ""}})
+        for token in tokens:
+            yield event('content_block_delta', {"type": "content_block_delta", "index": 0,
+                                                "delta": {"type": "text_delta", "text": token}})
+        yield event('content_block_stop', {"type": "content_block_stop", "index": 0})
+        yield event('message_delta', {"type": "message_delta",
+                                      "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                      "usage": {"output_tokens": usage[1]}})
+        yield event('message_stop', {"type": "message_stop"})
+
+def create_server(args):
+    """Build (but do not start) a mock server from parsed arguments"""
+    server = ThreadingHTTPServer((args.host, args.port), MockProviderHandler)
+    server.daemon_threads = True
+    server.state = MockState(args)
+    MockProviderHandler.verbose = args.verbose
+    return server
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Anthropic/GitHub Models/Copilot server for offline testing")
+    parser.add_argument('--host', default='127.0.0.1', help="Bind address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8787, help="Port (default: 8787)")
+    parser.add_argument('--latency', default='fixed:0',
+                        help="Delay before the first byte: fixed:S, uniform:LO,HI, "
+                             "normal:MEAN,SD or lognormal:MEDIAN,SIGMA (default: fixed:0)")
+    parser.add_argument('--token-interval', type=float, default=0.0,
+                        help="Seconds between streamed tokens (default: 0)")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with 429 rate_limit_exceeded")
+    parser.add_argument('--quota-error-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with 429 insufficient_quota")
+    parser.add_argument('--rpm-limit', type=int, default=10000,
+                        help="Requests per minute before the mock starts returning 429 (default: 10000)")
+    parser.add_argument('--prefill-rate', type=float, default=0.0,
+                        help="Simulated prompt processing in input tokens/s; cache reads are free "
+                             "(default: 0 = off)")
+    parser.add_argument('--copilot-token-ttl', type=float, default=1800,
+                        help="Lifetime of issued Copilot tokens in seconds (default: 1800)")
+    parser.add_argument('--exchange-latency', default='fixed:0',
+                        help="Delay of the Copilot token exchange, same format as --latency (default: fixed:0)")
+    parser.add_argument('--models', help="Comma-separated model ids for the listings (default: a fixed set)")
+    parser.add_argument('--reply', default=DEFAULT_REPLY, help="Canned assistant reply text")
+    parser.add_argument('--seed', type=int, help="Random seed for reproducible latency and faults")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    try:
+        server = create_server(args)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(2)
+    except OSError as e:
+        # Usually the port is taken, e.g. by another mock server
+        print(f"ERROR: Cannot listen on {args.host}:{args.port}: {e.strerror or e}")
+        sys.exit(1)
+
+    print("Pythia Mock Provider Server")
+    print("="*70)
+    print(f"Listening on http://{args.host}:{args.port}")
+    print("  OpenAI:        POST /v1/chat/completions")
+    print("  Anthropic:     POST /v1/messages")
+    print("  GitHub Models: POST /chat/completions")
+    print("  Model lists:   GET  /v1/models, /models")
+    print("  Copilot token: GET  /copilot_internal/v2/token")
+    print("  Stats:         GET  /mock/stats")
+    print(f"Latency: {args.latency}  |  429 rate: {args.rate_limit_rate}  |  "
+          f"quota errors: {args.quota_error_rate}  |  RPM limit: {args.rpm_limit}  |  "
+          f"prefill: {f'{args.prefill_rate:g} tok/s' if args.prefill_rate else 'off'}")
+    print(f"\nSet PYTHIA_API_BASE_URL=http://{args.host}:{args.port} to point the tools here")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Model catalog: which models each provider offers right now
+    model_catalog.py              revalidate every configured provider, then list
+    model_catalog.py --cached     list the cached catalog without any request
+    model_catalog.py --force      refetch even if the lists are unchanged
+
+Providers are queried in parallel with If-None-Match/If-Modified-Since, so
+an unchanged list costs one 304. The merged catalog (model-catalog.json in
+the cache directory) is what Pythia's model combo box and the other tools
+read at start-up.
+"""
+
+import sys
+import json
+import time
+import argparse
+
+from pythia_catalog import get_catalog_path, load_catalog, provider_keys, refresh_catalog
+from pythia_providers import PROVIDERS, BASE_URL_ENV, set_base_url_override
+from pythia_config import read_config
+
+def format_price(value):
+    return '-' if value is None else f"{value:.5f}".rstrip('0').rstrip('.') if value else 'free'
+
+def print_catalog(catalog, providers, show_all):
+    print(f"\n{'Provider':<15} {'Model':<40} {'Context':>9} {'$ in/1K':>9} {'$ out/1K':>9}")
+    print("-"*86)
+    for provider_id, entry in catalog['providers'].items():
+        if providers and provider_id not in providers:
+            continue
+        for model in entry.get('models', []):
+            if not (model['chat'] or show_all):
+                continue
+            window = f"{model['context_window']:,}" if model['context_window'] else '-'
+            print(f"{PROVIDERS.get(provider_id, {}).get('name', provider_id):<15} {model['id'][:40]:<40} "
+                  f"{window:>9} {format_price(model['input_price']):>9} {format_price(model['output_price']):>9}")
+    print("-"*86)
+
+def print_status(catalog, providers):
+    for provider_id, entry in catalog['providers'].items():
+        if providers and provider_id not in providers:
+            continue
+        status = entry.get('status')
+        if entry.get('error'):
+            icon, text = '❌', entry['error'][:70]
+        elif status == 304:
+            icon, text = '✅', "not modified (cached list still current)"
+        else:
+            icon, text = '✅', f"fetched {len(entry.get('models', []))} models, {entry.get('bytes', 0):,} bytes"
+        checked = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['checked_at'])) if entry.get('checked_at') else '-'
+        elapsed = f"{entry['elapsed'] * 1000:.0f} ms" if entry.get('elapsed') is not None else '-'
+        print(f"{icon} {PROVIDERS.get(provider_id, {}).get('name', provider_id):<15} {status or 'ERR':>4}  "
+              f"{elapsed:>7}  checked {checked}  {text}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Discover and cache the models each provider offers")
+    parser.add_argument('--providers', help=f"Comma-separated subset of: {', '.join(PROVIDERS)}")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--cached', action='store_true', help="Only print the cached catalog (no network)")
+    mode.add_argument('--force', action='store_true', help="Ignore ETag/Last-Modified and refetch every list")
+    parser.add_argument('--all', action='store_true', help="Include non-chat models (embeddings, audio, ...)")
+    parser.add_argument('--json', action='store_true', help="Print the catalog as JSON")
+    parser.add_argument('--base-url',
+                        help=f"Query this host instead (e.g. a mock server); also read from {BASE_URL_ENV}")
+    args = parser.parse_args()
+    set_base_url_override(args.base_url)
+
+    providers = [p.strip() for p in args.providers.split(',')] if args.providers else None
+    for provider_id in providers or []:
+        if provider_id not in PROVIDERS:
+            print(f"ERROR: Unknown provider '{provider_id}' (expected one of {', '.join(PROVIDERS)})")
+            sys.exit(2)
+
+    if args.cached:
+        catalog = load_catalog()
+    else:
+        keys = provider_keys(read_config(required=False))
+        if not keys:
+            print("ERROR: No provider credentials configured")
+            sys.exit(1)
+        started = time.perf_counter()
+        catalog = refresh_catalog(keys, providers, force=args.force)
+        elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(catalog, indent=2))
+        return
+
+    print("Pythia Model Catalog")
+    print("="*86)
+    print(f"Catalog: {get_catalog_path()}")
+    if not catalog['providers']:
+        print("The catalog is empty; run without --cached to fetch it")
+        return
+    print_status(catalog, providers)
+    if not args.cached:
+        print(f"Refresh took {elapsed * 1000:.0f} ms (providers in parallel)")
+    print_catalog(catalog, providers, args.all)
+    if not args.cached and any(catalog['providers'][p].get('error') for p in catalog['providers']
+                               if not providers or p in providers):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Anthropic prompt caching: cached vs uncached multi-turn benchmark
+Builds the workspace context for a unit the way GatherContext and
+FormatContextForAI do and runs the same multi-turn conversation twice: with
+cache_control breakpoints on the system prompt, the context block and the
+latest turn, and without any. Conversations alternate between the two modes.
+Reports cache creation/read tokens, latency and cost per turn. Against the
+mock server, run it with --prefill-rate so uncached prompt tokens cost time:
+
+    python mock_provider_server.py --prefill-rate 20000
+    python prompt_cache_benchmark.py --base-url http://127.0.0.1:8787
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import requests
+
+import pythia_http
+import pythia_ledger
+from pythia_providers import (BASE_URL_ENV, chat_url, build_headers, build_anthropic_cached_request,
+                              extract_reply, extract_usage, extract_cache_usage, set_base_url_override)
+from pythia_context import (CT_CURRENT_FILE, DEFAULT_MAX_TOKENS, context_item, format_context,
+                            prioritize_and_truncate)
+from pythia_history import percentile
+from pythia_config import read_config
+
+DEFAULT_UNIT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Source', 'Pythia.ChatForm.pas')
+DEFAULT_MODEL = 'Claude 3.5 Sonnet'
+QUESTIONS = [
+    "Summarize what this unit does.",
+    "Which methods talk to the AI client, and how are errors reported to the user?",
+    "Is there anything in SendMessageToAI that could block the IDE's main thread?",
+    "Suggest a refactoring that separates the UI from the request handling.",
+    "Write the interface section for the class you proposed.",
+    "What unit tests would you add for it?",
+    "Are there any resource leaks in the code we discussed?",
+    "Summarize our conversation in three bullet points.",
+]
+MODES = ('uncached', 'cached')
+
+def build_context(path, max_tokens):
+    """Workspace context for one unit, truncated like PrioritizeAndTruncate"""
+    with open(path, 'rb') as f:
+        content = f.read().decode('utf-8-sig', errors='replace')
+    items, _ = prioritize_and_truncate([context_item(CT_CURRENT_FILE, path, content)], max_tokens)
+    return format_context(items)
+
+def strip_cache_control(payload):
+    """The same request with every cache_control breakpoint removed"""
+    payload = copy.deepcopy(payload)
+    for block in payload['system']:
+        block.pop('cache_control', None)
+    for message in payload['messages']:
+        if isinstance(message['content'], list):
+            for block in message['content']:
+                block.pop('cache_control', None)
+    return payload
+
+def run_turn(api_key, payload, pricing, timeout):
+    sample = {'status': None, 'latency': None, 'input_tokens': 0, 'cache_creation': 0,
+              'cache_read': 0, 'output_tokens': 0, 'cost': None, 'reply': '', 'error': ''}
+    started = time.perf_counter()
+    try:
+        response = pythia_http.post_json(chat_url('anthropic'), payload, build_headers('anthropic', api_key),
+                                         provider='anthropic', retries=0, read_timeout=timeout)
+        sample['latency'] = time.perf_counter() - started
+        sample['status'] = response.status_code
+        if response.status_code != 200:
+            sample['error'] = response.text[:200]
+            return sample
+        data = response.json()
+        sample['reply'] = extract_reply('anthropic', data)
+        sample['input_tokens'], sample['output_tokens'] = extract_usage('anthropic', data)
+        sample['cache_creation'], sample['cache_read'] = extract_cache_usage(data)
+        sample['cost'] = pythia_ledger.estimate_cost(pricing, 'anthropic', payload['model'],
+                                                     sample['input_tokens'], sample['output_tokens'],
+                                                     sample['cache_creation'], sample['cache_read'])
+    except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+        sample['error'] = str(e)
+    return sample
+
+def run_conversation(api_key, mode, number, context, model, turns, pricing, timeout):
+    """One conversation of up to turns questions; returns per-turn samples"""
+    history = []
+    samples = []
+    for turn in range(turns):
+        # Tag questions per conversation so histories never match across conversations
+        question = f"{QUESTIONS[turn % len(QUESTIONS)]} (conversation {number})"
+        history.append({"role": "user", "content": question})
+        payload = build_anthropic_cached_request(history, model, context)
+        if mode == 'uncached':
+            payload = strip_cache_control(payload)
+        sample = run_turn(api_key, payload, pricing, timeout)
+        sample.update(mode=mode, conversation=number, turn=turn + 1)
+        samples.append(sample)
+        if sample['error']:
+            print(f"  [{mode} #{number} turn {turn + 1}] ERROR {sample['error'][:80]}")
+            break
+        history.append({"role": "assistant", "content": sample['reply']})
+        print(f"  [{mode} #{number} turn {turn + 1}] {sample['latency'] * 1000:.0f} ms  "
+              f"in {sample['input_tokens']}  write {sample['cache_creation']}  read {sample['cache_read']}")
+    return samples
+
+def summarize(samples, turns):
+    """Per mode: per-turn averages and totals over successful samples"""
+    summary = {}
+    for mode in MODES:
+        ok = [s for s in samples if s['mode'] == mode and not s['error']]
+        rows = []
+        for turn in range(1, turns + 1):
+            group = [s for s in ok if s['turn'] == turn]
+            if not group:
+                continue
+            rows.append({
+                'turn': turn,
+                'latency': sum(s['latency'] for s in group) / len(group),
+                'input_tokens': sum(s['input_tokens'] for s in group) / len(group),
+                'cache_creation': sum(s['cache_creation'] for s in group) / len(group),
+                'cache_read': sum(s['cache_read'] for s in group) / len(group),
+                'cost': sum(s['cost'] or 0 for s in group) / len(group),
+            })
+        latencies = [s['latency'] for s in ok]
+        summary[mode] = {
+            'turns': rows,
+            'requests': len(ok),
+            'errors': sum(1 for s in samples if s['mode'] == mode and s['error']),
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'latency_mean': sum(latencies) / len(latencies) if latencies else None,
+            'prompt_tokens': sum(s['input_tokens'] + s['cache_creation'] + s['cache_read'] for s in ok),
+            'cache_read': sum(s['cache_read'] for s in ok),
+            'cost': sum(s['cost'] or 0 for s in ok),
+        }
+    return summary
+
+def print_report(summary, context_tokens):
+    print("\n" + "="*86)
+    print(f"PROMPT CACHING REPORT (context ~{context_tokens:,} tokens, averages per turn)")
+    print("="*86)
+    print(f"{'Turn':>4}  {'Uncached ms':>11} {'Cached ms':>10}  {'Input':>7} {'Write':>7} {'Read':>7}  "
+          f"{'Uncached $':>11} {'Cached $':>10}")
+    print("-"*86)
+    cached = {row['turn']: row for row in summary['cached']['turns']}
+    for row in summary['uncached']['turns']:
+        c = cached.get(row['turn'])
+        if not c:
+            continue
+        print(f"{row['turn']:>4}  {row['latency'] * 1000:>11.0f} {c['latency'] * 1000:>10.0f}  "
+              f"{c['input_tokens']:>7.0f} {c['cache_creation']:>7.0f} {c['cache_read']:>7.0f}  "
+              f"{row['cost']:>11.5f} {c['cost']:>10.5f}")
+    print("-"*86)
+    u, c = summary['uncached'], summary['cached']
+    if not (u['requests'] and c['requests']):
+        print("Not enough successful requests to compare")
+        return
+    hit_rate = c['cache_read'] / c['prompt_tokens'] if c['prompt_tokens'] else 0
+    print(f"Latency p50: {u['latency_p50'] * 1000:.0f} -> {c['latency_p50'] * 1000:.0f} ms  |  "
+          f"p95: {u['latency_p95'] * 1000:.0f} -> {c['latency_p95'] * 1000:.0f} ms  |  "
+          f"mean {1 - c['latency_mean'] / u['latency_mean']:.0%} lower")
+    line = f"Prompt tokens served from cache: {hit_rate:.0%}"
+    if u['cost']:
+        line += f"  |  Cost: ${u['cost']:.4f} -> ${c['cost']:.4f} ({1 - c['cost'] / u['cost']:.0%} saved)"
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Anthropic prompt caching on multi-turn Pythia chats")
+    parser.add_argument('--unit', default=DEFAULT_UNIT, help="Source file used as the current-file context")
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS,
+                        help=f"Context budget as in PrioritizeAndTruncate (default: {DEFAULT_MAX_TOKENS})")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help=f"Pythia model name (default: {DEFAULT_MODEL})")
+    parser.add_argument('--turns', type=int, default=5, help="Turns per conversation (default: 5)")
+    parser.add_argument('--conversations', type=int, default=3,
+                        help="Conversations per mode, alternating uncached/cached (default: 3)")
+    parser.add_argument('--timeout', type=float, default=120, help="Per-request timeout in seconds")
+    parser.add_argument('--pricing', help="Pricing table (default: tools/pricing.json)")
+    parser.add_argument('--base-url',
+                        help=f"Send to this host instead (e.g. a mock server); also read from {BASE_URL_ENV}")
+    parser.add_argument('--json', metavar='FILE', help="Write the summary and samples as JSON")
+    args = parser.parse_args()
+    set_base_url_override(args.base_url)
+
+    print("Pythia Prompt Caching Benchmark")
+    print("="*86)
+    config = read_config(announce=True)
+    if not config.get('anthropic'):
+        print("ERROR: No Anthropic API key configured")
+        sys.exit(1)
+    if not os.path.isfile(args.unit):
+        print(f"ERROR: Unit not found: {args.unit}")
+        sys.exit(1)
+
+    context = build_context(args.unit, args.max_tokens)
+    context_tokens = len(context) // 3
+    pricing = pythia_ledger.load_pricing(args.pricing)
+    print(f"Context: {os.path.basename(args.unit)}, {len(context):,} chars  |  "
+          f"{args.conversations} conversation(s) x {args.turns} turn(s) per mode")
+
+    samples = []
+    for number in range(1, args.conversations + 1):
+        for mode in MODES:
+            samples.extend(run_conversation(config['anthropic'], mode, number, context, args.model,
+                                            args.turns, pricing, args.timeout))
+
+    summary = summarize(samples, args.turns)
+    print_report(summary, context_tokens)
+
+    if args.json:
+        for sample in samples:
+            sample.pop('reply', None)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'unit': args.unit, 'model': args.model, 'summary': summary, 'samples': samples}, f, indent=2)
+        print(f"\nWrote JSON results to {args.json}")
+    if not any(not s['error'] for s in samples):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Small on-disk caches for the Pythia tools
+Lives next to pythia.ini in %APPDATA%/Pythia on Windows, or under
+$XDG_CACHE_HOME/pythia (default ~/.cache/pythia) elsewhere. API keys are
+never stored; entries are keyed by a hash of the key. The one credential
+kept here is the short-lived Copilot token (pythia_copilot.py).
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+def get_cache_dir():
+    """Per-user directory for Pythia tool caches (created on demand)"""
+    appdata = os.environ.get('APPDATA')
+    if appdata:
+        base = os.path.join(appdata, 'Pythia', 'cache')
+    else:
+        xdg = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        base = os.path.join(xdg, 'pythia')
+    os.makedirs(base, exist_ok=True)
+    return base
+
+def get_data_dir():
+    """Per-user directory for records worth keeping (usage ledger, benchmark history)
+
+    %APPDATA%/Pythia next to pythia.ini on Windows, else $XDG_DATA_HOME/pythia
+    (default ~/.local/share/pythia); unlike the cache it is never disposable.
+    """
+    appdata = os.environ.get('APPDATA')
+    if appdata:
+        base = os.path.join(appdata, 'Pythia')
+    else:
+        xdg = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+        base = os.path.join(xdg, 'pythia')
+    os.makedirs(base, exist_ok=True)
+    return base
+
+def get_data_file(name):
+    """Path of a SQLite file in the data directory
+
+    A copy left in the cache directory by an older version is moved over
+    (with its -wal/-shm files) the first time it is asked for.
+    """
+    path = os.path.join(get_data_dir(), name)
+    legacy = os.path.join(get_cache_dir(), name)
+    if not os.path.exists(path) and os.path.exists(legacy):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(legacy + suffix):
+                os.replace(legacy + suffix, path + suffix)
+    return path
+
+def fingerprint(*parts):
+    """Stable hex digest used as a cache key (e.g. of an API key)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:32]
+
+def write_json_atomic(path, data):
+    """Write JSON via a temp file + rename so readers never see a torn file"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class TTLCache:
+    """JSON file of key -> (stored_at, value) entries that expire after ttl seconds"""
+
+    def __init__(self, name, ttl):
+        self.path = os.path.join(get_cache_dir(), f"{name}.json")
+        self.ttl = ttl
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        """(value, age_seconds) for a fresh entry, or (None, None)"""
+        entry = self._load().get(key)
+        if not entry:
+            return None, None
+        age = time.time() - entry['stored_at']
+        if age > self.ttl:
+            return None, None
+        return entry['value'], age
+
+    def set(self, key, value):
+        entries = self._load()
+        now = time.time()
+        # Drop expired entries while we are rewriting the file anyway
+        entries = {k: v for k, v in entries.items() if now - v['stored_at'] <= self.ttl}
+        entries[key] = {'stored_at': now, 'value': value}
+        write_json_atomic(self.path, entries)
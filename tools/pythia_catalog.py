@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Model catalog for the Pythia tools and the plugin
+Lists the models each provider's models endpoint offers, all providers in
+parallel, and merges them into model-catalog.json in the cache directory
+with context window and price per entry. Each provider's ETag and
+Last-Modified are kept, so a refresh sends If-None-Match/If-Modified-Since
+and an unchanged list costs one 304.
+
+load_catalog() only reads the file, so tools (and Pythia.ModelCatalog in
+the plugin) get the last known catalog instantly; refresh_in_background()
+revalidates it without making anyone wait.
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import pythia_http
+import pythia_ledger
+from pythia_cache import get_cache_dir, write_json_atomic
+from pythia_providers import PROVIDERS, models_url, build_headers, is_base_url_overridden
+
+CATALOG_FILE = 'model-catalog.json'
+# Listings from a mock server (--base-url) go here, so the plugin never sees them
+MOCK_CATALOG_FILE = 'model-catalog.mock.json'
+CATALOG_VERSION = 1
+# Revalidate after this long; a fresh catalog is not requested at all
+CATALOG_TTL = 24 * 3600
+
+# Context windows (tokens) by model id prefix, for endpoints that do not
+# report one; the longest matching prefix wins
+CONTEXT_WINDOWS = {
+    'gpt-4.1': 1047576,
+    'gpt-4o': 128000,
+    'gpt-4-turbo': 128000,
+    'gpt-4-32k': 32768,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385,
+    'o1': 200000,
+    'o3': 200000,
+    'o4': 200000,
+    'claude-': 200000,
+    'llama-3': 128000,
+    'meta-llama-3': 128000,
+    'phi-4': 16384,
+    'mistral': 32768,
+}
+# OpenAI lists every model it serves; only these are chat models
+OPENAI_CHAT_PREFIXES = ('gpt-', 'o1', 'o3', 'o4', 'chatgpt-')
+OPENAI_NON_CHAT = ('audio', 'realtime', 'tts', 'transcribe', 'search', 'image', 'instruct', 'embedding')
+
+def get_catalog_path():
+    name = MOCK_CATALOG_FILE if is_base_url_overridden() else CATALOG_FILE
+    return os.path.join(get_cache_dir(), name)
+
+def load_catalog(path=None):
+    """The cached catalog (never touches the network); empty if there is none yet"""
+    try:
+        with open(path or get_catalog_path(), 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+        if catalog.get('version') == CATALOG_VERSION:
+            return catalog
+    except (OSError, ValueError):
+        pass
+    return {'version': CATALOG_VERSION, 'updated_at': None, 'providers': {}}
+
+def cached_models(provider_id=None, chat_only=True, path=None):
+    """Catalog entries from the cache, optionally for one provider"""
+    catalog = load_catalog(path)
+    models = []
+    for pid, entry in catalog['providers'].items():
+        if provider_id and pid != provider_id:
+            continue
+        models.extend(m for m in entry.get('models', []) if m['chat'] or not chat_only)
+    return models
+
+def context_window(model_id):
+    model_id = model_id.lower()
+    matches = [prefix for prefix in CONTEXT_WINDOWS if model_id.startswith(prefix)]
+    return CONTEXT_WINDOWS[max(matches, key=len)] if matches else None
+
+def is_chat_model(provider_id, item):
+    model_id = item.get('id', '')
+    if 'embedding' in model_id:
+        return False
+    if provider_id == 'openai':
+        return model_id.startswith(OPENAI_CHAT_PREFIXES) and not any(w in model_id for w in OPENAI_NON_CHAT)
+    if provider_id == 'copilot':
+        return (item.get('capabilities') or {}).get('type', 'chat') == 'chat'
+    if provider_id == 'github':
+        return item.get('task', 'chat-completion') == 'chat-completion'
+    return True
+
+def reported_context_window(item):
+    """Context window from the listing itself, where the provider includes one"""
+    limits = (item.get('capabilities') or {}).get('limits') or {}
+    for value in (limits.get('max_context_window_tokens'), item.get('context_window'),
+                  (item.get('model_limits') or {}).get('max_input_tokens'), item.get('max_input_tokens')):
+        if isinstance(value, int) and value > 0:
+            return value
+    return None
+
+def normalize(provider_id, item, pricing):
+    """One catalog entry from a raw listing item"""
+    model_id = item.get('id') or item.get('name')
+    price = pythia_ledger.find_price(pricing, provider_id, model_id)
+    return {
+        'provider': provider_id,
+        'id': model_id,
+        'name': item.get('display_name') or item.get('friendly_name') or item.get('name') or model_id,
+        'chat': is_chat_model(provider_id, item),
+        'context_window': reported_context_window(item) or context_window(model_id),
+        'input_price': price[0] if price else None,
+        'output_price': price[1] if price else None,
+    }
+
+def listing_items(data):
+    """Raw model items: OpenAI-style {'data': [...]} or a bare list (GitHub Models)"""
+    if isinstance(data, list):
+        return data
+    return data.get('data') or []
+
+def fetch_provider(provider_id, api_key, previous, pricing, force=False, timeout=15):
+    """Conditional GET of one provider's models; returns its new catalog entry
+
+    api_key may be a callable that returns the key (the Copilot token
+    exchange then runs on this worker too). On 304 or an error the previous
+    models are kept, so a failed refresh never empties the catalog.
+    """
+    entry = dict(previous or {})
+    entry.setdefault('models', [])
+    url = models_url(provider_id)
+    if provider_id == 'anthropic':
+        url += '?limit=1000'
+    started = time.perf_counter()
+    try:
+        headers = build_headers(provider_id, api_key() if callable(api_key) else api_key)
+        if not force and entry.get('models'):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        response = pythia_http.get(url, headers=headers, provider=provider_id, retries=1,
+                                   read_timeout=timeout)
+        entry['status'] = response.status_code
+        entry['error'] = ''
+        if response.status_code == 200:
+            entry['models'] = sorted((normalize(provider_id, item, pricing)
+                                      for item in listing_items(response.json())
+                                      if item.get('id') or item.get('name')),
+                                     key=lambda m: m['id'])
+            entry['etag'] = response.headers.get('ETag')
+            entry['last_modified'] = response.headers.get('Last-Modified')
+            entry['fetched_at'] = time.time()
+            entry['bytes'] = len(response.content)
+        elif response.status_code != 304:
+            entry['error'] = f"HTTP {response.status_code}: {response.text[:160]}"
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        entry['status'] = None
+        entry['error'] = str(e)
+    entry['checked_at'] = time.time()
+    entry['elapsed'] = time.perf_counter() - started
+    return entry
+
+def provider_keys(config):
+    """provider -> credential for every provider the catalog can list"""
+    keys = {pid: config[pid] for pid in ('openai', 'anthropic', 'github') if config.get(pid)}
+    from pythia_copilot import CopilotTokenManager, read_oauth_token
+    oauth_token = read_oauth_token()
+    if oauth_token:
+        manager = CopilotTokenManager(oauth_token)
+        keys['copilot'] = lambda: manager.token()[0]
+    return keys
+
+def refresh_catalog(keys, providers=None, force=False, max_age=0, path=None, pricing=None):
+    """Revalidate the catalog for the given providers in parallel and save it
+
+    keys maps provider -> credential (see provider_keys). Providers checked
+    less than max_age seconds ago are skipped. Returns the merged catalog.
+    """
+    path = path or get_catalog_path()
+    catalog = load_catalog(path)
+    pricing = pricing if pricing is not None else pythia_ledger.load_pricing()
+    now = time.time()
+    targets = [pid for pid in (providers or PROVIDERS) if pid in keys and
+               (force or now - catalog['providers'].get(pid, {}).get('checked_at', 0) >= max_age)]
+    if not targets:
+        return catalog
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        futures = {pid: pool.submit(fetch_provider, pid, keys[pid], catalog['providers'].get(pid),
+                                    pricing, force) for pid in targets}
+        results = {pid: future.result() for pid, future in futures.items()}
+    # Re-read so a concurrent refresh of other providers is not lost
+    catalog = load_catalog(path)
+    catalog['providers'].update(results)
+    catalog['updated_at'] = time.time()
+    write_json_atomic(path, catalog)
+    return catalog
+
+def refresh_in_background(config, providers=None, max_age=CATALOG_TTL):
+    """Revalidate a stale catalog on a daemon thread; returns the thread"""
+    def worker():
+        try:
+            refresh_catalog(provider_keys(config), providers, max_age=max_age)
+        except OSError:
+            pass
+    thread = threading.Thread(target=worker, name='model-catalog-refresh', daemon=True)
+    thread.start()
+    return thread
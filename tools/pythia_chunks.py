@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Chunk-level retrieval over a Delphi project's sources
+Implementation sections are split per routine, everything else (and overlong
+routines) into fixed line windows. Chunks go into an inverted index and are
+ranked with BM25 against a question, boosted near the cursor and in units the
+current file depends on, then packed greedily into a token budget. Stored as
+<Project>.pythia-chunks.json and refreshed from the source index hashes
+(pythia_index.py), so only changed files are re-chunked.
+"""
+
+import os
+import re
+import math
+import json
+
+from pythia_cache import write_json_atomic
+from pythia_context import LINE_BREAK, estimate_tokens, resolve_include
+from pythia_index import build_index
+from pythia_minify import minify
+
+CHUNKS_VERSION = 1
+CHUNKS_SUFFIX = '.pythia-chunks.json'
+
+WINDOW_LINES = 60
+WINDOW_OVERLAP = 10
+# Routines up to this long stay one chunk; longer ones are windowed
+MAX_ROUTINE_LINES = 120
+# Routine name terms count this many times in their chunk
+NAME_WEIGHT = 3
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Score multiplier of up to 1 + CURSOR_BOOST for chunks near the cursor,
+# decaying over CURSOR_DECAY lines; units used by the current file get RELATED_BOOST
+CURSOR_BOOST = 2.0
+CURSOR_DECAY = 150
+RELATED_BOOST = 1.5
+
+_IMPLEMENTATION = re.compile(r'^\s*implementation\b', re.IGNORECASE)
+# Delphi style puts implementation routine headers in column 0
+_ROUTINE = re.compile(r'^(?:class\s+)?(?:procedure|function|constructor|destructor|operator)\s+([\w.]+)',
+                      re.IGNORECASE)
+_IDENT = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_WORD_PART = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+STOP_WORDS = frozenset('''
+    and array as begin case class const constructor destructor div do downto else end except
+    exit file finally for function goto if implementation in inherited interface is label mod
+    nil not of or out overload override procedure program property raise record repeat result
+    self set shl shr string then to try type unit until uses var virtual while with xor
+    a an are be by can does from has have how it its me my on should that the this what when
+    where which who why will would you
+'''.split())
+
+def chunks_path_for(project_path):
+    """<dir>/<Project>.pythia-chunks.json for <dir>/<Project>.dproj"""
+    return os.path.splitext(project_path)[0] + CHUNKS_SUFFIX
+
+def tokenize(text):
+    """Lower-case search terms: whole identifiers plus their CamelCase parts"""
+    terms = []
+    for ident in _IDENT.findall(text):
+        lowered = ident.lower()
+        if lowered in STOP_WORDS:
+            continue
+        terms.append(lowered)
+        parts = [p.lower() for p in _WORD_PART.findall(ident)]
+        if len(parts) > 1:
+            terms.extend(p for p in parts if len(p) > 1 and p not in STOP_WORDS)
+    return terms
+
+def _windows(start, end, name=''):
+    """(first, last, name) line windows covering start..end (1-based, inclusive)"""
+    step = WINDOW_LINES - WINDOW_OVERLAP
+    first = start
+    while True:
+        last = min(end, first + WINDOW_LINES - 1)
+        yield first, last, name
+        if last >= end:
+            break
+        first += step
+
+def split_chunks(lines):
+    """(first_line, last_line, routine_name) spans for a file's lines"""
+    implementation = next((i for i, line in enumerate(lines) if _IMPLEMENTATION.match(line)), None)
+    starts = []
+    for i in range(implementation + 1 if implementation is not None else 0, len(lines)):
+        routine = _ROUTINE.match(lines[i])
+        if routine:
+            starts.append((i + 1, routine.group(1)))
+
+    spans = []
+    if not starts:
+        return list(_windows(1, len(lines))) if lines else []
+    if starts[0][0] > 1:
+        spans.extend(_windows(1, starts[0][0] - 1))
+    for n, (first, name) in enumerate(starts):
+        last = starts[n + 1][0] - 1 if n + 1 < len(starts) else len(lines)
+        if last - first + 1 <= MAX_ROUTINE_LINES:
+            spans.append((first, last, name))
+        else:
+            spans.extend(_windows(first, last, name))
+    return spans
+
+def chunk_source(text):
+    """[first, last, name, tokens, {term: tf}] for each chunk of a file"""
+    lines = text.splitlines()
+    chunks = []
+    for first, last, name in split_chunks(lines):
+        body = LINE_BREAK.join(lines[first - 1:last])
+        terms = {}
+        for term in tokenize(body):
+            terms[term] = terms.get(term, 0) + 1
+        for term in tokenize(name):
+            terms[term] = terms.get(term, 0) + NAME_WEIGHT
+        chunks.append([first, last, name, estimate_tokens(body), terms])
+    return chunks
+
+def read_source(path):
+    with open(path, 'rb') as f:
+        return f.read().decode('utf-8-sig', errors='replace')
+
+def load_chunks(chunks_path):
+    try:
+        with open(chunks_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get('version') == CHUNKS_VERSION else None
+
+def build_chunks(project_path, chunks_path=None, full=False):
+    """Bring the chunk file up to date; returns (data, source_index, stats)
+
+    The source index is refreshed first; files whose content hash is
+    unchanged keep their chunks without being read again.
+    """
+    chunks_path = chunks_path or chunks_path_for(project_path)
+    index, _ = build_index(project_path, full=full)
+    old = None if full else load_chunks(chunks_path)
+    old_files = old['files'] if old else {}
+    project_dir = os.path.dirname(os.path.abspath(project_path))
+
+    stats = {'reused': 0, 'chunked': 0, 'removed': 0, 'errors': 0}
+    files = {}
+    for key, entry in index['entries'].items():
+        previous = old_files.get(key)
+        if previous and previous['hash'] == entry['hash']:
+            files[key] = previous
+            stats['reused'] += 1
+            continue
+        try:
+            text = read_source(resolve_include(project_dir, key))
+        except OSError:
+            stats['errors'] += 1
+            continue
+        files[key] = {'hash': entry['hash'], 'chunks': chunk_source(text)}
+        stats['chunked'] += 1
+    stats['removed'] = len(set(old_files) - set(files))
+
+    data = {'version': CHUNKS_VERSION, 'project': os.path.basename(project_path), 'files': files}
+    if old is None or stats['chunked'] or stats['removed']:
+        write_json_atomic(chunks_path, data)
+    return data, index, stats
+
+class ChunkIndex:
+    """Inverted index (term -> [(chunk id, tf)]) over all chunks of a project"""
+
+    def __init__(self, data):
+        self.chunks = []
+        self.lengths = []
+        self.postings = {}
+        self.by_key = {}
+        for key, file_data in data['files'].items():
+            self.by_key[key] = range(len(self.chunks), len(self.chunks) + len(file_data['chunks']))
+            for first, last, name, tokens, terms in file_data['chunks']:
+                chunk_id = len(self.chunks)
+                self.chunks.append({'key': key, 'first': first, 'last': last,
+                                    'name': name, 'tokens': tokens})
+                self.lengths.append(sum(terms.values()))
+                for term, tf in terms.items():
+                    self.postings.setdefault(term, []).append((chunk_id, tf))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+
+    def bm25(self, query):
+        """{chunk id: BM25 score} for the query's terms"""
+        scores = {}
+        total = len(self.chunks)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[chunk_id] / self.average_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query, budget, top_k=10, current=None, cursor_line=None, related=()):
+        """Ranked chunks that fit in budget tokens
+
+        The chunk under the cursor is always taken first, cut down to the
+        lines around the cursor when it alone exceeds the budget. Other chunks of
+        the current file are boosted by their distance to the cursor, and
+        chunks of related units by RELATED_BOOST. Chunks overlapping one
+        already picked are skipped.
+        """
+        scores = self.bm25(query)
+        related = set(related)
+        ranked = []
+        pinned = None
+        candidates = set(scores)
+        if current and cursor_line:
+            candidates.update(self.by_key.get(current, ()))
+        for chunk_id in sorted(candidates):
+            chunk = self.chunks[chunk_id]
+            score = scores.get(chunk_id, 0.0)
+            if chunk['key'] == current and cursor_line:
+                if chunk['first'] <= cursor_line <= chunk['last'] and pinned is None:
+                    pinned = chunk_id
+                    continue
+                distance = max(chunk['first'] - cursor_line, cursor_line - chunk['last'], 0)
+                score *= 1 + CURSOR_BOOST * math.exp(-distance / CURSOR_DECAY)
+            elif chunk['key'] in related:
+                score *= RELATED_BOOST
+            if score > 0:
+                ranked.append((score, chunk_id))
+        ranked.sort(reverse=True)
+        if pinned is not None:
+            ranked.insert(0, (scores.get(pinned, 0.0), pinned))
+
+        picked, used = [], 0
+        for score, chunk_id in ranked:
+            if len(picked) >= top_k:
+                break
+            chunk = self.chunks[chunk_id]
+            if chunk_id == pinned and chunk['tokens'] > budget:
+                chunk = trim_chunk(chunk, cursor_line, budget)
+            elif used + chunk['tokens'] > budget:
+                continue
+            if any(p['key'] == chunk['key'] and p['first'] <= chunk['last'] and chunk['first'] <= p['last']
+                   for p in picked):
+                continue
+            picked.append(dict(chunk, score=score, pinned=chunk_id == pinned))
+            used += chunk['tokens']
+        return picked
+
+def trim_chunk(chunk, cursor_line, budget):
+    """The lines of chunk around cursor_line that fit in budget tokens
+
+    Tokens are spread evenly over the chunk's lines; at least the cursor
+    line is kept.
+    """
+    lines = chunk['last'] - chunk['first'] + 1
+    per_line = chunk['tokens'] / lines
+    keep = max(1, min(lines, int(budget / per_line)))
+    first = min(max(chunk['first'], cursor_line - keep // 2), chunk['last'] - keep + 1)
+    return dict(chunk, first=first, last=first + keep - 1, tokens=max(1, math.ceil(keep * per_line)),
+                trimmed=(chunk['first'], chunk['last']))
+
+def chunk_text(project_dir, chunk, cache=None):
+    """Source lines of a chunk (file contents are cached per key in cache)"""
+    if cache is None:
+        cache = {}
+    if chunk['key'] not in cache:
+        cache[chunk['key']] = read_source(resolve_include(project_dir, chunk['key'])).splitlines()
+    return LINE_BREAK.join(cache[chunk['key']][chunk['first'] - 1:chunk['last']])
+
+def format_chunks(project_dir, chunks, minified=False):
+    """Chunks as context sections, in the FormatContextForAI layout
+
+    minified runs each chunk through pythia_minify; the headers keep the
+    original line range.
+    """
+    nl = LINE_BREAK
+    cache = {}
+    parts = ['## Workspace Context' + nl, nl]
+    for chunk in chunks:
+        name = os.path.basename(chunk['key'].replace('\\', '/'))
+        routine = f" {chunk['name']}" if chunk['name'] else ''
+        text = chunk_text(project_dir, chunk, cache)
+        if minified:
+            text = minify(text, os.path.splitext(name)[1])[0]
+        parts += [f"### {name}{routine} (Lines {chunk['first']}-{chunk['last']}):", nl,
+                  '```pascal' + nl, text, nl, '```' + nl, nl]
+    return ''.join(parts)
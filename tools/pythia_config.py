@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Shared pythia.ini loader for the Pythia tools
+Resolves the same file TPythiaConfig.GetConfigPath uses on Windows
+(%APPDATA%\\Pythia\\pythia.ini), an XDG location elsewhere, or PYTHIA_CONFIG
+if set, and parses it only once per process
+"""
+
+import os
+import sys
+import configparser
+import functools
+
+CONFIG_ENV = 'PYTHIA_CONFIG'
+
+def get_config_path():
+    """Path of pythia.ini for this platform"""
+    override = os.environ.get(CONFIG_ENV)
+    if override:
+        return override
+    appdata = os.environ.get('APPDATA')
+    if appdata:
+        return os.path.join(appdata, 'Pythia', 'pythia.ini')
+    xdg = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(xdg, 'pythia', 'pythia.ini')
+
+@functools.lru_cache(maxsize=None)
+def load_ini(config_file):
+    """Parsed pythia.ini, cached per path (empty parser if the file is missing)"""
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    return config
+
+def read_config(announce=False, required=True):
+    """API credentials from pythia.ini (plus GITHUB_TOKEN/GH_TOKEN from the environment)
+
+    Exits with an error when the file is missing and required is set, which
+    is how the individual tools have always behaved.
+    """
+    config_file = get_config_path()
+    if not os.path.exists(config_file):
+        if required:
+            print(f"ERROR: Config file not found: {config_file}")
+            sys.exit(1)
+    elif announce:
+        print(f"Reading config from: {config_file}")
+
+    config = load_ini(config_file)
+    # GitHub Models authenticates with a personal access token from the environment
+    github_token = os.environ.get('GITHUB_TOKEN') or os.environ.get('GH_TOKEN', '')
+
+    return {
+        'openai': config.get('API', 'OpenAIKey', fallback=''),
+        'anthropic': config.get('API', 'AnthropicKey', fallback=''),
+        'github': github_token
+    }
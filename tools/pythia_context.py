@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Python mirror of the context rules in Source/Pythia.Context.pas
+Project parsing (ParseProjectFile), token estimation (EstimateTokens),
+prompt formatting (FormatContextForAI) and truncation (PrioritizeAndTruncate)
+behave like the Delphi code, so the tools can predict what a prompt will
+contain without running the IDE.
+"""
+
+import os
+import xml.etree.ElementTree as ET
+
+# TContextItemType
+CT_CURRENT_FILE = 'current_file'
+CT_SELECTION = 'selection'
+CT_PROJECT_FILE = 'project_file'
+CT_RELATED_FILE = 'related_file'
+
+# TChatWindow.GatherContext passes 6000 to PrioritizeAndTruncate
+DEFAULT_MAX_TOKENS = 6000
+# PrioritizeAndTruncate keeps at most this many characters of the current file
+CURRENT_FILE_CUT = 50000
+# TStringBuilder.AppendLine uses sLineBreak, which is CRLF on Windows
+LINE_BREAK = '\r\n'
+
+SOURCE_EXTENSIONS = ('.pas', '.inc', '.dpr', '.dpk', '.dfm', '.fmx')
+
+def _local_name(tag):
+    # .dproj files use the MSBuild default namespace; NodeName ignores it
+    return tag.rsplit('}', 1)[-1]
+
+def parse_project_includes(project_path):
+    """DCCReference Include values from a .dproj, in project order
+
+    Only ItemGroup children of the root are read, like ParseProjectFile, and
+    XML errors yield an empty list.
+    """
+    includes = []
+    if not os.path.isfile(project_path):
+        return includes
+    try:
+        root = ET.parse(project_path).getroot()
+    except ET.ParseError:
+        return includes
+    for item_group in root:
+        if _local_name(item_group.tag).lower() != 'itemgroup':
+            continue
+        for node in item_group:
+            if _local_name(node.tag).lower() != 'dccreference':
+                continue
+            include = node.get('Include', '')
+            if include:
+                includes.append(include)
+    return includes
+
+def resolve_include(project_dir, include):
+    """Include made absolute against the project directory, as ParseProjectFile does"""
+    # Paths are written with backslashes; normalize for this OS
+    return os.path.normpath(os.path.join(project_dir, include.replace('\\', os.sep)))
+
+def parse_project_file(project_path):
+    """DCCReference paths from a .dproj, resolved like ParseProjectFile"""
+    project_dir = os.path.dirname(os.path.abspath(project_path))
+    return [resolve_include(project_dir, inc) for inc in parse_project_includes(project_path)]
+
+def utf16_length(text):
+    """Length(Text) as Delphi sees it: UTF-16 code units, not code points"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+def estimate_tokens(text):
+    """TBaseContextProvider.EstimateTokens: Max(1, Length(Text) div 3)"""
+    return max(1, utf16_length(text) // 3)
+
+_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+_FOUR_BYTE_LEADS = bytes(range(0xF0, 0xF8))
+
+def measure_source(path):
+    """(bytes on disk, Length of the decoded text in UTF-16 units)
+
+    Counts characters straight from the UTF-8 bytes (one per non-continuation
+    byte, two for each 4-byte sequence) so sizing a file never decodes it.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    size = len(data)
+    if data.startswith(b'\xef\xbb\xbf'):
+        data = data[3:]
+    if data.isascii():
+        return size, len(data)
+    code_points = len(data.translate(None, _CONTINUATION_BYTES))
+    astral = len(data) - len(data.translate(None, _FOUR_BYTE_LEADS))
+    return size, code_points + astral
+
+def context_item(item_type, file_path, content, line_start=0, line_end=0, token_count=None):
+    """TContextItem; TokenCount is estimated the way GatherContext does it"""
+    if token_count is None:
+        # GatherContext estimates selection/current file; project entries stay 0
+        token_count = estimate_tokens(content) if content and item_type != CT_PROJECT_FILE else 0
+    return {'type': item_type, 'path': file_path, 'content': content,
+            'line_start': line_start, 'line_end': line_end, 'tokens': token_count}
+
+def format_context(items):
+    """TBaseContextProvider.FormatContextForAI"""
+    nl = LINE_BREAK
+    parts = ['## Workspace Context' + nl, nl]
+    project_header = False
+    for item in items:
+        name = os.path.basename(item['path'].replace('\\', '/'))
+        if item['type'] == CT_CURRENT_FILE:
+            ext = os.path.splitext(item['path'])[1].lower()[1:]
+            parts += [f"### Current File: {name}", nl, f"```{ext}", nl,
+                      item['content'], nl, '```' + nl, nl]
+        elif item['type'] == CT_SELECTION:
+            parts += [f"### Selected Code (Lines {item['line_start']}-{item['line_end']}):", nl,
+                      '```pascal' + nl, item['content'], nl, '```' + nl, nl]
+        elif item['type'] == CT_PROJECT_FILE:
+            if not project_header:
+                parts.append('### Project Files:' + nl)
+                project_header = True
+            parts += [f"- {item['path']}", nl]
+        elif item['type'] == CT_RELATED_FILE:
+            parts += [f"### Related File: {name}", nl, '```pascal' + nl,
+                      item['content'], nl, '```' + nl, nl]
+    return ''.join(parts)
+
+def prioritize_and_truncate(items, max_tokens=DEFAULT_MAX_TOKENS):
+    """TBaseContextProvider.PrioritizeAndTruncate; returns (items, truncated_current_file)
+
+    Drops project entries, then related files, and finally cuts the current
+    file to its first 50,000 characters, which may still exceed the budget.
+    """
+    items = list(items)
+    total = sum(item['tokens'] for item in items)
+    if total <= max_tokens:
+        return items, False
+    for item_type in (CT_PROJECT_FILE, CT_RELATED_FILE):
+        for i in range(len(items) - 1, -1, -1):
+            if total <= max_tokens:
+                break
+            if items[i]['type'] == item_type:
+                total -= items[i]['tokens']
+                del items[i]
+    if total > max_tokens:
+        for i, item in enumerate(items):
+            if item['type'] == CT_CURRENT_FILE:
+                content = cut_utf16(item['content'], CURRENT_FILE_CUT)
+                items[i] = dict(item, content=content, tokens=estimate_tokens(content))
+                return items, True
+    return items, False
+
+def cut_utf16(text, max_units):
+    """Copy(Text, 1, max_units) with Delphi's UTF-16 indexing"""
+    if text.isascii() or utf16_length(text) <= max_units:
+        return text[:max_units]
+    encoded = text.encode('utf-16-le')[:max_units * 2]
+    return encoded.decode('utf-16-le', errors='ignore')
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+GitHub Copilot token exchange for the Pythia tools
+Same flow as TGitHubCopilotAuth (Pythia.GitHub.Auth.pas): the GitHub OAuth
+token from the device flow ([GitHub] Token in pythia.ini, else GITHUB_TOKEN
+or GH_TOKEN) is exchanged at copilot_internal/v2/token for a short-lived
+Copilot token, which is what api.githubcopilot.com accepts.
+
+The Copilot token is cached in memory and in copilot-token.json in the cache
+directory, keyed by a hash of the OAuth token (which is never written), and
+reused until REFRESH_MARGIN seconds before its expires_at. A background
+thread can refresh it ahead of time so requests never wait for the exchange.
+"""
+
+import os
+import time
+import json
+import threading
+
+import requests
+
+import pythia_http
+from pythia_cache import get_cache_dir, fingerprint, write_json_atomic
+from pythia_config import get_config_path, load_ini
+from pythia_providers import COPILOT_HEADERS, copilot_token_url
+
+TOKEN_FILE = 'copilot-token.json'
+# Treat a token as expired this many seconds before expires_at
+REFRESH_MARGIN = 120
+# Wait before retrying a failed background refresh
+RETRY_DELAY = 15
+
+def read_oauth_token():
+    """GitHub OAuth token: pythia.ini [GitHub] Token, else GITHUB_TOKEN/GH_TOKEN"""
+    config = load_ini(get_config_path())
+    token = config.get('GitHub', 'Token', fallback='')
+    return token or os.environ.get('GITHUB_TOKEN') or os.environ.get('GH_TOKEN', '')
+
+def exchange_token(oauth_token, timeout=30):
+    """One token exchange; returns {'token', 'expires_at', 'refresh_in', 'fetched_at', 'elapsed'}
+
+    Raises requests.exceptions.HTTPError when GitHub refuses the OAuth
+    token (401, or 403/404 for accounts without Copilot access).
+    """
+    headers = dict(COPILOT_HEADERS)
+    headers.update({"Authorization": f"token {oauth_token}", "Accept": "application/json"})
+    started = time.perf_counter()
+    response = pythia_http.get(copilot_token_url(), headers=headers, read_timeout=timeout)
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(
+            f"Copilot token exchange failed: HTTP {response.status_code} {response.text[:200]}",
+            response=response)
+    data = response.json()
+    return {
+        'token': data['token'],
+        'expires_at': float(data['expires_at']),
+        'refresh_in': data.get('refresh_in'),
+        'fetched_at': time.time(),
+        'elapsed': elapsed,
+    }
+
+class CopilotTokenManager:
+    """Copilot token for one OAuth token: memory first, then disk, then an exchange
+
+    token() holds a lock across the exchange, so concurrent callers share a
+    single one. Pass use_disk=False for an in-process cache only.
+    """
+
+    def __init__(self, oauth_token, margin=REFRESH_MARGIN, use_disk=True, timeout=30):
+        self.oauth_token = oauth_token
+        self.margin = margin
+        self.use_disk = use_disk
+        self.timeout = timeout
+        self.key = fingerprint('copilot', oauth_token)
+        self.path = os.path.join(get_cache_dir(), TOKEN_FILE)
+        self.current = None
+        self.lock = threading.Lock()
+        self.stats = {'exchanges': 0, 'exchange_time': 0.0, 'memory_hits': 0, 'disk_hits': 0,
+                      'background_refreshes': 0, 'refresh_errors': 0}
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _margin(self, entry):
+        # Never more than a fifth of the lifetime, so short-lived tokens still get reused
+        return min(self.margin, (entry['expires_at'] - entry['fetched_at']) / 5)
+
+    def _fresh(self, entry):
+        return bool(entry) and entry['expires_at'] - time.time() > self._margin(entry)
+
+    def _load_disk(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_disk(self, entry):
+        now = time.time()
+        entries = {k: v for k, v in self._load_disk().items() if v.get('expires_at', 0) > now}
+        entries[self.key] = {k: entry[k] for k in ('token', 'expires_at', 'refresh_in', 'fetched_at')}
+        write_json_atomic(self.path, entries)
+
+    def _exchange(self):
+        entry = exchange_token(self.oauth_token, self.timeout)
+        self.stats['exchanges'] += 1
+        self.stats['exchange_time'] += entry['elapsed']
+        self.current = entry
+        if self.use_disk:
+            self._save_disk(entry)
+        return entry
+
+    def token(self):
+        """(token, exchanged): a valid Copilot token and whether this call fetched it"""
+        with self.lock:
+            if self._fresh(self.current):
+                self.stats['memory_hits'] += 1
+                return self.current['token'], False
+            if self.use_disk:
+                entry = self._load_disk().get(self.key)
+                if self._fresh(entry):
+                    self.stats['disk_hits'] += 1
+                    self.current = entry
+                    return entry['token'], False
+            return self._exchange()['token'], True
+
+    def invalidate(self):
+        """Forget the cached token, e.g. after api.githubcopilot.com answered 401"""
+        with self.lock:
+            self.current = None
+            if self.use_disk:
+                entries = self._load_disk()
+                if entries.pop(self.key, None) is not None:
+                    write_json_atomic(self.path, entries)
+
+    def refresh_due(self):
+        """Epoch seconds at which the background thread should re-exchange"""
+        entry = self.current
+        if not entry:
+            return time.time()
+        due = entry['expires_at'] - self._margin(entry)
+        # GitHub suggests an earlier refresh with refresh_in; honour it when present
+        if entry.get('refresh_in'):
+            due = min(due, entry['fetched_at'] + entry['refresh_in'])
+        return due
+
+    def _refresh_loop(self):
+        while not self._stop.wait(max(0.0, self.refresh_due() - time.time())):
+            try:
+                with self.lock:
+                    self._exchange()
+                self.stats['background_refreshes'] += 1
+            except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                self.stats['refresh_errors'] += 1
+                self.last_error = str(e)
+                if self._stop.wait(RETRY_DELAY):
+                    break
+
+    def start_refresh(self):
+        """Keep the token fresh from a daemon thread until stop_refresh()"""
+        self.token()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._refresh_loop, name='copilot-token-refresh',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop_refresh(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+In-memory unit dependency graph over a source index (pythia_index.py)
+Edges are the resolved uses clauses and {$I} includes stored in the index.
+Lookups are plain dict/BFS work, so N-hop queries take microseconds once the
+index is loaded.
+"""
+
+from collections import deque
+
+class DependencyGraph:
+    """Forward (uses/includes) and reverse (used by) adjacency of a project"""
+
+    def __init__(self, index):
+        self.entries = index['entries']
+        self.forward = {}
+        self.reverse = {key: [] for key in self.entries}
+        self.names = {}
+        for key, node in index['graph'].items():
+            targets = node['uses'] + node['includes']
+            self.forward[key] = targets
+            for target in targets:
+                self.reverse.setdefault(target, []).append(key)
+        for key, entry in self.entries.items():
+            if entry['unit']:
+                self.names.setdefault(entry['unit'].lower(), key)
+            self.names.setdefault(key.lower(), key)
+
+    def resolve(self, unit_or_path):
+        """Index key for a unit name or Include path (case-insensitive), or None"""
+        return self.names.get(unit_or_path.lower().replace('/', '\\'))
+
+    def neighbours(self, key, hops=1, reverse=False):
+        """[(key, distance)] within hops of key, nearest first (key itself excluded)"""
+        adjacency = self.reverse if reverse else self.forward
+        distances = {key: 0}
+        queue = deque([key])
+        found = []
+        while queue:
+            current = queue.popleft()
+            distance = distances[current]
+            if distance >= hops:
+                continue
+            for target in adjacency.get(current, ()):
+                if target not in distances:
+                    distances[target] = distance + 1
+                    found.append((target, distance + 1))
+                    queue.append(target)
+        return found
+
+    def dependencies(self, key, hops=1, reverse=False, order='size'):
+        """Neighbours as dicts with unit, hops, tokens and size, ranked
+
+        order='size' puts the largest files first (what costs the most
+        context), order='hops' nearest first and then largest.
+        """
+        rows = []
+        for target, distance in self.neighbours(key, hops, reverse):
+            entry = self.entries.get(target)
+            rows.append({
+                'key': target,
+                'unit': entry['unit'] if entry else '',
+                'kind': entry['kind'] if entry else '',
+                'hops': distance,
+                'tokens': entry['tokens'] if entry else 0,
+                'size': entry['size'] if entry else 0,
+            })
+        if order == 'hops':
+            rows.sort(key=lambda r: (r['hops'], -r['tokens']))
+        else:
+            rows.sort(key=lambda r: (-r['tokens'], r['hops']))
+        return rows
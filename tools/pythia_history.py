@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark history for the Pythia tools
+Every benchmark run is stored in a SQLite file next to the usage ledger:
+when it ran, the tool, git commit, host, Python and endpoint, and per
+series (target + payload shape) the raw samples of each metric. compare()
+tests the latest run of each series against a rolling baseline of the runs
+before it:
+
+    p50  one-sided Mann-Whitney U test for a shift in the worse direction
+    tail one-sided binomial test on how many samples land beyond the
+         baseline's worst 5% (p95, or p5 for throughput)
+
+A metric regresses when a test is significant at alpha AND the matching
+percentile moved by more than the threshold, so tiny but consistent shifts
+are not reported. PYTHIA_HISTORY=<path> stores the history elsewhere,
+PYTHIA_HISTORY=off disables recording.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import socket
+import sqlite3
+import platform
+import subprocess
+
+from pythia_cache import get_data_file
+
+HISTORY_ENV = 'PYTHIA_HISTORY'
+# Metric -> +1 when higher is worse (latencies, tokens), -1 when lower is worse (throughput)
+METRIC_DIRECTIONS = {
+    'latency': 1,
+    'ttfb': 1,
+    'prompt_tokens': 1,
+    'tokens_per_sec': -1,
+}
+MIN_SAMPLES = 5
+DEFAULT_BASELINE_RUNS = 5
+DEFAULT_ALPHA = 0.01
+DEFAULT_THRESHOLD = 0.10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    tool TEXT NOT NULL,
+    label TEXT,
+    git_commit TEXT,
+    environment TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    target TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    p50 REAL,
+    p95 REAL,
+    samples TEXT NOT NULL,
+    PRIMARY KEY (run_id, target, shape, metric)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_series ON results (target, shape, metric, run_id);
+"""
+
+def get_history_path():
+    """History file location, or None when recording is disabled"""
+    override = os.environ.get(HISTORY_ENV)
+    if override:
+        return None if override.lower() == 'off' else override
+    return get_data_file('benchmark_history.sqlite3')
+
+def open_history(path=None):
+    path = path or get_history_path()
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA foreign_keys=ON')
+    conn.executescript(SCHEMA)
+    return conn
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+def git_commit():
+    """HEAD of the checkout the tools live in, or None"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                timeout=5, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+def environment(extra=None):
+    """Metadata stored with each run"""
+    import pythia_providers
+    env = {
+        'host': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'endpoint': (pythia_providers._base_url_override or os.environ.get(pythia_providers.BASE_URL_ENV)
+                     or 'live'),
+        'argv': sys.argv[1:],
+    }
+    env.update(extra or {})
+    return env
+
+def record_run(tool, series, label=None, extra=None, path=None):
+    """Store one run; series is a list of {'target', 'shape', 'metrics': {metric: [values]}}
+
+    Returns the run id, or None when recording is disabled or failed
+    (history must never break a benchmark).
+    """
+    path = path or get_history_path()
+    if path is None:
+        return None
+    try:
+        conn = open_history(path)
+        try:
+            with conn:
+                conn.execute('BEGIN')
+                run_id = conn.execute(
+                    'INSERT INTO runs (ts, tool, label, git_commit, environment) VALUES (?, ?, ?, ?, ?)',
+                    (time.time(), tool, label, git_commit(), json.dumps(environment(extra)))).lastrowid
+                for item in series:
+                    for metric, values in item['metrics'].items():
+                        values = [v for v in values if v is not None]
+                        if not values:
+                            continue
+                        conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                     (run_id, item['target'], item['shape'], metric, len(values),
+                                      percentile(values, 50), percentile(values, 95), json.dumps(values)))
+            return run_id
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"WARNING: could not record benchmark history in {path}: {e}", file=sys.stderr)
+        return None
+
+def _normal_sf(z):
+    """P(Z > z) for a standard normal"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def mann_whitney(current, baseline):
+    """One-sided p-value that current tends to be larger than baseline
+
+    Normal approximation with tie correction and continuity correction;
+    fine for the 5+ samples per side compare() requires.
+    """
+    n1, n2 = len(current), len(baseline)
+    pooled = sorted([(v, 0) for v in current] + [(v, 1) for v in baseline])
+    ranks = [0.0] * len(pooled)
+    tie_term = 0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        tie_term += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, side) in zip(ranks, pooled) if side == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    return _normal_sf((u - n1 * n2 / 2 - 0.5) / math.sqrt(variance))
+
+def binomial_sf(k, n, p):
+    """P(X >= k) for X ~ Binomial(n, p)"""
+    return sum(math.comb(n, i) * p ** i * (1 - p) ** (n - i) for i in range(k, n + 1))
+
+def tail_exceedance(current, cutoff, direction):
+    """One-sided p-value that more than 5% of current lies beyond the baseline's worst-5% cutoff"""
+    beyond = sum(1 for v in current if (v - cutoff) * direction > 0)
+    return binomial_sf(beyond, len(current), 0.05)
+
+def list_runs(conn, limit=20, tool=None):
+    query = 'SELECT id, ts, tool, label, git_commit, environment FROM runs'
+    params = ()
+    if tool:
+        query += ' WHERE tool = ?'
+        params = (tool,)
+    query += ' ORDER BY id DESC LIMIT ?'
+    return conn.execute(query, params + (limit,)).fetchall()
+
+def run_results(conn, run_id):
+    return conn.execute('SELECT target, shape, metric, n, p50, p95 FROM results WHERE run_id = ? '
+                        'ORDER BY target, shape, metric', (run_id,)).fetchall()
+
+def compare(conn, run_id=None, tool=None, baseline_runs=DEFAULT_BASELINE_RUNS,
+            alpha=DEFAULT_ALPHA, threshold=DEFAULT_THRESHOLD):
+    """Rows comparing the latest (or given) run of each series with its rolling baseline
+
+    The baseline pools the samples of the baseline_runs earlier runs of the
+    same target, payload shape and metric.
+    """
+    if run_id is None:
+        query = 'SELECT MAX(id) FROM runs' + (' WHERE tool = ?' if tool else '')
+        run_id = conn.execute(query, (tool,) if tool else ()).fetchone()[0]
+        if run_id is None:
+            return None, []
+    rows = []
+    current_rows = conn.execute('SELECT target, shape, metric, samples FROM results WHERE run_id = ? '
+                                'ORDER BY target, shape, metric', (run_id,)).fetchall()
+    for target, shape, metric, samples in current_rows:
+        current = json.loads(samples)
+        history = conn.execute('SELECT run_id, samples FROM results WHERE target = ? AND shape = ? '
+                               'AND metric = ? AND run_id < ? ORDER BY run_id DESC LIMIT ?',
+                               (target, shape, metric, run_id, baseline_runs)).fetchall()
+        baseline = [v for _, s in history for v in json.loads(s)]
+        direction = METRIC_DIRECTIONS.get(metric, 1)
+        # The worse tail: p95 when higher is worse, p5 when lower is worse
+        tail_pct = 95 if direction > 0 else 5
+        row = {'target': target, 'shape': shape, 'metric': metric, 'runs': len(history),
+               'n': len(current), 'baseline_n': len(baseline), 'tail_pct': tail_pct,
+               'p50': percentile(current, 50), 'tail': percentile(current, tail_pct),
+               'baseline_p50': percentile(baseline, 50), 'baseline_tail': percentile(baseline, tail_pct),
+               'change_p50': None, 'change_tail': None, 'p_shift': None, 'p_tail': None,
+               'verdict': 'insufficient'}
+        rows.append(row)
+        if len(current) < MIN_SAMPLES or len(baseline) < MIN_SAMPLES:
+            continue
+        for key in ('p50', 'tail'):
+            if row[f'baseline_{key}']:
+                row[f'change_{key}'] = row[key] / row[f'baseline_{key}'] - 1
+        signed = [v * direction for v in current], [v * direction for v in baseline]
+        row['p_shift'] = mann_whitney(*signed)
+        row['p_tail'] = tail_exceedance(current, row['baseline_tail'], direction)
+        worse_p50 = (row['change_p50'] or 0) * direction > threshold
+        worse_tail = (row['change_tail'] or 0) * direction > threshold
+        better = ((row['change_p50'] or 0) * direction < -threshold
+                  and mann_whitney(*reversed(signed)) < alpha)
+        if (row['p_shift'] < alpha and worse_p50) or (row['p_tail'] < alpha and worse_tail):
+            row['verdict'] = 'regression'
+        elif better:
+            row['verdict'] = 'improved'
+        else:
+            row['verdict'] = 'ok'
+    return run_id, rows
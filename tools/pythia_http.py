@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client layer for the Pythia tools
+One pooled keep-alive session per host, compressed responses, separate
+connect/read timeouts with an optional overall deadline, jittered exponential
+retry on 429/5xx and per-provider concurrency limits. Every POST attempt to
+a known provider endpoint is recorded in the usage ledger (pythia_ledger.py),
+and tools can opt in to answering repeated JSON requests from the response
+cache (pythia_responses.py).
+"""
+
+import os
+import time
+import random
+import threading
+import contextlib
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import pythia_responses
+from pythia_providers import (PROVIDERS, extract_cache_usage, extract_usage, is_base_url_overridden,
+                              provider_for_url)
+
+try:
+    import brotli  # noqa: F401 - urllib3 decodes 'br' bodies when this is installed
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+POOL_SIZE = 16
+
+# Requests allowed in flight per provider, shared by every thread in the process
+PROVIDER_CONCURRENCY = {
+    'openai': 8,
+    'anthropic': 8,
+    'github': 4,
+    'copilot': 4,
+}
+
+_sessions = {}
+_semaphores = {}
+_lock = threading.Lock()
+
+def new_session(pool_size=POOL_SIZE):
+    """A fresh session with its own connection pool (e.g. for cold measurements)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    return session
+
+def get_session(url, pool_size=POOL_SIZE):
+    """Process-wide pooled session for the host in url; connections are reused"""
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = new_session(pool_size)
+        return session
+
+def close_sessions():
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+def set_concurrency_limit(provider_id, limit):
+    """Change how many requests may be in flight to one provider (None = unlimited)"""
+    with _lock:
+        PROVIDER_CONCURRENCY[provider_id] = limit
+        _semaphores.pop(provider_id, None)
+
+def _concurrency_slot(provider_id):
+    if provider_id is None:
+        return contextlib.nullcontext()
+    with _lock:
+        semaphore = _semaphores.get(provider_id)
+        if semaphore is None:
+            limit = PROVIDER_CONCURRENCY.get(provider_id)
+            if not limit:
+                return contextlib.nullcontext()
+            semaphore = _semaphores[provider_id] = threading.BoundedSemaphore(limit)
+        return semaphore
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than a Retry-After header"""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+    try:
+        delay = max(delay, float(retry_after))
+    except (TypeError, ValueError):
+        pass
+    return delay
+
+def error_details(response):
+    """(error_type, message) from an OpenAI- or Anthropic-style error body"""
+    try:
+        error = response.json().get('error', {})
+    except ValueError:
+        return '', response.text[:500]
+    if isinstance(error, str):
+        return error, error
+    return error.get('type') or error.get('code') or '', error.get('message', '')
+
+def is_retryable(response):
+    """429/5xx are retried, except quota exhaustion which will not fix itself"""
+    if response.status_code not in RETRY_STATUSES:
+        return False
+    if response.status_code == 429:
+        error_type, _ = error_details(response)
+        return 'insufficient_quota' not in error_type
+    return True
+
+def _record_attempt(method, url, provider, kwargs, response, elapsed):
+    """Write one attempt to the usage ledger
+
+    Only POSTs generate (and bill) anything; model listings, token exchanges
+    and other GETs stay out. Non-streamed bodies are parsed here for their
+    usage block; streamed responses get a ledger_id attribute so the reader
+    can add tokens later.
+    """
+    if method != 'POST':
+        return
+    provider = provider or provider_for_url(url)
+    if provider is None:
+        return
+    import pythia_ledger
+    # Mock-server traffic stays out of the ledger unless it was asked for
+    if is_base_url_overridden() and not os.environ.get(pythia_ledger.LEDGER_ENV):
+        return
+    payload = kwargs.get('json') or {}
+    prompt_tokens = completion_tokens = cache_creation = cache_read = None
+    if response is not None and response.status_code == 200 and not kwargs.get('stream'):
+        try:
+            data = response.json()
+            prompt_tokens, completion_tokens = extract_usage(provider, data)
+            if PROVIDERS[provider]['format'] == 'anthropic':
+                cache_creation, cache_read = extract_cache_usage(data)
+        except (ValueError, AttributeError):
+            pass
+    row_id = pythia_ledger.record(provider, payload.get('model'),
+                                  0 if response is None else response.status_code,
+                                  elapsed, prompt_tokens, completion_tokens, cache_creation, cache_read)
+    if response is not None and kwargs.get('stream'):
+        response.ledger_id = row_id
+
+def request(method, url, provider=None, retries=DEFAULT_RETRIES,
+            connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+            deadline=None, session=None, **kwargs):
+    """Send a request through the pooled session for its host
+
+    Retries 429/5xx responses and connection failures with jittered backoff.
+    connect_timeout bounds TCP+TLS setup, read_timeout each wait for data,
+    and deadline (seconds) the whole call including retries. When retries
+    run out the last response is returned as-is; callers check status_code.
+    With the response cache on, a repeated non-streamed JSON request to a
+    provider is answered from disk (no network, no ledger row).
+    """
+    cache_payload = None
+    if (pythia_responses.is_active() and method == 'POST' and kwargs.get('json') is not None
+            and not kwargs.get('stream') and (provider or provider_for_url(url))):
+        cache_payload = kwargs['json']
+        cached = pythia_responses.lookup(url, cache_payload)
+        if cached is not None:
+            return cached
+    session = session or get_session(url)
+    started = time.monotonic()
+    attempt = 0
+
+    while True:
+        timeout = (connect_timeout, read_timeout)
+        if deadline is not None:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                raise requests.exceptions.Timeout(f"deadline of {deadline}s exceeded for {url}")
+            timeout = (min(connect_timeout, remaining), min(read_timeout, remaining))
+
+        response = None
+        sent = time.perf_counter()
+        try:
+            with _concurrency_slot(provider):
+                response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            _record_attempt(method, url, provider, kwargs, None, time.perf_counter() - sent)
+            if attempt >= retries:
+                raise
+            delay = backoff_delay(attempt)
+        else:
+            _record_attempt(method, url, provider, kwargs, response, time.perf_counter() - sent)
+            if attempt >= retries or not is_retryable(response):
+                if cache_payload is not None:
+                    pythia_responses.store(url, cache_payload, response, provider)
+                return response
+            delay = backoff_delay(attempt, response.headers.get('Retry-After'))
+
+        if deadline is not None and time.monotonic() - started + delay >= deadline:
+            if response is not None:
+                return response
+            raise requests.exceptions.Timeout(f"deadline of {deadline}s exceeded for {url}")
+        if response is not None:
+            response.close()
+        time.sleep(delay)
+        attempt += 1
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+def post_json(url, payload, headers, **kwargs):
+    return request('POST', url, json=payload, headers=headers, **kwargs)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Persistent, incremental source index for a Delphi project
+Stored next to the project as <Project>.pythia-index.json and read by both the
+tools and the plugin (Source/Pythia.SourceIndex.pas). Each DCCReference gets
+its size, mtime, content hash, UTF-16 length, token estimate, line lengths
+and unit header (name, kind, interface/implementation uses, {$I} files).
+Files pulled in with {$I} are indexed too. The unit dependency graph
+(resolved uses and includes per file) is stored alongside the entries.
+Rebuilding only re-reads files whose size or mtime changed, and only
+re-scans those whose hash changed too.
+"""
+
+import os
+import re
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from pythia_cache import write_json_atomic
+from pythia_context import SOURCE_EXTENSIONS, parse_project_includes, resolve_include, utf16_length
+
+# Bump when the entry layout changes; older indexes are rebuilt from scratch
+INDEX_VERSION = 2
+INDEX_SUFFIX = '.pythia-index.json'
+
+# Comments ({ }, (* *), //) and string literals, blanked before header parsing
+_NOISE = re.compile(r"\{[^}]*\}|\(\*.*?\*\)|//[^\n]*|'(?:[^']|'')*'", re.DOTALL)
+_HEADER = re.compile(r'\b(unit|program|library|package)\s+([\w.]+)\s*;', re.IGNORECASE)
+_SECTION = re.compile(r'\b(interface|implementation)\b', re.IGNORECASE)
+_USES = re.compile(r'\buses\b(.*?);', re.IGNORECASE | re.DOTALL)
+_USES_NAME = re.compile(r'^\s*([\w.]+)')
+# {$I file}, {$INCLUDE file} and the (*$I file*) form; {$I+}/{$IFDEF} do not match
+_INCLUDE_DIRECTIVE = re.compile(r"(?:\{|\(\*)\$(?:I|INCLUDE)\s+('[^']+'|[^\s}*]+)", re.IGNORECASE)
+
+def index_path_for(project_path):
+    """<dir>/<Project>.pythia-index.json for <dir>/<Project>.dproj"""
+    return os.path.splitext(project_path)[0] + INDEX_SUFFIX
+
+def file_stamp(path):
+    """(size, mtime in whole milliseconds), the pair the plugin compares too"""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns // 1_000_000
+
+def parse_unit_header(text):
+    """{'unit', 'kind', 'interface_uses', 'implementation_uses'} from Pascal source"""
+    code = _NOISE.sub(' ', text)
+    header = _HEADER.search(code)
+    result = {
+        'unit': header.group(2) if header else '',
+        'kind': header.group(1).lower() if header else '',
+        'interface_uses': [],
+        'implementation_uses': [],
+    }
+    # Programs and libraries have a single uses clause before 'begin'
+    section = 'interface_uses'
+    position = header.end() if header else 0
+    while True:
+        uses = _USES.search(code, position)
+        if not uses:
+            break
+        for marker in _SECTION.finditer(code, position, uses.start()):
+            section = marker.group(1).lower() + '_uses'
+        for part in uses.group(1).split(','):
+            # "Unit in 'path'" loses its quoted path with the other strings
+            name = _USES_NAME.match(part)
+            if name:
+                result[section].append(name.group(1))
+        position = uses.end()
+    return result
+
+def scan_source(data):
+    """Index fields computed from a file's bytes"""
+    text = data.decode('utf-8-sig', errors='replace')
+    # Delphi strings index in UTF-16 units; each length includes its line break
+    lines = text.split('\n')
+    line_lengths = [len(line) + 1 for line in lines[:-1]] if text.isascii() else \
+        [utf16_length(line) + 1 for line in lines[:-1]]
+    if lines[-1]:
+        line_lengths.append(utf16_length(lines[-1]))
+    chars = utf16_length(text)
+    entry = {
+        'hash': hashlib.blake2b(data, digest_size=16).hexdigest(),
+        'chars': chars,
+        'tokens': max(1, chars // 3),
+        'line_count': len(line_lengths),
+        'line_lengths': line_lengths,
+    }
+    entry.update(parse_unit_header(text))
+    entry['include_files'] = [name.strip("'") for name in _INCLUDE_DIRECTIVE.findall(text)]
+    return entry
+
+def load_index(index_path):
+    """Parsed index, or None if it is missing, unreadable or an older version"""
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+def _refresh_entry(path, old):
+    """(entry, outcome) where outcome is 'reused', 'touched', 'scanned' or 'missing'"""
+    try:
+        size, mtime_ms = file_stamp(path)
+    except OSError:
+        return None, 'missing'
+    if old and old['size'] == size and old['mtime_ms'] == mtime_ms:
+        return old, 'reused'
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None, 'missing'
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if old and old['hash'] == digest:
+        # Saved without changes (or checked out again): keep the scan, new stamp
+        return dict(old, size=size, mtime_ms=mtime_ms), 'touched'
+    entry = scan_source(data)
+    entry.update(size=size, mtime_ms=mtime_ms)
+    return entry, 'scanned'
+
+def _include_key(project_dir, from_key, name):
+    """Index key of a {$I name} target, looked up like the compiler does
+
+    Tries the including file's directory, then the project directory. Keys
+    use the same backslash form as DCCReference Include values.
+    """
+    from_dir = os.path.dirname(resolve_include(project_dir, from_key))
+    for directory in (from_dir, project_dir):
+        path = os.path.normpath(os.path.join(directory, name.replace('\\', os.sep)))
+        if os.path.isfile(path):
+            return os.path.relpath(path, project_dir).replace(os.sep, '\\')
+    return None
+
+def _unit_names(entries):
+    return {e['unit'].lower(): key for key, e in entries.items() if e['unit'] and e['kind'] != 'include'}
+
+def _graph_node(project_dir, key, entry, names):
+    """Resolved edges of one file: project units it uses and files it includes"""
+    node = {'uses': [], 'external': [], 'includes': [], 'missing_includes': []}
+    for unit in dict.fromkeys(entry['interface_uses'] + entry['implementation_uses']):
+        target = names.get(unit.lower())
+        if target is None:
+            node['external'].append(unit)
+        elif target != key:
+            node['uses'].append(target)
+    for name in entry['include_files']:
+        target = _include_key(project_dir, key, name)
+        if target is None:
+            node['missing_includes'].append(name)
+        else:
+            node['includes'].append(target)
+    return node
+
+def build_index(project_path, index_path=None, workers=None, full=False):
+    """Bring the project's index up to date; returns (index, stats)
+
+    The .dproj is only re-parsed when its own stamp changed. Unchanged
+    files are reused without being opened, and only the graph nodes of
+    re-scanned files are recomputed unless the set of units changed.
+    """
+    index_path = index_path or index_path_for(project_path)
+    old = None if full else load_index(index_path)
+    stats = {'reused': 0, 'touched': 0, 'scanned': 0, 'missing': 0, 'removed': 0,
+             'project_parsed': False, 'graph_nodes': 0}
+
+    project_stamp = list(file_stamp(project_path))
+    if old and old['project_stamp'] == project_stamp:
+        includes = old['includes']
+    else:
+        includes = parse_project_includes(project_path)
+        stats['project_parsed'] = True
+
+    old_entries = old['entries'] if old else {}
+    project_dir = os.path.dirname(os.path.abspath(project_path))
+
+    def refresh(key):
+        return key, _refresh_entry(resolve_include(project_dir, key), old_entries.get(key))
+
+    entries = {}
+    changed = set()
+    pending = [inc for inc in includes if inc.lower().endswith(SOURCE_EXTENSIONS)]
+    seen = set(pending)
+    project_units = set(pending)
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Project units first, then the {$I} files they pull in, level by level
+        while pending:
+            found = []
+            for key, (entry, outcome) in pool.map(refresh, pending):
+                stats[outcome] += 1
+                if entry is None:
+                    continue
+                if outcome == 'scanned':
+                    changed.add(key)
+                    if key not in project_units:
+                        entry['kind'] = 'include'
+                entries[key] = entry
+                for name in entry['include_files']:
+                    target = _include_key(project_dir, key, name)
+                    if target and target not in seen:
+                        seen.add(target)
+                        found.append(target)
+            pending = found
+    stats['removed'] = len(set(old_entries) - set(entries))
+
+    names = _unit_names(entries)
+    old_graph = old.get('graph', {}) if old else {}
+    reuse_graph = not stats['removed'] and old and names == _unit_names(old_entries)
+    graph = {}
+    for key, entry in entries.items():
+        if reuse_graph and key in old_graph and key not in changed:
+            graph[key] = old_graph[key]
+        else:
+            graph[key] = _graph_node(project_dir, key, entry, names)
+            stats['graph_nodes'] += 1
+
+    index = {
+        'version': INDEX_VERSION,
+        'project': os.path.basename(project_path),
+        'project_stamp': project_stamp,
+        'includes': includes,
+        'entries': entries,
+        'graph': graph,
+    }
+    if old is None or stats['project_parsed'] or stats['touched'] or stats['scanned'] or stats['removed']:
+        write_json_atomic(index_path, index)
+    return index, stats
+
+def line_offsets(entry):
+    """0-based UTF-16 offset of the start of each line"""
+    offsets = [0]
+    for length in entry['line_lengths'][:-1]:
+        offsets.append(offsets[-1] + length)
+    return offsets
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Local usage and cost ledger for the Pythia tools
+Every provider POST sent through pythia_http is appended to a SQLite file
+in the data directory (not the disposable cache): time, tool, provider,
+model, status, latency and the token counts from the response's usage block,
+including Anthropic prompt-cache writes and reads, which input_tokens leaves out. A per-day/provider/model rollup
+is maintained on insert, so cost reports never scan the raw rows.
+
+PYTHIA_LEDGER=<path> stores the ledger elsewhere, PYTHIA_LEDGER=off disables
+it. Requests redirected to a mock server (--base-url / PYTHIA_API_BASE_URL)
+are only recorded when PYTHIA_LEDGER is set explicitly.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+from pythia_cache import get_data_file
+
+LEDGER_ENV = 'PYTHIA_LEDGER'
+PRICING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pricing.json')
+# Anthropic bills prompt-cache writes at 1.25x and reads at 0.1x the input price
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    latency_ms REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cache_creation_tokens INTEGER,
+    cache_read_tokens INTEGER
+);
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    day TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms REAL NOT NULL DEFAULT 0,
+    cache_creation_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, provider, model)
+) WITHOUT ROWID;
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO daily_rollup (day, provider, model, requests, errors, prompt_tokens, completion_tokens, latency_ms,
+                          cache_creation_tokens, cache_read_tokens)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, provider, model) DO UPDATE SET
+    requests = requests + 1,
+    errors = errors + excluded.errors,
+    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+    completion_tokens = completion_tokens + excluded.completion_tokens,
+    latency_ms = latency_ms + excluded.latency_ms,
+    cache_creation_tokens = cache_creation_tokens + excluded.cache_creation_tokens,
+    cache_read_tokens = cache_read_tokens + excluded.cache_read_tokens
+"""
+# Columns added after the first release; ledgers created before get them on open
+ADDED_COLUMNS = (
+    ('requests', 'cache_creation_tokens INTEGER'),
+    ('requests', 'cache_read_tokens INTEGER'),
+    ('daily_rollup', 'cache_creation_tokens INTEGER NOT NULL DEFAULT 0'),
+    ('daily_rollup', 'cache_read_tokens INTEGER NOT NULL DEFAULT 0'),
+)
+
+_conn = None
+_conn_path = None
+_lock = threading.Lock()
+
+def get_ledger_path():
+    """Ledger file location, or None when the ledger is disabled"""
+    override = os.environ.get(LEDGER_ENV)
+    if override:
+        return None if override.lower() == 'off' else override
+    return get_data_file('ledger.sqlite3')
+
+def open_ledger(path=None):
+    """SQLite connection with the ledger schema (WAL, safe to share across threads)"""
+    path = path or get_ledger_path()
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    for table, column in ADDED_COLUMNS:
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        if column.split()[0] not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column}')
+    return conn
+
+def _connection():
+    global _conn, _conn_path
+    path = get_ledger_path()
+    if path is None:
+        return None
+    if _conn is None or _conn_path != path:
+        _conn = open_ledger(path)
+        _conn_path = path
+    return _conn
+
+def _tool_name():
+    # pythia_tools.py presents argv[0] as "pythia-tools <command>"
+    name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+    return name.replace('pythia-tools ', '')
+
+def is_error(status):
+    """No response at all, or a 4xx/5xx answer"""
+    return status == 0 or status >= 400
+
+def record(provider_id, model, status, latency, prompt_tokens=None, completion_tokens=None,
+           cache_creation_tokens=None, cache_read_tokens=None):
+    """Append one request to the ledger; returns its row id (None if disabled)
+
+    status 0 means the request never got a response; it and 4xx/5xx count
+    as errors in the rollup. Ledger problems are reported on stderr and
+    never break the tool that made the request.
+    """
+    now = time.time()
+    day = time.strftime('%Y-%m-%d', time.gmtime(now))
+    latency_ms = None if latency is None else latency * 1000
+    try:
+        with _lock:
+            conn = _connection()
+            if conn is None:
+                return None
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                cursor = conn.execute(
+                    'INSERT INTO requests (ts, day, tool, provider, model, status, latency_ms, '
+                    'prompt_tokens, completion_tokens, cache_creation_tokens, cache_read_tokens) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (now, day, _tool_name(), provider_id, model or '', status, latency_ms,
+                     prompt_tokens, completion_tokens, cache_creation_tokens, cache_read_tokens))
+                conn.execute(ROLLUP_UPSERT, (day, provider_id, model or '', int(is_error(status)),
+                                             prompt_tokens or 0, completion_tokens or 0,
+                                             latency_ms or 0, cache_creation_tokens or 0,
+                                             cache_read_tokens or 0))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            return cursor.lastrowid
+    except sqlite3.Error as e:
+        print(f"⚠️ Usage ledger not updated: {e}", file=sys.stderr)
+        return None
+
+def add_usage(row_id, prompt_tokens, completion_tokens, cache_creation_tokens=None, cache_read_tokens=None):
+    """Fill in token counts for a streamed request once its body has been read"""
+    counts = (prompt_tokens, completion_tokens, cache_creation_tokens, cache_read_tokens)
+    if row_id is None or all(count is None for count in counts):
+        return
+    try:
+        with _lock:
+            conn = _connection()
+            if conn is None:
+                return
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT day, provider, model, prompt_tokens, completion_tokens, '
+                                   'cache_creation_tokens, cache_read_tokens '
+                                   'FROM requests WHERE id = ?', (row_id,)).fetchone()
+                if row is None:
+                    conn.execute('ROLLBACK')
+                    return
+                day, provider_id, model = row[:3]
+                # A count the stream did not report keeps its recorded value
+                new = [old if count is None else count for old, count in zip(row[3:], counts)]
+                delta = [(n or 0) - (old or 0) for n, old in zip(new, row[3:])]
+                conn.execute('UPDATE requests SET prompt_tokens = ?, completion_tokens = ?, '
+                             'cache_creation_tokens = ?, cache_read_tokens = ? WHERE id = ?',
+                             (*new, row_id))
+                conn.execute('UPDATE daily_rollup SET prompt_tokens = prompt_tokens + ?, '
+                             'completion_tokens = completion_tokens + ?, '
+                             'cache_creation_tokens = cache_creation_tokens + ?, '
+                             'cache_read_tokens = cache_read_tokens + ? '
+                             'WHERE day = ? AND provider = ? AND model = ?',
+                             (*delta, day, provider_id, model))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+    except sqlite3.Error as e:
+        print(f"⚠️ Usage ledger not updated: {e}", file=sys.stderr)
+
+def rebuild_rollup(conn):
+    """Recompute daily_rollup from the raw rows (e.g. after editing them by hand)"""
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute('DELETE FROM daily_rollup')
+    conn.execute("""
+        INSERT INTO daily_rollup (day, provider, model, requests, errors, prompt_tokens, completion_tokens,
+                                  latency_ms, cache_creation_tokens, cache_read_tokens)
+        SELECT day, provider, model, COUNT(*), SUM(status = 0 OR status >= 400),
+               COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(completion_tokens), 0),
+               COALESCE(SUM(latency_ms), 0), COALESCE(SUM(cache_creation_tokens), 0),
+               COALESCE(SUM(cache_read_tokens), 0)
+        FROM requests GROUP BY day, provider, model
+    """)
+    conn.execute('COMMIT')
+
+# --- Pricing ---
+
+def load_pricing(path=None):
+    """Pricing table: {'provider/model' or 'model' or 'provider/*': {'input': $/1K, 'output': $/1K}}"""
+    with open(path or PRICING_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)['prices']
+
+def find_price(pricing, provider_id, model):
+    """(input, output) USD per 1K tokens for a model, or None if unpriced
+
+    Tries 'provider/model', 'provider/*' (e.g. GitHub Models' free tier),
+    the exact model and then the longest matching model prefix, so dated
+    snapshots such as gpt-4o-2024-08-06 use their family price.
+    """
+    for key in (f"{provider_id}/{model}", f"{provider_id}/*", model):
+        if key in pricing:
+            return pricing[key]['input'], pricing[key]['output']
+    prefixes = [key for key in pricing if '/' not in key and model.startswith(key)]
+    if prefixes:
+        best = pricing[max(prefixes, key=len)]
+        return best['input'], best['output']
+    return None
+
+def estimate_cost(pricing, provider_id, model, prompt_tokens, completion_tokens,
+                  cache_creation_tokens=0, cache_read_tokens=0):
+    """USD for a token count, or None if the model has no price
+
+    Prompt-cache writes and reads are billed at multiples of the input price.
+    """
+    price = find_price(pricing, provider_id, model)
+    if price is None:
+        return None
+    prompt = ((prompt_tokens or 0) + (cache_creation_tokens or 0) * CACHE_WRITE_MULTIPLIER +
+              (cache_read_tokens or 0) * CACHE_READ_MULTIPLIER)
+    return prompt / 1000 * price[0] + (completion_tokens or 0) / 1000 * price[1]
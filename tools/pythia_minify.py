@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Context minifier for Pascal and text DFM sources
+Shrinks what FormatContextForAI would paste verbatim, keeping the code the
+model needs and a map back to the original line numbers for citations.
+
+Pascal (.pas .inc .dpr .dpk): a lexer separates strings, comments and
+compiler directives from code. Comments and {$REGION}/{$ENDREGION} are
+dropped (/// doc comments are kept unless asked otherwise), other directives
+are kept, runs of spaces inside a line collapse to one, and lines left empty
+disappear. Blank-line runs shrink to a single blank line.
+
+Text DFM/FMX: hex blocks (Picture.Data, Glyph.Data, Bitmap ...) become a
+one-line placeholder with their byte count, designer-only properties
+(Explicit*, DesignSize, PixelsPerInch, TextHeight ...) and the Font.* values
+streamed at their TFont defaults are dropped. Binary DFMs are left alone.
+
+minify() returns (text, line_map) where line_map[i] is the original 1-based
+line of output line i + 1; compress_line_map() stores it as runs.
+"""
+
+import re
+
+PASCAL_EXTENSIONS = ('.pas', '.inc', '.dpr', '.dpk')
+DFM_EXTENSIONS = ('.dfm', '.fmx')
+
+_PASCAL_TOKEN = re.compile(r"""
+    (?P<string>'(?:[^'\r\n]|'')*'?)
+  | (?P<directive>\{\$[^}]*\}?|\(\*\$.*?(?:\*\)|\Z))
+  | (?P<comment>\{[^}]*\}?|\(\*.*?(?:\*\)|\Z)|//[^\r\n]*)
+  | (?P<newline>\r\n|\n|\r)
+  | (?P<code>[^'{(/\r\n]+|[({/])
+""", re.DOTALL | re.VERBOSE)
+_INDENT = re.compile(r'[ \t\f]*')
+_SPACES = re.compile(r'[ \t\f]{2,}|[\t\f]')
+_REGION = re.compile(r'^(?:\{|\(\*)\$(?:END)?REGION\b', re.IGNORECASE)
+_NEWLINES = re.compile(r'\r\n|\n|\r')
+
+# Written by the form designer for its own use; never relevant to the code
+DFM_DESIGNER_PROPERTIES = frozenset({
+    'ExplicitLeft', 'ExplicitTop', 'ExplicitWidth', 'ExplicitHeight',
+    'DesignSize', 'PixelsPerInch', 'TextHeight', 'OldCreateOrder', 'DesignerMasterStyle',
+})
+# Font sub-properties the VCL streams with every explicit Font, even at the
+# TFont defaults. Other properties are only written when they differ from the
+# class default (TForm.Visible defaults to False), so they are real state.
+DFM_DEFAULT_VALUES = {
+    'Font.Charset': 'DEFAULT_CHARSET',
+    'Font.Color': 'clWindowText',
+    'Font.Style': '[]',
+}
+_DFM_PROPERTY = re.compile(r'^(\s*)([\w.]+)\s*=\s*(.*?)\s*$')
+_DFM_HEX = re.compile(r'^[0-9A-Fa-f\s]*\}?\s*$')
+
+def detect_line_break(text):
+    return '\r\n' if '\r\n' in text else '\n'
+
+def _finish(lines, line_map, text, original_line, blank_allowed):
+    """Append one output line; blank lines only where the source had one"""
+    if text:
+        lines.append(text)
+        line_map.append(original_line)
+    elif blank_allowed and lines and lines[-1]:
+        lines.append('')
+        line_map.append(original_line)
+
+def minify_pascal(text, keep_docs=True, keep_blank=True):
+    """(minified text, line map) for Pascal source"""
+    lines, line_map = [], []
+    pieces = []
+    line = 1           # original line the lexer is on
+    start = 1          # original line of the first kept piece of the output line
+    removed = False    # something was dropped from this line
+
+    def end_line(count=1):
+        nonlocal pieces, line, start, removed
+        # A line that only held comments vanishes; a blank source line may stay
+        _finish(lines, line_map, ''.join(pieces).rstrip(), start, keep_blank and not removed)
+        pieces = []
+        line += count
+        start = line
+        removed = False
+
+    for match in _PASCAL_TOKEN.finditer(text):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'newline':
+            end_line()
+        elif kind == 'comment' or (kind == 'directive' and _REGION.match(value)):
+            if keep_docs and value.startswith('///'):
+                pieces.append(value.rstrip())
+                continue
+            removed = True
+            breaks = len(_NEWLINES.findall(value))
+            if breaks:
+                end_line(breaks)
+                removed = True
+            elif pieces and not pieces[-1].endswith(' '):
+                # 'a{x}b' must not become 'ab'
+                pieces.append(' ')
+        else:
+            if kind == 'code':
+                # Code runs include their spaces: leading indentation stays
+                # (unless a comment ran up to here), inner runs collapse to one
+                indent = _INDENT.match(value).end()
+                body = _SPACES.sub(' ', value[indent:])
+                if pieces:
+                    value = ' ' + body if indent and not pieces[-1].endswith(' ') else body
+                else:
+                    value = body if removed else value[:indent] + body
+                if not value:
+                    continue
+            if not pieces or pieces[-1].isspace() and len(pieces) == 1:
+                start = line
+            if kind == 'directive' and _NEWLINES.search(value):
+                # Keep one output line per map entry
+                line += len(_NEWLINES.findall(value))
+                value = ' '.join(part.strip() for part in _NEWLINES.split(value))
+            pieces.append(value)
+    end_line(0)
+    while lines and not lines[-1]:
+        lines.pop()
+        line_map.pop()
+    return detect_line_break(text).join(lines), line_map
+
+def _value_continues(value):
+    """True when a DFM property value goes on over the next lines"""
+    if value.endswith('+'):
+        return True
+    depth = 0
+    in_string = False
+    for ch in value:
+        if ch == "'":
+            in_string = not in_string
+        elif not in_string:
+            if ch in '(<{':
+                depth += 1
+            elif ch in ')>}':
+                depth -= 1
+    return depth > 0
+
+def minify_dfm(text):
+    """(minified text, line map) for a text DFM/FMX"""
+    source = _NEWLINES.split(text)
+    lines, line_map = [], []
+    i = 0
+    while i < len(source):
+        raw = source[i]
+        number = i + 1
+        i += 1
+        match = _DFM_PROPERTY.match(raw)
+        if not match:
+            _finish(lines, line_map, raw.rstrip(), number, False)
+            continue
+        indent, name, value = match.groups()
+        # Gather the continuation lines of a multi-line value
+        block = [value]
+        if value.startswith('{') and '}' not in value:
+            while i < len(source) and _DFM_HEX.match(source[i]):
+                block.append(source[i].strip())
+                i += 1
+                if block[-1].endswith('}'):
+                    break
+        elif _value_continues(value):
+            depth_text = value
+            while i < len(source) and _value_continues(depth_text):
+                block.append(source[i].strip())
+                depth_text += ' ' + source[i].strip()
+                i += 1
+        short = name.rsplit('.', 1)[-1]
+        if name in DFM_DESIGNER_PROPERTIES or short in DFM_DESIGNER_PROPERTIES:
+            continue
+        if DFM_DEFAULT_VALUES.get(name) == value and len(block) == 1:
+            continue
+        if value.startswith('{'):
+            hex_digits = sum(len(re.sub(r'[^0-9A-Fa-f]', '', part)) for part in block)
+            _finish(lines, line_map, f"{indent}{name} = {{{hex_digits // 2:,} bytes of binary data}}",
+                    number, False)
+            continue
+        _finish(lines, line_map, raw.rstrip(), number, False)
+        for offset, _ in enumerate(block[1:], 1):
+            _finish(lines, line_map, source[number - 1 + offset].rstrip(), number + offset, False)
+    return detect_line_break(text).join(lines), line_map
+
+def is_binary_dfm(text):
+    return text.startswith('TPF0') or '\0' in text[:64]
+
+def minify(text, extension, keep_docs=True):
+    """(text, line_map, kind) for a source file's contents; kind is how it was handled"""
+    extension = extension.lower()
+    if extension in PASCAL_EXTENSIONS:
+        minified, line_map = minify_pascal(text, keep_docs)
+        return minified, line_map, 'pascal'
+    if extension in DFM_EXTENSIONS and not is_binary_dfm(text):
+        minified, line_map = minify_dfm(text)
+        return minified, line_map, 'dfm'
+    return text, list(range(1, len(_NEWLINES.split(text)) + 1)), 'unchanged'
+
+def compress_line_map(line_map):
+    """[[first output line, original line, count], ...] runs of consecutive lines"""
+    runs = []
+    for out_line, original in enumerate(line_map, 1):
+        if runs and original == runs[-1][1] + runs[-1][2] and out_line == runs[-1][0] + runs[-1][2]:
+            runs[-1][2] += 1
+        else:
+            runs.append([out_line, original, 1])
+    return runs
+
+def original_line(runs, out_line):
+    """Original line for a 1-based line of minified output (None if out of range)"""
+    for first, original, count in reversed(runs):
+        if first <= out_line < first + count:
+            return original + out_line - first
+    return None
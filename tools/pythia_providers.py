@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Provider definitions shared by the Pythia API tools
+Endpoints, headers and probe payloads for OpenAI, Anthropic, GitHub Models
+and GitHub Copilot
+"""
+
+import os
+
+# Same system prompt the Delphi client sends (Pythia.AI.Client.pas)
+PYTHIA_SYSTEM_PROMPT = ('You are Pythia, an expert Delphi programming assistant. '
+                        'Help users with Delphi code, explain concepts, debug issues, '
+                        'and provide best practices.')
+
+PROBE_MESSAGE = "Say 'Connection successful' if you receive this."
+
+ANTHROPIC_VERSION = '2023-06-01'
+# Anthropic prompt-caching breakpoint (5 minute lifetime)
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Copilot token exchange (GITHUB_COPILOT_TOKEN_URL in Pythia.GitHub.Auth.pas)
+GITHUB_API_URL = 'https://api.github.com'
+COPILOT_TOKEN_PATH = '/copilot_internal/v2/token'
+# Editor headers TPythiaAIClient.CallGitHubCopilot sends with every Copilot request
+COPILOT_HEADERS = {
+    "Editor-Version": "vscode/1.85.0",
+    "Editor-Plugin-Version": "copilot-chat/0.11.0",
+    "User-Agent": "GithubCopilot/1.0 (Delphi/12.0)"
+}
+
+# Redirects every provider to one host, e.g. the local mock_provider_server.py
+BASE_URL_ENV = 'PYTHIA_API_BASE_URL'
+_base_url_override = None
+
+PROVIDERS = {
+    'openai': {
+        'name': 'OpenAI',
+        'base_url': 'https://api.openai.com',
+        'chat_path': '/v1/chat/completions',
+        'models_path': '/v1/models',
+        'format': 'openai',
+        'default_model': 'gpt-3.5-turbo',
+        'pythia_max_tokens': 2000,
+    },
+    'anthropic': {
+        'name': 'Anthropic',
+        'base_url': 'https://api.anthropic.com',
+        'chat_path': '/v1/messages',
+        'models_path': '/v1/models',
+        'format': 'anthropic',
+        'default_model': 'claude-3-5-sonnet-20241022',
+        'pythia_max_tokens': 4096,
+    },
+    'github': {
+        'name': 'GitHub Models',
+        'base_url': 'https://models.inference.ai.azure.com',
+        'chat_path': '/chat/completions',
+        'models_path': '/models',
+        'format': 'openai',
+        'default_model': 'claude-3-5-sonnet',
+        'pythia_max_tokens': 4096,
+    },
+    'copilot': {
+        'name': 'GitHub Copilot',
+        'base_url': 'https://api.githubcopilot.com',
+        'chat_path': '/chat/completions',
+        'models_path': '/models',
+        'format': 'openai',
+        'default_model': 'gpt-4',
+        'pythia_max_tokens': 4096,
+    },
+}
+# Providers authenticated with a key from pythia_config.read_config(); Copilot
+# needs a token exchange first (pythia_copilot.py, copilot_client.py)
+KEY_PROVIDERS = tuple(pid for pid in PROVIDERS if pid != 'copilot')
+
+def set_base_url_override(base_url):
+    """Send all provider requests to base_url instead of the live endpoints"""
+    global _base_url_override
+    _base_url_override = base_url.rstrip('/') if base_url else None
+
+def get_base_url(provider_id):
+    """Provider base URL, honoring --base-url and PYTHIA_API_BASE_URL"""
+    override = _base_url_override or os.environ.get(BASE_URL_ENV)
+    if override:
+        return override.rstrip('/')
+    return PROVIDERS[provider_id]['base_url']
+
+def is_base_url_overridden():
+    """True when requests are redirected away from the live endpoints"""
+    return bool(_base_url_override or os.environ.get(BASE_URL_ENV))
+
+def provider_for_url(url):
+    """Provider id whose chat or model-listing endpoint url is, or None"""
+    for provider_id in PROVIDERS:
+        if url in (chat_url(provider_id), models_url(provider_id)):
+            return provider_id
+    return None
+
+def chat_url(provider_id):
+    """Full chat endpoint URL for a provider"""
+    return get_base_url(provider_id) + PROVIDERS[provider_id]['chat_path']
+
+def models_url(provider_id):
+    """Model listing endpoint: cheap, authenticated and non-generating"""
+    return get_base_url(provider_id) + PROVIDERS[provider_id]['models_path']
+
+def copilot_token_url():
+    """Endpoint that exchanges a GitHub OAuth token for a Copilot token"""
+    override = _base_url_override or os.environ.get(BASE_URL_ENV)
+    return (override.rstrip('/') if override else GITHUB_API_URL) + COPILOT_TOKEN_PATH
+
+def build_headers(provider_id, api_key):
+    """Authentication and content headers for a provider
+
+    For 'copilot' api_key is the short-lived Copilot token from
+    pythia_copilot.py, not the GitHub OAuth token.
+    """
+    if PROVIDERS[provider_id]['format'] == 'anthropic':
+        return {
+            "Content-Type": "application/json",
+            "x-api-key": api_key,
+            "anthropic-version": ANTHROPIC_VERSION
+        }
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+    if provider_id == 'copilot':
+        headers.update(COPILOT_HEADERS)
+    return headers
+
+def build_probe_payload(provider_id, model=None, max_tokens=50):
+    """Minimal chat payload used to check that a provider answers"""
+    return {
+        "model": model or PROVIDERS[provider_id]['default_model'],
+        "max_tokens": max_tokens,
+        "messages": [
+            {"role": "user", "content": PROBE_MESSAGE}
+        ]
+    }
+
+def extract_reply(provider_id, data):
+    """Pull the assistant text out of a parsed chat response"""
+    if PROVIDERS[provider_id]['format'] == 'anthropic':
+        return data['content'][0]['text']
+    return data['choices'][0]['message']['content']
+
+def build_pythia_payload(provider_id, user_message, model=None, max_tokens=None):
+    """Chat payload shaped like the ones Pythia.AI.Client.pas builds
+    
+    OpenAI-format providers get the system prompt as the first message and
+    temperature 0.7; Anthropic gets it in the top-level 'system' field.
+    """
+    provider = PROVIDERS[provider_id]
+    payload = {
+        "model": model or provider['default_model'],
+        "max_tokens": max_tokens or provider['pythia_max_tokens']
+    }
+    if provider['format'] == 'anthropic':
+        payload["system"] = PYTHIA_SYSTEM_PROMPT
+        payload["messages"] = [{"role": "user", "content": user_message}]
+    else:
+        payload["temperature"] = 0.7
+        payload["messages"] = [
+            {"role": "system", "content": PYTHIA_SYSTEM_PROMPT},
+            {"role": "user", "content": user_message}
+        ]
+    return payload
+
+def extract_usage(provider_id, data):
+    """(prompt_tokens, completion_tokens) from a parsed chat response, None if absent"""
+    usage = data.get('usage') or {}
+    if PROVIDERS[provider_id]['format'] == 'anthropic':
+        return usage.get('input_tokens'), usage.get('output_tokens')
+    return usage.get('prompt_tokens'), usage.get('completion_tokens')
+
+# --- Request builders mirroring TPythiaAIClient (Pythia.AI.Client.pas) ---
+
+# TModelCatalog display names (Pythia.ModelCatalog.pas): 'OpenAI: gpt-4o'
+CATALOG_LABELS = {'OpenAI': 'openai', 'Anthropic': 'anthropic', 'Copilot': 'copilot'}
+
+def parse_catalog_model(display_model):
+    """(provider, model id) for a model-catalog combo item, else (None, None)"""
+    for label, provider_id in CATALOG_LABELS.items():
+        if display_model.startswith(label + ': ') and display_model[len(label) + 2:].strip():
+            return provider_id, display_model[len(label) + 2:].strip()
+    return None, None
+
+def route_model(display_model):
+    """Provider route TPythiaAIClient.SendMessage picks for a combo-box model name"""
+    upper = display_model.upper()
+    catalog_provider, _ = parse_catalog_model(display_model)
+    if 'COPILOT' in upper:
+        return 'copilot'
+    if 'GPT' in upper or catalog_provider == 'openai':
+        return 'openai'
+    if 'CLAUDE' in upper or catalog_provider == 'anthropic':
+        return 'anthropic'
+    return None
+
+def with_context(messages, context):
+    """Messages as SendMessageWithContext passes them: context first, as a system message"""
+    if not context:
+        return list(messages)
+    return [{"role": "system", "content": context}] + list(messages)
+
+def _pythia_messages(messages):
+    return ([{"role": "system", "content": PYTHIA_SYSTEM_PROMPT}] +
+            [{"role": m['role'], "content": m['content']} for m in messages])
+
+def build_openai_request(messages, model):
+    """Same body as BuildOpenAIRequest (note: its model match is case-sensitive)"""
+    catalog_id = parse_catalog_model(model)[1]
+    if catalog_id:
+        model_name = catalog_id
+    elif 'GPT-4' in model:
+        model_name = 'gpt-4'
+    elif 'GPT-3.5' in model:
+        model_name = 'gpt-3.5-turbo'
+    else:
+        model_name = 'gpt-4'
+    return {
+        "model": model_name,
+        "temperature": 0.7,
+        "max_tokens": 2000,
+        "messages": _pythia_messages(messages)
+    }
+
+def build_anthropic_request(messages, model):
+    """Same body as BuildAnthropicRequest (system prompt in the top-level field)"""
+    upper = model.upper()
+    catalog_id = parse_catalog_model(model)[1]
+    if catalog_id:
+        model_name = catalog_id
+    elif '3.5 SONNET' in upper:
+        model_name = 'claude-3-5-sonnet-20241022'
+    elif 'OPUS' in upper:
+        model_name = 'claude-3-opus-20240229'
+    else:
+        model_name = 'claude-3-5-sonnet-20241022'
+    return {
+        "model": model_name,
+        "max_tokens": 4096,
+        "system": PYTHIA_SYSTEM_PROMPT,
+        "messages": [{"role": m['role'], "content": m['content']} for m in messages]
+    }
+
+def build_anthropic_cached_request(messages, model, context=None, cache_history=True):
+    """build_anthropic_request with prompt-caching breakpoints
+
+    The system prompt and the workspace context become separate system
+    blocks, each marked cache_control, so the context prefix is written once
+    and read on later turns. With cache_history the latest message is marked
+    too, so the next turn also reads the conversation so far.
+    """
+    request = build_anthropic_request([m for m in messages if m['role'] != 'system'], model)
+    system = [{"type": "text", "text": PYTHIA_SYSTEM_PROMPT, "cache_control": dict(CACHE_CONTROL)}]
+    if context:
+        system.append({"type": "text", "text": context, "cache_control": dict(CACHE_CONTROL)})
+    request["system"] = system
+    if cache_history and request["messages"]:
+        last = request["messages"][-1]
+        last["content"] = [{"type": "text", "text": last["content"], "cache_control": dict(CACHE_CONTROL)}]
+    return request
+
+def extract_cache_usage(data):
+    """(cache_creation_tokens, cache_read_tokens) from an Anthropic usage block"""
+    usage = data.get('usage') or {}
+    return usage.get('cache_creation_input_tokens') or 0, usage.get('cache_read_input_tokens') or 0
+
+def build_github_copilot_request(messages, model):
+    """Same body as BuildGitHubCopilotRequest"""
+    upper = model.upper()
+    catalog_id = parse_catalog_model(model)[1]
+    if catalog_id:
+        model_name = catalog_id
+    elif 'GPT-4' in upper:
+        model_name = 'gpt-4'
+    elif 'GPT-3.5' in upper:
+        model_name = 'gpt-3.5-turbo'
+    else:
+        model_name = 'gpt-4'
+    return {
+        "model": model_name,
+        "temperature": 0.7,
+        "max_tokens": 4096,
+        "messages": _pythia_messages(messages)
+    }
+
+PYTHIA_BUILDERS = {
+    'openai': build_openai_request,
+    'anthropic': build_anthropic_request,
+    'copilot': build_github_copilot_request,
+}
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Content-addressed response cache for the Pythia tools (opt-in)
+When a tool enables it (batch --cache, replay --cache), every non-streamed
+JSON POST sent through pythia_http is keyed by a SHA-256 of the endpoint and
+the canonical request body (sorted keys, no whitespace), i.e. exactly the
+model, messages, temperature and max_tokens the Pythia builders produce.
+A 200 answer is stored zlib-compressed in responses.sqlite3 next to the
+other caches; the same request later is answered from disk without touching
+the network or the usage ledger.
+
+Entries expire after a TTL, and the file is held under a size limit by
+evicting the least recently used entries. Mode 'bypass' skips lookups but
+still stores fresh answers, to refresh a cached regression set.
+PYTHIA_RESPONSE_CACHE=<path> keeps the cache elsewhere.
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from pythia_cache import get_cache_dir
+from pythia_providers import extract_usage, provider_for_url
+
+RESPONSES_ENV = 'PYTHIA_RESPONSE_CACHE'
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_MB = 256
+MODES = ('on', 'bypass', 'off')
+# Response headers kept with an entry; the rest describe the original exchange
+KEPT_HEADERS = ('Content-Type', 'x-request-id', 'request-id')
+CACHE_HEADER = 'X-Pythia-Cache'
+COUNTERS = ('hits', 'misses', 'bypassed', 'stored', 'expired', 'evicted',
+            'saved_prompt_tokens', 'saved_completion_tokens')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    size INTEGER NOT NULL,
+    body BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+_mode = 'off'
+_ttl = DEFAULT_TTL
+_max_bytes = DEFAULT_MAX_MB * 1024 * 1024
+_conn = None
+_conn_path = None
+_lock = threading.Lock()
+# Counters of this process only; the file keeps lifetime totals
+_session_stats = dict.fromkeys(COUNTERS, 0)
+
+def get_cache_path():
+    return os.environ.get(RESPONSES_ENV) or os.path.join(get_cache_dir(), 'responses.sqlite3')
+
+def open_cache(path=None):
+    """SQLite connection with the cache schema (WAL, safe to share across threads)"""
+    conn = sqlite3.connect(path or get_cache_path(), timeout=10, check_same_thread=False,
+                           isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def _connection():
+    global _conn, _conn_path
+    path = get_cache_path()
+    if _conn is None or _conn_path != path:
+        _conn = open_cache(path)
+        _conn_path = path
+    return _conn
+
+def configure(mode='on', ttl=DEFAULT_TTL, max_mb=DEFAULT_MAX_MB):
+    """Turn the cache on ('on'), store-only ('bypass') or off for this process"""
+    global _mode, _ttl, _max_bytes
+    if mode not in MODES:
+        raise ValueError(f"response cache mode must be one of {', '.join(MODES)}")
+    _mode = mode
+    _ttl = ttl
+    _max_bytes = int(max_mb * 1024 * 1024)
+
+def is_active():
+    return _mode != 'off'
+
+def request_key(url, payload):
+    """SHA-256 of the endpoint and the canonical JSON body"""
+    parts = urlsplit(url)
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    digest = hashlib.sha256(f"{parts.netloc}{parts.path}\n".encode('utf-8'))
+    digest.update(canonical.encode('utf-8'))
+    return digest.hexdigest()
+
+def _count(conn, counts):
+    for name, value in counts.items():
+        _session_stats[name] += value
+        if value:
+            conn.execute('INSERT INTO counters VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET '
+                         'value = value + excluded.value', (name, value))
+
+def _build_response(url, key, status, headers, body):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = 'OK'
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers = CaseInsensitiveDict(json.loads(headers))
+    response.headers[CACHE_HEADER] = 'hit'
+    response._content = zlib.decompress(body)
+    response.cache_key = key
+    return response
+
+def lookup(url, payload):
+    """Cached requests.Response for this request, or None (counted as a miss)"""
+    if _mode == 'off':
+        return None
+    try:
+        with _lock:
+            conn = _connection()
+            if _mode == 'bypass':
+                _count(conn, {'bypassed': 1})
+                return None
+            key = request_key(url, payload)
+            now = time.time()
+            row = conn.execute('SELECT stored_at, status, headers, prompt_tokens, completion_tokens, body '
+                               'FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                _count(conn, {'misses': 1})
+                return None
+            stored_at, status, headers, prompt_tokens, completion_tokens, body = row
+            if now - stored_at > _ttl:
+                conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                _count(conn, {'misses': 1, 'expired': 1})
+                return None
+            conn.execute('UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?', (now, key))
+            _count(conn, {'hits': 1, 'saved_prompt_tokens': prompt_tokens or 0,
+                          'saved_completion_tokens': completion_tokens or 0})
+        return _build_response(url, key, status, headers, body)
+    except (sqlite3.Error, zlib.error, ValueError) as e:
+        print(f"⚠️ Response cache lookup failed: {e}", file=sys.stderr)
+        return None
+
+def store(url, payload, response, provider=None):
+    """Keep a 200 answer, then evict least recently used entries over the size limit"""
+    if _mode == 'off' or response.status_code != 200:
+        return
+    provider = provider or provider_for_url(url) or ''
+    try:
+        data = response.json()
+        prompt_tokens, completion_tokens = extract_usage(provider, data) if provider else (None, None)
+    except (ValueError, KeyError, AttributeError):
+        return  # Not a JSON answer; nothing worth replaying
+    body = zlib.compress(response.content, 6)
+    headers = json.dumps({name: response.headers[name] for name in KEPT_HEADERS if name in response.headers})
+    now = time.time()
+    try:
+        with _lock:
+            conn = _connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # A refreshed entry keeps its hit count
+                conn.execute('INSERT INTO responses (key, provider, model, stored_at, last_used, status, '
+                             'headers, prompt_tokens, completion_tokens, size, body) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                             'stored_at = excluded.stored_at, last_used = excluded.last_used, '
+                             'status = excluded.status, headers = excluded.headers, '
+                             'prompt_tokens = excluded.prompt_tokens, '
+                             'completion_tokens = excluded.completion_tokens, '
+                             'size = excluded.size, body = excluded.body',
+                             (request_key(url, payload), provider, str(payload.get('model') or ''), now, now,
+                              response.status_code, headers, prompt_tokens, completion_tokens,
+                              len(body), body))
+                evicted = _evict(conn, _max_bytes)
+                _count(conn, {'stored': 1, 'evicted': evicted})
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+    except sqlite3.Error as e:
+        print(f"⚠️ Response cache not updated: {e}", file=sys.stderr)
+
+def _evict(conn, max_bytes):
+    """Delete least recently used entries until the bodies fit in max_bytes"""
+    total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+    evicted = 0
+    while total > max_bytes:
+        rows = conn.execute('SELECT key, size FROM responses ORDER BY last_used LIMIT 64').fetchall()
+        if not rows:
+            break
+        for key, size in rows:
+            if total <= max_bytes:
+                break
+            conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+            evicted += 1
+    return evicted
+
+def prune(conn, ttl=DEFAULT_TTL, max_mb=DEFAULT_MAX_MB):
+    """Drop expired entries, then LRU-evict down to max_mb; returns (expired, evicted)"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        expired = conn.execute('DELETE FROM responses WHERE stored_at < ?', (time.time() - ttl,)).rowcount
+        evicted = _evict(conn, int(max_mb * 1024 * 1024))
+        _count(conn, {'expired': expired, 'evicted': evicted})
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return expired, evicted
+
+def clear(conn):
+    conn.execute('DELETE FROM responses')
+    conn.execute('DELETE FROM counters')
+
+def session_stats():
+    return dict(_session_stats)
+
+def lifetime_stats(conn):
+    """Counter totals plus the current number and size of entries"""
+    stats = dict.fromkeys(COUNTERS, 0)
+    stats.update(conn.execute('SELECT name, value FROM counters').fetchall())
+    stats['entries'], stats['bytes'] = conn.execute(
+        'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+    return stats
+
+def format_stats(stats):
+    """One-line summary of a stats dict, for the end of a tool run"""
+    lookups = stats['hits'] + stats['misses']
+    rate = f"{stats['hits'] / lookups:.0%}" if lookups else '-'
+    line = (f"Response cache: {stats['hits']} hits, {stats['misses']} misses ({rate} hit rate), "
+            f"{stats['stored']} stored")
+    if stats['bypassed']:
+        line += f", {stats['bypassed']} bypassed"
+    if stats['evicted']:
+        line += f", {stats['evicted']} evicted"
+    saved = stats['saved_prompt_tokens'] + stats['saved_completion_tokens']
+    if saved:
+        line += f"  |  {saved:,} tokens not re-sent"
+    return line
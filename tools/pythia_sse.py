@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Incremental server-sent events (SSE) parsing for streaming chat responses
+Reads the response body in small chunks and never buffers more than one event,
+so memory stays bounded however long the stream runs
+"""
+
+import json
+import time
+
+from pythia_providers import PROVIDERS
+
+# Largest single SSE line we accept before giving up on the stream
+MAX_LINE_BYTES = 1024 * 1024
+
+def iter_sse_events(response, chunk_size=1024, max_line_bytes=MAX_LINE_BYTES):
+    """Yield (event_name, data) pairs from a streaming requests response"""
+    buffer = bytearray()
+    event_name = None
+    data_lines = []
+
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        buffer.extend(chunk)
+        while True:
+            newline = buffer.find(b'\n')
+            if newline < 0:
+                if len(buffer) > max_line_bytes:
+                    raise ValueError(f"SSE line exceeds {max_line_bytes} bytes")
+                break
+            line = bytes(buffer[:newline]).rstrip(b'\r').decode('utf-8', errors='replace')
+            del buffer[:newline + 1]
+
+            if not line:
+                # Blank line terminates the event
+                if data_lines:
+                    yield event_name, '\n'.join(data_lines)
+                event_name = None
+                data_lines = []
+            elif line.startswith(':'):
+                continue
+            else:
+                field, _, value = line.partition(':')
+                value = value[1:] if value.startswith(' ') else value
+                if field == 'event':
+                    event_name = value
+                elif field == 'data':
+                    data_lines.append(value)
+
+    if data_lines:
+        yield event_name, '\n'.join(data_lines)
+
+def parse_stream_event(provider_id, event_name, data):
+    """(text_delta, prompt_tokens, completion_tokens, done) for one SSE event"""
+    if data == '[DONE]':
+        return '', None, None, True
+    body = json.loads(data)
+
+    if PROVIDERS[provider_id]['format'] == 'anthropic':
+        kind = body.get('type', event_name)
+        if kind == 'content_block_delta':
+            return body.get('delta', {}).get('text', ''), None, None, False
+        if kind == 'message_start':
+            usage = body.get('message', {}).get('usage', {})
+            return '', usage.get('input_tokens'), None, False
+        if kind == 'message_delta':
+            return '', None, body.get('usage', {}).get('output_tokens'), False
+        if kind == 'error':
+            raise ValueError(body.get('error', {}).get('message', data))
+        return '', None, None, kind == 'message_stop'
+
+    text = ''
+    for choice in body.get('choices') or []:
+        text += (choice.get('delta') or {}).get('content') or ''
+    usage = body.get('usage') or {}
+    return text, usage.get('prompt_tokens'), usage.get('completion_tokens'), False
+
+def parse_cache_usage(event_name, data):
+    """(cache_creation_tokens, cache_read_tokens) from an Anthropic message_start, else None"""
+    if event_name != 'message_start':
+        return None
+    usage = json.loads(data).get('message', {}).get('usage', {})
+    return usage.get('cache_creation_input_tokens') or 0, usage.get('cache_read_input_tokens') or 0
+
+def consume_stream(provider_id, response, started, on_text=None):
+    """Read a streaming chat response and time it
+
+    Returns a dict with time-to-first-token, inter-token gaps, total time and
+    token counts. Text deltas are passed to on_text as they arrive rather
+    than accumulated.
+    """
+    stats = {
+        'ttft': None,
+        'gaps': [],
+        'total': None,
+        'chunks': 0,
+        'chars': 0,
+        'prompt_tokens': None,
+        'completion_tokens': None,
+        'cache_creation_tokens': None,
+        'cache_read_tokens': None
+    }
+    last_token = None
+
+    for event_name, data in iter_sse_events(response):
+        text, prompt_tokens, completion_tokens, done = parse_stream_event(provider_id, event_name, data)
+        now = time.perf_counter()
+        if prompt_tokens is not None:
+            stats['prompt_tokens'] = prompt_tokens
+        if completion_tokens is not None:
+            stats['completion_tokens'] = completion_tokens
+        cache_usage = parse_cache_usage(event_name, data)
+        if cache_usage:
+            stats['cache_creation_tokens'], stats['cache_read_tokens'] = cache_usage
+        if text:
+            if last_token is None:
+                stats['ttft'] = now - started
+            else:
+                stats['gaps'].append(now - last_token)
+            last_token = now
+            stats['chunks'] += 1
+            stats['chars'] += len(text)
+            if on_text:
+                on_text(text)
+        if done:
+            break
+
+    stats['total'] = time.perf_counter() - started
+    if stats['completion_tokens'] is None:
+        # Provider did not report usage; each content delta is roughly one token
+        stats['completion_tokens'] = stats['chunks']
+    ledger_id = getattr(response, 'ledger_id', None)
+    if ledger_id is not None:
+        # pythia_http recorded the request before the body, and its usage, arrived
+        import pythia_ledger
+        pythia_ledger.add_usage(ledger_id, stats['prompt_tokens'], stats['completion_tokens'],
+                                stats['cache_creation_tokens'], stats['cache_read_tokens'])
+    return stats
+
+def print_stream_stats(stats):
+    """Console summary of a consumed stream"""
+    gaps = sorted(stats['gaps'])
+    print("\n\nStreaming stats:")
+    if stats['ttft'] is not None:
+        print(f"  Time to first token: {stats['ttft'] * 1000:.0f} ms")
+    print(f"  Total time:          {stats['total'] * 1000:.0f} ms")
+    print(f"  Output tokens:       {stats['completion_tokens']} ({stats['chunks']} chunks)")
+    if gaps:
+        mean = sum(gaps) / len(gaps)
+        p95 = gaps[min(len(gaps) - 1, int(len(gaps) * 0.95))]
+        print(f"  Inter-token gap:     mean {mean * 1000:.1f} ms, "
+              f"p95 {p95 * 1000:.1f} ms, max {gaps[-1] * 1000:.1f} ms")
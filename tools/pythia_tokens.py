@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Token counting for the Pythia tools
+Uses tiktoken's BPE encodings when the package (and its encoding files) are
+available. Otherwise falls back to an approximation that splits text with
+the cl100k pre-tokenizer pattern and charges long words and symbol runs by
+length, which tracks BPE on Pascal much better than Length div 3.
+"""
+
+import re
+import math
+
+# Encoding per model family; Anthropic publishes no tokenizer, so Claude
+# models are counted with cl100k as the nearest public BPE
+MODEL_ENCODINGS = (
+    ('gpt-4o', 'o200k_base'),
+    ('gpt-4.1', 'o200k_base'),
+    ('o1', 'o200k_base'),
+    ('o3', 'o200k_base'),
+    ('gpt-4', 'cl100k_base'),
+    ('gpt-3.5', 'cl100k_base'),
+    ('claude', 'cl100k_base'),
+)
+DEFAULT_ENCODING = 'cl100k_base'
+APPROX_ENCODING = 'approx'
+
+# cl100k's pre-tokenizer, restated for the standard re module
+_PRETOKEN = re.compile(
+    r"'(?:[sdmt]|ll|ve|re)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+",
+    re.IGNORECASE)
+
+def encoding_for_model(model):
+    """tiktoken encoding name for a model id or Pythia display name"""
+    lowered = (model or '').lower().replace(' ', '-')
+    for prefix, encoding in MODEL_ENCODINGS:
+        if prefix in lowered:
+            return encoding
+    return DEFAULT_ENCODING
+
+def _approx_piece(piece):
+    stripped = piece.strip()
+    if not stripped:
+        return 1
+    if stripped[0].isalpha():
+        # Common words are single tokens; long identifiers split every ~5 chars
+        return 1 if len(stripped) <= 7 else math.ceil(len(stripped) / 5)
+    if stripped[0].isdigit():
+        return 1
+    return math.ceil(len(stripped) / 3)
+
+def approx_count(text):
+    """BPE-like token count without a vocabulary"""
+    return sum(_approx_piece(piece) for piece in _PRETOKEN.findall(text))
+
+def get_counter(encoding_name=DEFAULT_ENCODING):
+    """(encoding_name_used, count_function); falls back to the approximation"""
+    if encoding_name != APPROX_ENCODING:
+        try:
+            import tiktoken
+            encoding = tiktoken.get_encoding(encoding_name)
+        except Exception:
+            # Not installed, or the encoding file cannot be downloaded/cached
+            pass
+        else:
+            return encoding_name, lambda text: len(encoding.encode_ordinary(text))
+    return APPROX_ENCODING, approx_count
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+pythia-tools: single entry point for the Pythia developer tools
+
+    python tools/pythia_tools.py <command> [options]
+    python tools/pythia_tools.py --timing accounts --fast
+    python tools/pythia_tools.py --trace trace.jsonl probe --concurrent
+    python tools/pythia_tools.py --profile index build Project.dproj
+
+Only the module behind the chosen command is imported, so cheap commands do
+not pay for requests/ssl start-up they never use. --timing reports
+interpreter start-up, command import and run time on stderr. --trace writes
+per-phase spans (import, config read, DNS/connect/TLS, send, first byte, body
+read, JSON decode) as JSONL or OTLP/JSON, see pythia_trace.py. --profile
+runs the command under cProfile and prints the top hot spots on stderr.
+"""
+
+import time
+
+_ENTRY = time.perf_counter()
+_STARTUP_CPU = time.process_time()
+
+import sys
+import importlib
+import contextlib
+
+# Global options that take a value, with their defaults
+VALUE_OPTIONS = {
+    '--trace': None,
+    '--trace-format': 'jsonl',
+    '--trace-endpoint': None,
+    '--profile-out': None,
+    '--profile-top': '25',
+}
+
+# command -> (module, description); modules are imported only when dispatched
+COMMANDS = {
+    'probe': ('test_api_connection', "Test provider connections (--concurrent, --stream)"),
+    'accounts': ('check_api_accounts', "Account status (--fast for the cached check)"),
+    'github-models': ('test_github_models', "Test the GitHub Models API"),
+    'models': ('model_catalog', "Discover and cache each provider's models (conditional refresh)"),
+    'verify': ('verify_legitimate_sites', "Verify endpoints, certificates and connection phases"),
+    'benchmark': ('benchmark_providers', "Latency benchmark with percentiles and TTFB"),
+    'load': ('load_test', "Rate-limit-aware sustained load generator"),
+    'hedge': ('hedged_requests', "Hedged requests across providers: p99 gain vs extra cost"),
+    'batch': ('batch_runner', "Resumable batch prompt runner with bounded concurrency"),
+    'responses': ('response_cache', "Response cache hit/miss stats, spend saved, prune and clear"),
+    'replay': ('conversation_replay', "Replay chat sessions under history-compaction strategies"),
+    'context': ('context_profiler', "Prompt context size and truncation per unit of a .dproj"),
+    'tokens': ('token_counter', "Batch BPE token counts vs the Length div 3 estimate"),
+    'minify': ('context_minifier', "Pascal/DFM context minifier: token savings, line maps, throughput"),
+    'index': ('source_index', "Build or query the persistent project source index and unit dependency graph"),
+    'search': ('code_search', "Top code chunks for a question under a token budget (BM25)"),
+    'copilot': ('copilot_client', "Copilot chat with cached tokens: token exchange share of latency"),
+    'cache-bench': ('prompt_cache_benchmark', "Anthropic prompt caching: cached vs uncached turns"),
+    'history': ('benchmark_history', "Benchmark run history; 'compare' exits 1 on a latency regression"),
+    'cost': ('cost_report', "Usage and cost report from the local request ledger"),
+    'mock-server': ('mock_provider_server', "Local mock provider server for offline testing"),
+}
+
+def print_usage():
+    print("usage: pythia-tools [--timing] [--trace FILE [--trace-format jsonl|otlp]] [--trace-endpoint URL]\n"
+          "                    [--profile [--profile-top N] [--profile-out FILE]] <command> [options]\n")
+    print("Commands:")
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<16} {description}")
+    print("\nRun 'pythia-tools <command> --help' for command options.")
+
+@contextlib.contextmanager
+def _untraced(name, root=False, **attrs):
+    yield attrs
+
+def print_profile(profiler, top, out_path):
+    """Top functions by own time and by cumulative time, on stderr"""
+    import pstats
+    if out_path:
+        profiler.dump_stats(out_path)
+    sys.stdout.flush()
+    for sort_key, title in (('tottime', 'own time'), ('cumulative', 'cumulative time')):
+        print(f"\n[profile] top {top} by {title}", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats(sort_key).print_stats(top)
+    if out_path:
+        print(f"[profile] full statistics written to {out_path}", file=sys.stderr)
+
+def finish_trace(options, command):
+    import pythia_trace
+    totals = pythia_trace.phase_totals(pythia_trace.spans())
+    summary = '  '.join(f"{name} {count}x {total:.1f} ms" for name, (count, total) in sorted(totals.items()))
+    if options['--trace']:
+        count = pythia_trace.write_trace(options['--trace'], options['--trace-format'])
+        print(f"[trace] {command}: {count} spans written to {options['--trace']}", file=sys.stderr)
+    if options['--trace-endpoint']:
+        try:
+            pythia_trace.export_otlp(options['--trace-endpoint'])
+            print(f"[trace] spans exported to {options['--trace-endpoint']}", file=sys.stderr)
+        except OSError as e:
+            print(f"[trace] export to {options['--trace-endpoint']} failed: {e}", file=sys.stderr)
+    print(f"[trace] {summary}", file=sys.stderr)
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    timing = profile = False
+    options = dict(VALUE_OPTIONS)
+    while argv and argv[0].startswith('-'):
+        flag = argv.pop(0)
+        if flag == '--timing':
+            timing = True
+        elif flag == '--profile':
+            profile = True
+        elif flag in VALUE_OPTIONS:
+            if not argv:
+                print(f"ERROR: {flag} needs a value\n")
+                print_usage()
+                return 2
+            options[flag] = argv.pop(0)
+        elif flag in ('-h', '--help'):
+            print_usage()
+            return 0
+        else:
+            print(f"ERROR: Unknown option '{flag}'\n")
+            print_usage()
+            return 2
+
+    if not argv or argv[0] not in COMMANDS:
+        if argv:
+            print(f"ERROR: Unknown command '{argv[0]}'\n")
+        print_usage()
+        return 2
+
+    if options['--trace-format'] not in ('jsonl', 'otlp'):
+        print(f"ERROR: Unknown trace format '{options['--trace-format']}' (expected jsonl or otlp)")
+        return 2
+    if options['--profile-top'].isdigit():
+        options['--profile-top'] = int(options['--profile-top'])
+    else:
+        print(f"ERROR: --profile-top expects a number, got '{options['--profile-top']}'")
+        return 2
+
+    tracing = bool(options['--trace'] or options['--trace-endpoint'])
+    span = _untraced
+    if tracing:
+        import pythia_trace
+        pythia_trace.start_trace()
+        pythia_trace.install()
+        span = pythia_trace.span
+    profiler = None
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    command = argv.pop(0)
+    module_name = COMMANDS[command][0]
+    exit_code = 0
+    import_started = run_started = time.perf_counter()
+    try:
+        with span('command', root=True, command=command, argv=' '.join(argv)) as attrs:
+            if profiler:
+                profiler.enable()
+            try:
+                with span('import', module=module_name):
+                    module = importlib.import_module(module_name)
+                run_started = time.perf_counter()
+
+                # Each tool parses sys.argv itself; present it as "pythia-tools <command>"
+                sys.argv = [f"pythia-tools {command}"] + argv
+                with span('run'):
+                    module.main()
+            except SystemExit as e:
+                exit_code = e.code
+            finally:
+                if profiler:
+                    profiler.disable()
+                attrs['exit_code'] = exit_code if isinstance(exit_code, int) else 1
+    finally:
+        if profiler:
+            print_profile(profiler, options['--profile-top'], options['--profile-out'])
+        if tracing:
+            finish_trace(options, command)
+        if timing:
+            finished = time.perf_counter()
+            sys.stdout.flush()
+            print(f"\n[timing] interpreter start-up (CPU): {_STARTUP_CPU * 1000:.1f} ms\n"
+                  f"[timing] entry to dispatch:         {(import_started - _ENTRY) * 1000:.1f} ms\n"
+                  f"[timing] import {module_name}: {(run_started - import_started) * 1000:.1f} ms\n"
+                  f"[timing] command run:               {(finished - run_started) * 1000:.1f} ms",
+                  file=sys.stderr)
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Per-phase tracing for the Pythia tools (pythia_tools.py --trace)
+Records spans for the command import and run, pythia.ini reads, and for every
+HTTP request made through requests: DNS, TCP connect, TLS handshake, request
+send, first byte (waiting for the response headers), body read and JSON
+decode. install() patches requests/urllib3 in place, so the tools need no
+changes; spans started on worker threads hang off the command span.
+
+Spans are written as JSON lines, or as OTLP/JSON (the OpenTelemetry
+ExportTraceServiceRequest shape) for a file or a local collector:
+
+    {"trace_id": ..., "span_id": ..., "parent_id": ..., "name": "tls",
+     "start": 1760000000.123456, "duration_ms": 41.7, "thread": "MainThread",
+     "attrs": {"host": "api.openai.com"}, "status": "ok"}
+"""
+
+import os
+import json
+import time
+import socket
+import threading
+import contextlib
+import urllib.request
+from urllib.parse import urlsplit
+
+SERVICE_NAME = 'pythia-tools'
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+CLIENT_SPANS = frozenset({'http', 'dns', 'connect', 'tls', 'send', 'first_byte', 'body_read'})
+
+_spans = []
+_lock = threading.Lock()
+_local = threading.local()
+_trace_id = None
+_root_id = None
+_installed = False
+
+def _new_id(nbytes):
+    return os.urandom(nbytes).hex()
+
+def start_trace():
+    """Begin a new trace; spans recorded before this are discarded"""
+    global _trace_id, _root_id
+    with _lock:
+        _spans.clear()
+    _trace_id = _new_id(16)
+    _root_id = None
+
+def _current_parent():
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else _root_id
+
+def record_span(name, start_ns, duration, parent_id=None, attrs=None, error=None, span_id=None):
+    """Store a finished span (start in epoch ns, duration in seconds)"""
+    if _trace_id is None:
+        return
+    with _lock:
+        _spans.append({
+            'trace_id': _trace_id,
+            'span_id': span_id or _new_id(8),
+            'parent_id': parent_id,
+            'name': name,
+            'start': start_ns / 1e9,
+            'duration_ms': round(duration * 1000, 3),
+            'thread': threading.current_thread().name,
+            'attrs': attrs or {},
+            'status': 'error' if error else 'ok',
+            **({'error': error} if error else {}),
+        })
+
+@contextlib.contextmanager
+def span(name, root=False, **attrs):
+    """Time the with-block as a span; yields its attrs dict for adding results"""
+    global _root_id
+    if _trace_id is None:
+        yield attrs
+        return
+    span_id = _new_id(8)
+    parent_id = None if root else _current_parent()
+    if root:
+        _root_id = span_id
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(span_id)
+    start_ns = time.time_ns()
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        stack.pop()
+        record_span(name, start_ns, time.perf_counter() - started, parent_id, attrs, error, span_id)
+
+def traced(name, func, attrs_of=None):
+    """Wrap func so each call is recorded as a span"""
+    def wrapper(*args, **kwargs):
+        with span(name, **(attrs_of(*args, **kwargs) if attrs_of else {})):
+            return func(*args, **kwargs)
+    wrapper.__wrapped__ = func
+    wrapper.__name__ = getattr(func, '__name__', name)
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+def _url_attrs(url):
+    parts = urlsplit(url)
+    # Query strings can carry keys; keep host and path only
+    return {'host': parts.hostname or '', 'path': parts.path}
+
+def _install_http():
+    try:
+        import requests
+        import urllib3.connection
+        import urllib3.util.connection
+    except ImportError:
+        return
+
+    socket.getaddrinfo = traced('dns', socket.getaddrinfo, lambda host, port, *a, **k: {'host': host})
+    urllib3.util.connection.create_connection = traced(
+        'connect', urllib3.util.connection.create_connection,
+        lambda address, *a, **k: {'host': address[0], 'port': address[1]})
+    wrap_tls = getattr(urllib3.connection, '_ssl_wrap_socket_and_match_hostname', None)
+    if wrap_tls is not None:
+        urllib3.connection._ssl_wrap_socket_and_match_hostname = traced(
+            'tls', wrap_tls, lambda *a, **k: {'host': k.get('server_hostname') or ''})
+    connection = urllib3.connection.HTTPConnection
+    connection_request = connection.request
+    def request(self, *args, **kwargs):
+        # http.client connects lazily inside send(); connect first so the
+        # send span covers writing the request only
+        if self.sock is None:
+            self.connect()
+        with span('send'):
+            return connection_request(self, *args, **kwargs)
+    connection.request = request
+    connection.getresponse = traced('first_byte', connection.getresponse)
+
+    session_send = requests.Session.send
+    def send(self, request, **kwargs):
+        with span('http', method=request.method, **_url_attrs(request.url)) as attrs:
+            response = session_send(self, request, **kwargs)
+            attrs['status'] = response.status_code
+            attrs['stream'] = bool(kwargs.get('stream'))
+            return response
+    requests.Session.send = send
+
+    iter_content = requests.models.Response.iter_content
+    def iter_chunks(self, *args, **kwargs):
+        # A generator outlives the caller's span stack, so it is recorded
+        # directly with the parent that was current when reading began
+        parent_id = _current_parent()
+        start_ns = time.time_ns()
+        started = time.perf_counter()
+        size = 0
+        error = None
+        try:
+            for chunk in iter_content(self, *args, **kwargs):
+                size += len(chunk)
+                yield chunk
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record_span('body_read', start_ns, time.perf_counter() - started, parent_id,
+                        {'bytes': size, **_url_attrs(self.url or '')}, error)
+    requests.models.Response.iter_content = iter_chunks
+    requests.models.Response.json = traced('json_decode', requests.models.Response.json)
+
+def install():
+    """Patch config reads and the requests/urllib3 stack to record spans
+
+    Call before the command module is imported: tools bind read_config with
+    'from pythia_config import read_config' at import time.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    import pythia_config
+    pythia_config.read_config = traced('config_read', pythia_config.read_config)
+    _install_http()
+
+def spans():
+    with _lock:
+        return list(_spans)
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def to_otlp(span_list):
+    """OTLP/JSON ExportTraceServiceRequest for a list of spans"""
+    otlp_spans = []
+    for s in span_list:
+        start_ns = int(s['start'] * 1e9)
+        item = {
+            'traceId': s['trace_id'],
+            'spanId': s['span_id'],
+            'name': s['name'],
+            'kind': KIND_CLIENT if s['name'] in CLIENT_SPANS else KIND_INTERNAL,
+            'startTimeUnixNano': str(start_ns),
+            'endTimeUnixNano': str(start_ns + int(s['duration_ms'] * 1e6)),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in s['attrs'].items()]
+                          + [{'key': 'thread.name', 'value': {'stringValue': s['thread']}}],
+            'status': {'code': 2, 'message': s['error']} if s['status'] == 'error' else {'code': 1},
+        }
+        if s['parent_id']:
+            item['parentSpanId'] = s['parent_id']
+        otlp_spans.append(item)
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+        'scopeSpans': [{'scope': {'name': 'pythia_trace'}, 'spans': otlp_spans}],
+    }]}
+
+def write_trace(path, fmt='jsonl'):
+    """Append JSONL spans to path, or write it as one OTLP/JSON document"""
+    span_list = spans()
+    if fmt == 'otlp':
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(to_otlp(span_list), f)
+    else:
+        with open(path, 'a', encoding='utf-8') as f:
+            for s in span_list:
+                f.write(json.dumps(s) + '\n')
+    return len(span_list)
+
+def export_otlp(endpoint, timeout=5):
+    """POST the spans to an OTLP/HTTP collector (e.g. http://localhost:4318/v1/traces)"""
+    body = json.dumps(to_otlp(spans())).encode('utf-8')
+    request = urllib.request.Request(endpoint, data=body, method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status
+
+def phase_totals(span_list):
+    """name -> (count, total ms) over a list of spans"""
+    totals = {}
+    for s in span_list:
+        count, total = totals.get(s['name'], (0, 0.0))
+        totals[s['name']] = (count + 1, total + s['duration_ms'])
+    return totals
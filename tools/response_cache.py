@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Response cache statistics and maintenance
+    response_cache.py stats                 hit/miss totals, size and spend saved per model
+    response_cache.py prune [--ttl-days 7] [--max-mb 256]
+    response_cache.py clear
+
+batch_runner.py and conversation_replay.py fill the cache when run with
+--cache (see pythia_responses.py).
+"""
+
+import os
+import argparse
+
+import pythia_ledger
+from pythia_responses import (DEFAULT_MAX_MB, DEFAULT_TTL, RESPONSES_ENV, clear, format_stats,
+                              get_cache_path, lifetime_stats, open_cache, prune)
+
+def stats_main(conn):
+    stats = lifetime_stats(conn)
+    print(format_stats(stats))
+    print(f"Entries: {stats['entries']:,}  |  Stored bodies: {stats['bytes'] / 1024 / 1024:.1f} MB "
+          f"(compressed)  |  Expired: {stats['expired']}  |  Evicted (LRU): {stats['evicted']}")
+
+    rows = conn.execute('SELECT provider, model, COUNT(*), SUM(hits), '
+                        'SUM(hits * COALESCE(prompt_tokens, 0)), SUM(hits * COALESCE(completion_tokens, 0)) '
+                        'FROM responses GROUP BY provider, model ORDER BY SUM(hits) DESC').fetchall()
+    if not rows:
+        return
+    pricing = pythia_ledger.load_pricing()
+    print(f"\n{'Provider':<12} {'Model':<30} {'Entries':>8} {'Hits':>7} {'Tokens saved':>13} {'$ saved':>9}")
+    print("-"*86)
+    total_cost = 0.0
+    for provider, model, entries, hits, prompt_tokens, completion_tokens in rows:
+        cost = pythia_ledger.estimate_cost(pricing, provider, model, prompt_tokens, completion_tokens)
+        total_cost += cost or 0
+        print(f"{provider:<12} {model[:30]:<30} {entries:>8,} {hits:>7,} "
+              f"{prompt_tokens + completion_tokens:>13,} {'-' if cost is None else f'{cost:.4f}':>9}")
+    print("-"*86)
+    print(f"Spend avoided by entries still cached: ${total_cost:.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Response cache statistics and maintenance")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="Hit/miss totals, size and spend saved per model")
+    trim = subparsers.add_parser('prune', help="Drop expired entries and evict down to the size limit")
+    trim.add_argument('--ttl-days', type=float, default=DEFAULT_TTL / 86400,
+                      help=f"Drop entries older than this (default: {DEFAULT_TTL // 86400})")
+    trim.add_argument('--max-mb', type=float, default=DEFAULT_MAX_MB,
+                      help=f"Evict least recently used entries above this size (default: {DEFAULT_MAX_MB})")
+    subparsers.add_parser('clear', help="Delete every entry and reset the counters")
+    args = parser.parse_args()
+
+    path = get_cache_path()
+    print("Pythia Response Cache")
+    print("="*86)
+    print(f"Cache: {path}{'' if os.path.exists(path) else ' (not created yet)'}"
+          f"{f'  ({RESPONSES_ENV})' if os.environ.get(RESPONSES_ENV) else ''}")
+    conn = open_cache(path)
+    try:
+        if args.command == 'stats':
+            stats_main(conn)
+        elif args.command == 'prune':
+            expired, evicted = prune(conn, args.ttl_days * 86400, args.max_mb)
+            print(f"Removed {expired} expired and {evicted} least recently used entries")
+        else:
+            clear(conn)
+            conn.execute('VACUUM')
+            print("Cleared")
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Build and query the persistent source index of a Delphi project
+    source_index.py build Project.dproj          # incremental
+    source_index.py build Project.dproj --full   # rescan everything
+    source_index.py query Project.dproj --unit Pythia.Context
+    source_index.py query Project.dproj --used-by System.JSON
+    source_index.py query Project.dproj --top 10
+    source_index.py deps Project.dproj Pythia.ChatForm --hops 2
+    source_index.py deps Project.dproj Pythia.Config --reverse
+
+The index is written next to the project as <Project>.pythia-index.json and
+read by the plugin through Source/Pythia.SourceIndex.pas.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from pythia_index import build_index, load_index, index_path_for, line_offsets
+from pythia_graph import DependencyGraph
+
+def build_main(args):
+    started = time.perf_counter()
+    index, stats = build_index(args.project, args.index, args.workers, args.full)
+    elapsed = time.perf_counter() - started
+    index_path = args.index or index_path_for(args.project)
+
+    print(f"Index: {index_path}")
+    print(f"Project file: {'re-parsed' if stats['project_parsed'] else 'unchanged'}  |  "
+          f"References: {len(index['includes'])}")
+    print(f"Reused: {stats['reused']}  |  Touched (same hash): {stats['touched']}  |  "
+          f"Scanned: {stats['scanned']}  |  Missing: {stats['missing']}  |  Removed: {stats['removed']}")
+    total_tokens = sum(e['tokens'] for e in index['entries'].values())
+    print(f"Files indexed: {len(index['entries'])}  |  Estimated tokens: {total_tokens:,}  |  "
+          f"Graph nodes recomputed: {stats['graph_nodes']}")
+    print(f"Time: {elapsed:.2f}s")
+
+def print_entry(include, entry, show_lines):
+    print(f"\n{entry['unit'] or os.path.basename(include)} ({entry['kind'] or 'file'})")
+    print("-"*70)
+    print(f"  File:     {include}")
+    print(f"  Size:     {entry['size']:,} bytes, {entry['chars']:,} chars, {entry['line_count']:,} lines")
+    print(f"  Tokens:   ~{entry['tokens']:,}")
+    print(f"  Hash:     {entry['hash']}")
+    if entry['interface_uses']:
+        print(f"  Interface uses:      {', '.join(entry['interface_uses'])}")
+    if entry['implementation_uses']:
+        print(f"  Implementation uses: {', '.join(entry['implementation_uses'])}")
+    if entry['include_files']:
+        print(f"  Includes:            {', '.join(entry['include_files'])}")
+    if show_lines:
+        offsets = line_offsets(entry)
+        for line in show_lines:
+            if 1 <= line <= len(offsets):
+                print(f"  Line {line} starts at char offset {offsets[line - 1]}")
+
+def require_index(args):
+    index_path = args.index or index_path_for(args.project)
+    index = load_index(index_path)
+    if index is None:
+        print(f"ERROR: No current index at {index_path}; run 'build' first")
+        sys.exit(1)
+    return index
+
+def query_main(args):
+    entries = require_index(args)['entries']
+
+    if args.unit:
+        matches = {inc: e for inc, e in entries.items() if e['unit'].lower() == args.unit.lower()}
+    elif args.used_by:
+        name = args.used_by.lower()
+        matches = {inc: e for inc, e in entries.items()
+                   if name in (u.lower() for u in e['interface_uses'] + e['implementation_uses'])}
+    else:
+        largest = sorted(entries.items(), key=lambda item: item[1]['tokens'], reverse=True)
+        matches = dict(largest[:args.top])
+
+    if args.json:
+        print(json.dumps(matches, indent=2))
+        return
+    if not matches:
+        print("No matching units")
+        sys.exit(1)
+    if args.used_by or not args.unit:
+        for include, entry in matches.items():
+            print(f"{entry['tokens']:>8,} tok  {entry['unit'] or '?':<40} {include}")
+        return
+    for include, entry in matches.items():
+        print_entry(include, entry, args.line)
+
+def deps_main(args):
+    index = require_index(args)
+    graph = DependencyGraph(index)
+    key = graph.resolve(args.unit)
+    if key is None:
+        print(f"ERROR: '{args.unit}' is not a unit or file in the index")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    rows = graph.dependencies(key, args.hops, args.reverse, args.order)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    relation = "Used by" if args.reverse else "Dependencies of"
+    print(f"{relation} {key} within {args.hops} hop(s), ranked by {args.order}")
+    print("="*70)
+    for row in rows:
+        print(f"{row['hops']:>2} hop  {row['tokens']:>8,} tok  {row['unit'] or '(include)':<32} {row['key']}")
+    total = sum(row['tokens'] for row in rows)
+    print("-"*70)
+    print(f"{len(rows)} file(s), ~{total:,} tokens  |  query {elapsed * 1e6:.0f} µs")
+    node = index['graph'][key]
+    if node['external'] and not args.reverse:
+        print(f"Outside the project: {', '.join(node['external'])}")
+    if node['missing_includes']:
+        print(f"⚠️ Include files not found: {', '.join(node['missing_includes'])}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent incremental source index for a Delphi project")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Create or incrementally update the index")
+    build.add_argument('project', help=".dproj file")
+    build.add_argument('--index', help="Index file (default: <Project>.pythia-index.json)")
+    build.add_argument('--full', action='store_true', help="Ignore the existing index and rescan everything")
+    build.add_argument('--workers', type=int, help="Parallel file readers (default: 4 per CPU, max 32)")
+
+    query = subparsers.add_parser('query', help="Look up units in an existing index")
+    query.add_argument('project', help=".dproj file")
+    query.add_argument('--index', help="Index file (default: <Project>.pythia-index.json)")
+    group = query.add_mutually_exclusive_group()
+    group.add_argument('--unit', help="Show one unit by name")
+    group.add_argument('--used-by', metavar='UNIT', help="List units whose uses clauses name UNIT")
+    query.add_argument('--top', type=int, default=20, help="Without --unit/--used-by: largest N units")
+    query.add_argument('--line', type=int, action='append', help="With --unit: print a line's offset")
+    query.add_argument('--json', action='store_true', help="Print matching entries as JSON")
+
+    deps = subparsers.add_parser('deps', help="Walk the unit dependency graph")
+    deps.add_argument('project', help=".dproj file")
+    deps.add_argument('unit', help="Unit name or Include path")
+    deps.add_argument('--index', help="Index file (default: <Project>.pythia-index.json)")
+    deps.add_argument('--hops', type=int, default=1, help="How many uses/include levels to follow (default: 1)")
+    deps.add_argument('--reverse', action='store_true', help="Units that depend on UNIT instead")
+    deps.add_argument('--order', choices=['size', 'hops'], default='size',
+                      help="Rank by estimated tokens (default) or by distance")
+    deps.add_argument('--json', action='store_true', help="Print the ranked list as JSON")
+
+    args = parser.parse_args()
+    if not os.path.isfile(args.project):
+        print(f"ERROR: Project file not found: {args.project}")
+        sys.exit(1)
+    if args.command == 'build':
+        build_main(args)
+    elif args.command == 'deps':
+        deps_main(args)
+    else:
+        query_main(args)
+
+if __name__ == '__main__':
+    main()
@@ -2,48 +2,51 @@
 """
 Test script for Pythia API connections
 Reads the same pythia.ini config file and tests OpenAI/Anthropic APIs
+Use --concurrent to probe every configured provider (incl. GitHub Models) at once
 """
 
-import os
 import sys
 import json
-import configparser
+import time
+import argparse
+import threading
 import requests
-from pathlib import Path
 
-def get_config_path():
-    """Get the same config path that Delphi code uses"""
-    appdata = os.environ.get('APPDATA')
-    if not appdata:
-        print("ERROR: APPDATA environment variable not found")
-        sys.exit(1)
-    
-    config_dir = os.path.join(appdata, 'Pythia')
-    config_file = os.path.join(config_dir, 'pythia.ini')
-    return config_file
+import pythia_http
+from pythia_config import read_config
+from pythia_providers import (KEY_PROVIDERS, PROVIDERS, BASE_URL_ENV, chat_url, build_headers,
+                              build_probe_payload, extract_reply, set_base_url_override)
+from pythia_sse import consume_stream, print_stream_stats
 
-def read_config():
-    """Read API keys from pythia.ini"""
-    config_file = get_config_path()
-    
-    if not os.path.exists(config_file):
-        print(f"ERROR: Config file not found: {config_file}")
-        sys.exit(1)
-    
-    print(f"Reading config from: {config_file}")
-    
-    config = configparser.ConfigParser()
-    config.read(config_file)
+# Default per-provider deadline for concurrent probes (seconds)
+DEFAULT_DEADLINE = 30
+
+def stream_openai_probe(endpoint, headers, payload):
+    """Send the probe with stream=True and print tokens as they arrive"""
+    payload = dict(payload, stream=True, stream_options={"include_usage": True})
+    print(f"\nSending streaming POST request...")
     
-    openai_key = config.get('API', 'OpenAIKey', fallback='')
-    anthropic_key = config.get('API', 'AnthropicKey', fallback='')
+    try:
+        started = time.perf_counter()
+        response = pythia_http.post_json(endpoint, payload, headers, provider='openai', stream=True)
+        print(f"\nHTTP Status Code: {response.status_code}")
+        if response.status_code != 200:
+            print(response.text)
+            print(f"\n✗ FAILED! Error response from API")
+            return False
+        
+        print("\nAI Response: ", end='', flush=True)
+        stats = consume_stream('openai', response, started,
+                               on_text=lambda text: print(text, end='', flush=True))
+        print_stream_stats(stats)
+        return stats['chunks'] > 0
     
-    return {
-        'openai': openai_key,
-        'anthropic': anthropic_key
-    }
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"\n✗ REQUEST FAILED!")
+        print(f"Error: {e}")
+        return False
 
-def test_openai_connection(api_key):
+def test_openai_connection(api_key, stream=False):
     """Test OpenAI API with minimal request"""
     print("\n" + "="*70)
     print("TESTING OPENAI API CONNECTION")
@@ -55,13 +58,10 @@ def test_openai_connection(api_key):
     
     print(f"API Key: {api_key[:20]}...{api_key[-5:]} (length: {len(api_key)})")
     
-    endpoint = "https://api.openai.com/v1/chat/completions"
+    endpoint = chat_url('openai')
     print(f"Endpoint: {endpoint}")
     
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
+    headers = build_headers('openai', api_key)
     
     payload = {
         "model": "gpt-3.5-turbo",
@@ -73,10 +73,14 @@ def test_openai_connection(api_key):
     
     print(f"\nRequest payload:")
     print(json.dumps(payload, indent=2))
+    
+    if stream:
+        return stream_openai_probe(endpoint, headers, payload)
+    
     print(f"\nSending POST request...")
     
     try:
-        response = requests.post(endpoint, headers=headers, json=payload, timeout=30)
+        response = pythia_http.post_json(endpoint, payload, headers, provider='openai')
         
         print(f"\nHTTP Status Code: {response.status_code}")
         print(f"Response Headers:")
@@ -118,14 +122,10 @@ def test_anthropic_connection(api_key):
     
     print(f"API Key: {api_key[:20]}...{api_key[-5:]} (length: {len(api_key)})")
     
-    endpoint = "https://api.anthropic.com/v1/messages"
+    endpoint = chat_url('anthropic')
     print(f"Endpoint: {endpoint}")
     
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": api_key,
-        "anthropic-version": "2023-06-01"
-    }
+    headers = build_headers('anthropic', api_key)
     
     payload = {
         "model": "claude-3-5-sonnet-20241022",
@@ -140,7 +140,7 @@ def test_anthropic_connection(api_key):
     print(f"\nSending POST request...")
     
     try:
-        response = requests.post(endpoint, headers=headers, json=payload, timeout=30)
+        response = pythia_http.post_json(endpoint, payload, headers, provider='anthropic')
         
         print(f"\nHTTP Status Code: {response.status_code}")
         print(f"\nResponse Body:")
@@ -165,19 +165,146 @@ def test_anthropic_connection(api_key):
         print(f"Error: {e}")
         return False
 
+def probe_provider(provider_id, api_key, deadline):
+    """Send one probe request and return a result dict (never raises)"""
+    result = {
+        'provider': provider_id,
+        'ok': False,
+        'status': None,
+        'elapsed': None,
+        'reply': '',
+        'error': ''
+    }
+    started = time.perf_counter()
+    try:
+        response = pythia_http.post_json(chat_url(provider_id),
+                                         build_probe_payload(provider_id),
+                                         build_headers(provider_id, api_key),
+                                         provider=provider_id, deadline=deadline)
+        result['status'] = response.status_code
+        if response.status_code == 200:
+            result['reply'] = extract_reply(provider_id, response.json())
+            result['ok'] = True
+        else:
+            result['error'] = response.text[:200]
+    except (requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+        result['error'] = str(e)
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+def run_concurrent_probes(config, deadlines):
+    """Probe every configured provider at once, each bounded by its own deadline
+    
+    Workers are daemon threads, so a hung provider never holds up the others
+    or the process exit; its slot is reported as a deadline failure. Requests
+    go through the pooled pythia_http sessions, so repeated runs in one
+    process reuse their connections.
+    """
+    configured = [pid for pid in KEY_PROVIDERS if config.get(pid)]
+    results = {}
+    
+    def worker(provider_id):
+        results[provider_id] = probe_provider(provider_id, config[provider_id],
+                                              deadlines[provider_id])
+    
+    started = time.perf_counter()
+    threads = {}
+    for provider_id in configured:
+        thread = threading.Thread(target=worker, args=(provider_id,), daemon=True)
+        thread.start()
+        threads[provider_id] = thread
+    
+    for provider_id, thread in threads.items():
+        remaining = deadlines[provider_id] - (time.perf_counter() - started)
+        thread.join(max(0, remaining))
+        if provider_id not in results:
+            results[provider_id] = {
+                'provider': provider_id,
+                'ok': False,
+                'status': None,
+                'elapsed': deadlines[provider_id],
+                'reply': '',
+                'error': f"deadline of {deadlines[provider_id]}s exceeded"
+            }
+    
+    return results, time.perf_counter() - started
+
+def parse_deadlines(args):
+    """Per-provider deadlines: --deadline default plus PROVIDER=SECONDS overrides"""
+    deadlines = {pid: args.deadline for pid in KEY_PROVIDERS}
+    for override in args.provider_deadline:
+        provider_id, _, seconds = override.partition('=')
+        try:
+            if provider_id not in KEY_PROVIDERS:
+                raise ValueError(provider_id)
+            deadlines[provider_id] = float(seconds)
+        except ValueError:
+            print(f"ERROR: Invalid --provider-deadline '{override}' "
+                  f"(expected one of {', '.join(KEY_PROVIDERS)}=SECONDS)")
+            sys.exit(2)
+    return deadlines
+
+def concurrent_main(config, deadlines):
+    print("\n" + "="*70)
+    print("CONCURRENT PROBE OF ALL CONFIGURED PROVIDERS")
+    print("="*70)
+    
+    for provider_id in KEY_PROVIDERS:
+        if not config.get(provider_id):
+            print(f"Skipping {PROVIDERS[provider_id]['name']} - no API key configured")
+    
+    results, wall_time = run_concurrent_probes(config, deadlines)
+    
+    print(f"\n{'Provider':<16} {'Status':<8} {'Time':>8}  Result")
+    print("-"*70)
+    for provider_id in (pid for pid in KEY_PROVIDERS if pid in results):
+        result = results[provider_id]
+        status = result['status'] if result['status'] is not None else '-'
+        detail = result['reply'] if result['ok'] else result['error']
+        mark = '✓' if result['ok'] else '✗'
+        print(f"{PROVIDERS[provider_id]['name']:<16} {status!s:<8} "
+              f"{result['elapsed']:>7.2f}s  {mark} {detail.strip()[:60]}")
+    
+    serial_time = sum(r['elapsed'] for r in results.values())
+    print("-"*70)
+    print(f"Wall clock: {wall_time:.2f}s (serial would be ~{serial_time:.2f}s)")
+    
+    if not any(r['ok'] for r in results.values()):
+        sys.exit(1)
+    sys.exit(0)
+
 def main():
+    parser = argparse.ArgumentParser(description="Test Pythia API connections")
+    parser.add_argument('--concurrent', action='store_true',
+                        help="Probe all configured providers at once")
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE,
+                        help=f"Per-provider deadline in seconds (default: {DEFAULT_DEADLINE})")
+    parser.add_argument('--provider-deadline', action='append', default=[],
+                        metavar='PROVIDER=SECONDS',
+                        help="Override the deadline for one provider (repeatable)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream the OpenAI probe (SSE) and report time-to-first-token")
+    parser.add_argument('--base-url',
+                        help=f"Send all requests to this host instead (e.g. a mock server); "
+                             f"also read from {BASE_URL_ENV}")
+    args = parser.parse_args()
+    set_base_url_override(args.base_url)
+    
     print("Pythia API Connection Test Tool")
     print("="*70)
     
     # Read config
-    config = read_config()
+    config = read_config(announce=True)
+    
+    if args.concurrent:
+        concurrent_main(config, parse_deadlines(args))
     
     # Test connections
     openai_result = False
     anthropic_result = False
     
     if config['openai']:
-        openai_result = test_openai_connection(config['openai'])
+        openai_result = test_openai_connection(config['openai'], stream=args.stream)
     else:
         print("\nSkipping OpenAI test - no API key configured")
     
@@ -6,9 +6,17 @@ https://github.com/marketplace/models
 
 import os
 import json
+import time
+import argparse
 import requests
 
-def test_github_models():
+import pythia_http
+from pythia_catalog import cached_models, refresh_in_background
+from pythia_config import read_config
+from pythia_providers import chat_url, build_headers
+from pythia_sse import consume_stream, print_stream_stats
+
+def test_github_models(stream=False):
     print("="*80)
     print("GITHUB MODELS API TEST (FREE TIER)")
     print("="*80)
@@ -38,12 +46,9 @@ def test_github_models():
     print(f"\n✅ GitHub token found: {token[:7]}...")
     
     # Test Claude Sonnet 3.5 via GitHub Models
-    endpoint = "https://models.inference.ai.azure.com/chat/completions"
+    endpoint = chat_url('github')
     
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
+    headers = build_headers('github', token)
     
     payload = {
         "model": "claude-3-5-sonnet",  # Available models on GitHub Models
@@ -65,8 +70,11 @@ def test_github_models():
     print(f"Endpoint: {endpoint}")
     print(f"Model: Claude 3.5 Sonnet")
     
+    if stream:
+        return stream_github_models(endpoint, headers, payload)
+    
     try:
-        response = requests.post(endpoint, headers=headers, json=payload, timeout=30)
+        response = pythia_http.post_json(endpoint, payload, headers, provider='github')
         
         print(f"\nHTTP Status: {response.status_code}")
         
@@ -88,11 +96,52 @@ def test_github_models():
         print(f"\n❌ Connection failed: {e}")
         return False
 
+def stream_github_models(endpoint, headers, payload):
+    """Streaming variant: print tokens as they arrive and report responsiveness"""
+    payload = dict(payload, stream=True)
+    print("Mode: streaming (SSE)")
+    
+    try:
+        started = time.perf_counter()
+        response = pythia_http.post_json(endpoint, payload, headers, provider='github', stream=True)
+        
+        print(f"\nHTTP Status: {response.status_code}")
+        
+        if response.status_code != 200:
+            print(f"\n❌ Error Response:")
+            print(response.text)
+            return False
+        
+        print("\nAI Response: ", end='', flush=True)
+        stats = consume_stream('github', response, started,
+                               on_text=lambda text: print(text, end='', flush=True))
+        print_stream_stats(stats)
+        
+        if stats['chunks'] == 0:
+            print("\n❌ Stream ended without any content")
+            return False
+        print("\n✅ SUCCESS!")
+        return True
+        
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"\n❌ Connection failed: {e}")
+        return False
+
 def show_available_models():
     print("\n" + "="*80)
     print("AVAILABLE MODELS ON GITHUB (FREE)")
     print("="*80)
     
+    catalog = cached_models('github')
+    if catalog:
+        for model in catalog:
+            window = f"{model['context_window']:,} tokens" if model['context_window'] else "context window unknown"
+            print(f"\n• {model['name']}")
+            print(f"  ID: {model['id']}")
+            print(f"  {window}")
+        print("\n(from the model catalog; 'pythia-tools models' refreshes it)")
+        return
+    
     models = [
         ("Claude 3.5 Sonnet", "claude-3-5-sonnet", "Anthropic's latest, same as Copilot"),
         ("GPT-4o", "gpt-4o", "OpenAI's latest GPT-4"),
@@ -105,9 +154,17 @@ def show_available_models():
         print(f"\n• {name}")
         print(f"  ID: {model_id}")
         print(f"  {desc}")
+    print("\n(built-in list; run 'pythia-tools models' to fetch the live catalog)")
 
 def main():
-    result = test_github_models()
+    parser = argparse.ArgumentParser(description="Test the GitHub Models API")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream the response (SSE) and report time-to-first-token")
+    args = parser.parse_args()
+    
+    # Revalidate the GitHub part of the catalog while the test request runs
+    refresh_in_background(read_config(required=False), ['github'])
+    result = test_github_models(stream=args.stream)
     show_available_models()
     
     print("\n" + "="*80)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Batch token counter
+Counts BPE tokens for whole projects (.dproj, directories, files) or JSONL
+prompt sets across a process pool and compares every item with the plugin's
+EstimateTokens heuristic (Length div 3), so a per-model correction factor can
+be chosen from real numbers. Reports throughput in MB/s; --benchmark repeats
+the count at increasing worker counts.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from pythia_history import percentile
+from pythia_context import SOURCE_EXTENSIONS, parse_project_file, utf16_length
+from pythia_tokens import encoding_for_model, get_counter
+from pythia_providers import with_context
+
+# Items are sent to workers in batches of about total / (workers * BATCHES_PER_WORKER)
+# bytes, so every worker gets several; DEFAULT_CHUNK_MB caps a batch on large inputs
+DEFAULT_CHUNK_MB = 4
+BATCHES_PER_WORKER = 4
+MIN_CHUNK_BYTES = 4 * 1024
+
+_counters = None
+
+def _init_worker(encodings):
+    global _counters
+    _counters = [get_counter(name) for name in encodings]
+
+def count_batch(batch):
+    """Count one batch in a worker; items are (name, path_or_None, text_or_None)"""
+    rows = []
+    for name, path, text in batch:
+        row = {'name': name, 'bytes': 0, 'chars': 0, 'estimate': 0, 'tokens': {}, 'error': ''}
+        try:
+            if text is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                text = data.decode('utf-8-sig', errors='replace')
+                row['bytes'] = len(data)
+            else:
+                row['bytes'] = len(text.encode('utf-8'))
+        except OSError as e:
+            row['error'] = str(e)
+            rows.append(row)
+            continue
+        row['chars'] = utf16_length(text)
+        row['estimate'] = max(1, row['chars'] // 3)
+        for encoding, count in _counters:
+            row['tokens'][encoding] = count(text)
+        rows.append(row)
+    return rows
+
+def collect_sources(inputs):
+    """(name, path, None) items for .dproj files, directories and single files"""
+    items = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for root, _, files in os.walk(entry):
+                for name in sorted(files):
+                    if name.lower().endswith(SOURCE_EXTENSIONS):
+                        path = os.path.join(root, name)
+                        items.append((path, path, None))
+        elif entry.lower().endswith('.dproj'):
+            for path in parse_project_file(entry):
+                if path.lower().endswith(SOURCE_EXTENSIONS):
+                    items.append((path, path, None))
+        else:
+            items.append((entry, entry, None))
+    return items
+
+def collect_prompts(path):
+    """(id, None, text) items: message contents as the batch runner sends them"""
+    # batch_runner pulls in the HTTP stack; only load it for prompt sets
+    from batch_runner import load_prompts
+    items = []
+    for item_id, messages, context in load_prompts(path):
+        text = '\n'.join(m['content'] for m in with_context(messages, context))
+        items.append((f"{os.path.basename(path)}#{item_id}", None, text))
+    return items
+
+def item_size(item):
+    _, path, text = item
+    try:
+        return os.path.getsize(path) if text is None else len(text)
+    except OSError:
+        return 0
+
+def make_batches(items, chunk_bytes, workers=1):
+    """Split items into batches sized for workers, none larger than chunk_bytes"""
+    sizes = [item_size(item) for item in items]
+    target = sum(sizes) // (workers * BATCHES_PER_WORKER) if workers > 1 else chunk_bytes
+    target = max(MIN_CHUNK_BYTES, min(chunk_bytes, target))
+    batches, batch, size = [], [], 0
+    for item, item_bytes in zip(items, sizes):
+        size += item_bytes
+        batch.append(item)
+        if size >= target:
+            batches.append(batch)
+            batch, size = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+def count_items(items, encodings, workers, chunk_bytes):
+    """(rows, elapsed_seconds) counting all items on a pool of worker processes"""
+    batches = make_batches(items, chunk_bytes, workers)
+    started = time.perf_counter()
+    if workers == 1:
+        _init_worker(encodings)
+        rows = [row for batch in batches for row in count_batch(batch)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(encodings,)) as pool:
+            rows = [row for result in pool.map(count_batch, batches) for row in result]
+    return rows, time.perf_counter() - started
+
+def resolve_encodings(models):
+    """{model: encoding actually used} plus the de-duplicated encoding list"""
+    by_model = {}
+    for model in models:
+        by_model[model], _ = get_counter(encoding_for_model(model))
+    return by_model, list(dict.fromkeys(by_model.values()))
+
+def summarize(rows, by_model):
+    """Per-model totals, ratio spread and suggested correction factor"""
+    counted = [r for r in rows if not r['error'] and r['chars']]
+    summary = {}
+    for model, encoding in by_model.items():
+        tokens = sum(r['tokens'][encoding] for r in counted)
+        estimate = sum(r['estimate'] for r in counted)
+        chars = sum(r['chars'] for r in counted)
+        ratios = [r['tokens'][encoding] / r['estimate'] for r in counted]
+        summary[model] = {
+            'encoding': encoding,
+            'tokens': tokens,
+            'estimate': estimate,
+            'ratio': tokens / estimate if estimate else None,
+            'chars_per_token': chars / tokens if tokens else None,
+            'ratio_p10': percentile(ratios, 10),
+            'ratio_p50': percentile(ratios, 50),
+            'ratio_p90': percentile(ratios, 90),
+        }
+    return summary
+
+def print_report(rows, by_model, summary, elapsed, workers, top):
+    first_encoding = next(iter(by_model.values()))
+    counted = [r for r in rows if not r['error'] and r['chars']]
+    print(f"\nItems furthest from Length div 3 ({first_encoding})")
+    print("="*80)
+    print(f"{'Item':<44} {'Chars':>9} {'div 3':>8} {'BPE':>8} {'Ratio':>7}")
+    print("-"*80)
+    def deviation(row):
+        return abs(row['tokens'][first_encoding] / row['estimate'] - 1)
+    for row in sorted(counted, key=deviation, reverse=True)[:top]:
+        tokens = row['tokens'][first_encoding]
+        print(f"{os.path.basename(row['name'])[-44:]:<44} {row['chars']:>9} {row['estimate']:>8} "
+              f"{tokens:>8} {tokens / row['estimate']:>7.2f}")
+
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+    for model, s in summary.items():
+        if s['ratio'] is None:
+            continue
+        print(f"{model} ({s['encoding']}): {s['tokens']:,} tokens vs {s['estimate']:,} estimated  |  "
+              f"ratio {s['ratio']:.2f} (p10 {s['ratio_p10']:.2f}, p50 {s['ratio_p50']:.2f}, "
+              f"p90 {s['ratio_p90']:.2f})")
+        print(f"   {s['chars_per_token']:.2f} chars/token -> EstimateTokens: "
+              f"Length(Text) * {1 / s['chars_per_token']:.3f}, or div {s['chars_per_token']:.1f}")
+    if 'approx' in by_model.values():
+        print("\n⚠️ tiktoken or its encoding files are unavailable: 'approx' counts are a "
+              "BPE approximation (pip install tiktoken)")
+    errors = [r for r in rows if r['error']]
+    if errors:
+        print(f"\n⚠️ {len(errors)} item(s) could not be read, e.g. {errors[0]['name']}: {errors[0]['error']}")
+    mb = sum(r['bytes'] for r in rows) / (1024 * 1024)
+    print(f"\nCounted {len(counted)} items, {mb:.1f} MB in {elapsed:.2f}s with {workers} worker(s): "
+          f"{mb / max(elapsed, 1e-9):.1f} MB/s")
+
+def run_benchmark(items, encodings, chunk_bytes, max_workers):
+    print("\nTHROUGHPUT BENCHMARK")
+    print("="*80)
+    mb = None
+    workers = 1
+    while True:
+        rows, elapsed = count_items(items, encodings, workers, chunk_bytes)
+        mb = sum(r['bytes'] for r in rows) / (1024 * 1024)
+        print(f"{workers:>3} worker(s): {elapsed:7.2f}s  {mb / max(elapsed, 1e-9):8.1f} MB/s")
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+
+def write_rows(path, rows, by_model):
+    encodings = list(dict.fromkeys(by_model.values()))
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'bytes', 'chars', 'estimate'] + encodings + ['error'])
+            for row in rows:
+                writer.writerow([row['name'], row['bytes'], row['chars'], row['estimate']] +
+                                [row['tokens'].get(e, '') for e in encodings] + [row['error']])
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+    print(f"Per-item counts written to {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Count BPE tokens for projects or prompt sets and compare with Length div 3")
+    parser.add_argument('inputs', nargs='*', help=".dproj files, directories or source files")
+    parser.add_argument('--jsonl', action='append', default=[], help="Prompt set in batch-runner JSONL format")
+    parser.add_argument('--model', action='append',
+                        help="Model to count for (repeatable; default: gpt-4 and claude-3-5-sonnet)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument('--chunk-mb', type=float, default=DEFAULT_CHUNK_MB,
+                        help=f"Largest batch sent to a worker; smaller inputs are split so every worker "
+                             f"gets several (default: {DEFAULT_CHUNK_MB})")
+    parser.add_argument('--top', type=int, default=15, help="Rows in the largest-deviation table")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Also measure MB/s at 1, 2, 4 ... --workers processes")
+    parser.add_argument('--output', help="Write per-item counts to a .json or .csv file")
+    args = parser.parse_args()
+
+    items = collect_sources(args.inputs)
+    for path in args.jsonl:
+        items += collect_prompts(path)
+    if not items:
+        parser.error("give at least one .dproj, directory, file or --jsonl prompt set")
+
+    by_model, encodings = resolve_encodings(args.model or ['gpt-4', 'claude-3-5-sonnet'])
+    chunk_bytes = int(args.chunk_mb * 1024 * 1024)
+
+    print("Pythia Token Counter")
+    print("="*80)
+    print(f"Items: {len(items)}  |  Encodings: {', '.join(f'{m}={e}' for m, e in by_model.items())}")
+    rows, elapsed = count_items(items, encodings, args.workers, chunk_bytes)
+    summary = summarize(rows, by_model)
+    print_report(rows, by_model, summary, elapsed, args.workers, args.top)
+
+    if args.benchmark:
+        run_benchmark(items, encodings, chunk_bytes, args.workers)
+    if args.output:
+        write_rows(args.output, rows, by_model)
+    if not any(not r['error'] for r in rows):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
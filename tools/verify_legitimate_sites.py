@@ -1,42 +1,286 @@
 #!/usr/bin/env python3
 """
 Verify you're connecting to legitimate AI provider websites
-Security check for API endpoints
+Security check for API endpoints: times DNS, TCP connect, TLS handshake and
+time-to-first-byte per endpoint, and checks the real certificate's SAN and
+issuer against pinned expectations to expose proxy/TLS-inspection overhead
 """
 
-import requests
 import ssl
+import time
+import socket
+import argparse
+import statistics
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
-def check_ssl_cert(url, expected_org):
-    """Check SSL certificate of a URL"""
-    print(f"\n🔒 Checking SSL Certificate: {url}")
-    print("-" * 80)
+# Issuer organizations each provider's public certificate is expected to chain to.
+# Anything else (e.g. a corporate CA) means TLS inspection or a spoofed endpoint.
+# Update these if a provider rotates to a different public CA.
+PINNED_ISSUERS = {
+    'api.openai.com': ('Google Trust Services', "Let's Encrypt", 'DigiCert Inc', 'Cloudflare, Inc.'),
+    'api.anthropic.com': ('Google Trust Services', "Let's Encrypt", 'DigiCert Inc', 'Cloudflare, Inc.'),
+    'models.inference.ai.azure.com': ('Microsoft Corporation', 'DigiCert Inc'),
+}
+
+ENDPOINTS = [
+    ("OpenAI", "https://api.openai.com/v1/models"),
+    ("Anthropic", "https://api.anthropic.com/v1/messages"),
+    ("GitHub Models", "https://models.inference.ai.azure.com/models"),
+]
+
+PHASES = ('proxy', 'dns', 'connect', 'tls', 'ttfb')
+
+# X.509 name attributes by DER-encoded OID (2.5.4.x), as getpeercert() names them
+NAME_ATTRIBUTES = {
+    b'\x55\x04\x03': 'commonName',
+    b'\x55\x04\x06': 'countryName',
+    b'\x55\x04\x0a': 'organizationName',
+    b'\x55\x04\x0b': 'organizationalUnitName',
+}
+
+def cert_field(cert, section, key):
+    """First value of key in a getpeercert() issuer/subject tuple list"""
+    for rdn in cert.get(section, ()):
+        for name, value in rdn:
+            if name == key:
+                return value
+    return ''
+
+def _der_items(data, start, end):
+    """(tag, content start, content end) of each DER element in data[start:end]"""
+    pos = start
+    while pos < end:
+        tag, length = data[pos], data[pos + 1]
+        pos += 2
+        if length & 0x80:
+            size = length & 0x7f
+            length = int.from_bytes(data[pos:pos + size], 'big')
+            pos += size
+        yield tag, pos, pos + length
+        pos += length
+
+def _der_name(data, start, end):
+    """An X.509 Name as getpeercert() tuples: ((('organizationName', 'X'),), ...)"""
+    rdns = []
+    for _, set_start, set_end in _der_items(data, start, end):
+        for _, seq_start, seq_end in _der_items(data, set_start, set_end):
+            (_, oid_start, oid_end), (kind, value_start, value_end) = list(_der_items(data, seq_start, seq_end))[:2]
+            name = NAME_ATTRIBUTES.get(bytes(data[oid_start:oid_end]))
+            if name:
+                raw = bytes(data[value_start:value_end])
+                value = raw.decode('utf-16-be' if kind == 0x1e else 'utf-8', errors='replace')
+                rdns.append(((name, value),))
+    return tuple(rdns)
+
+def decode_der_names(der):
+    """{'issuer', 'subject'} of a DER certificate, in getpeercert() form
+
+    Python 3.13's public get_verified_chain() returns DER bytes, and the
+    ssl module has no public decoder; only the two names are needed here.
+    """
+    _, cert_start, cert_end = next(_der_items(der, 0, len(der)))
+    _, tbs_start, tbs_end = next(_der_items(der, cert_start, cert_end))
+    fields = list(_der_items(der, tbs_start, tbs_end))
+    if fields[0][0] == 0xa0:
+        fields = fields[1:]  # explicit [0] version
+    # serialNumber, signature, issuer, validity, subject
+    issuer, subject = fields[2], fields[4]
+    return {'issuer': _der_name(der, issuer[1], issuer[2]),
+            'subject': _der_name(der, subject[1], subject[2])}
+
+def san_matches(hostname, sans):
+    for kind, pattern in sans:
+        if kind != 'DNS':
+            continue
+        if pattern == hostname:
+            return True
+        if pattern.startswith('*.') and hostname.split('.', 1)[-1] == pattern[2:]:
+            return True
+    return False
+
+def get_https_proxy(hostname):
+    """Proxy URL the environment would route hostname through, or None"""
+    if urllib.request.proxy_bypass(hostname):
+        return None
+    return urllib.request.getproxies().get('https')
+
+def open_tunnel(proxy_url, hostname, port, timeout):
+    """TCP connection to hostname:port through an HTTP CONNECT proxy"""
+    proxy = urlparse(proxy_url)
+    sock = socket.create_connection((proxy.hostname, proxy.port or 8080), timeout=timeout)
+    try:
+        sock.sendall(f"CONNECT {hostname}:{port} HTTP/1.1\r\nHost: {hostname}:{port}\r\n\r\n".encode('ascii'))
+        reply = b''
+        while b'\r\n\r\n' not in reply:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            reply += chunk
+        status_line = reply.split(b'\r\n', 1)[0].decode('latin-1')
+        if ' 200' not in status_line:
+            raise ConnectionError(f"Proxy refused CONNECT: {status_line}")
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+def time_connection_phases(url, timeout=10):
+    """One timed HTTPS request broken into DNS, TCP connect, TLS handshake and TTFB
     
+    Uses raw sockets rather than requests so each phase is visible. Through an
+    HTTPS proxy, 'proxy' covers reaching the proxy and its CONNECT reply, and
+    DNS for the target happens on the proxy side.
+    """
+    parsed = urlparse(url)
+    hostname = parsed.hostname
+    port = parsed.port or 443
+    phases = dict.fromkeys(PHASES)
+    proxy_url = get_https_proxy(hostname)
+    
+    started = time.perf_counter()
+    sock = None
     try:
-        response = requests.get(url, timeout=10)
-        
-        # Get SSL cert info (simplified check)
-        parsed = urlparse(url)
-        hostname = parsed.netloc
-        
-        print(f"✅ Connection successful")
-        print(f"   Status: {response.status_code}")
-        print(f"   Server: {response.headers.get('Server', 'Unknown')}")
-        
-        # Check if it's the actual API endpoint
-        if 'openai.com' in hostname or 'anthropic.com' in hostname:
-            print(f"✅ Verified legitimate domain: {hostname}")
+        if proxy_url:
+            sock = open_tunnel(proxy_url, hostname, port, timeout)
+            phases['proxy'] = time.perf_counter() - started
         else:
-            print(f"⚠️  Domain: {hostname} - Verify this is correct!")
+            family, socktype, proto, _, address = socket.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)[0]
+            mark = time.perf_counter()
+            phases['dns'] = mark - started
+            sock = socket.socket(family, socktype, proto)
+            sock.settimeout(timeout)
+            sock.connect(address)
+            phases['connect'] = time.perf_counter() - mark
         
-        return True
+        mark = time.perf_counter()
+        context = ssl.create_default_context()
+        tls = sock = context.wrap_socket(sock, server_hostname=hostname)
+        phases['tls'] = time.perf_counter() - mark
         
-    except Exception as e:
-        print(f"❌ Connection failed: {e}")
+        mark = time.perf_counter()
+        path = parsed.path or '/'
+        tls.sendall(f"GET {path} HTTP/1.1\r\nHost: {hostname}\r\nUser-Agent: pythia-verify/1.0\r\n"
+                    f"Connection: close\r\n\r\n".encode('ascii'))
+        first = tls.recv(1)
+        phases['ttfb'] = time.perf_counter() - mark
+        status_line = (first + tls.recv(64)).split(b'\r\n', 1)[0].decode('latin-1')
+        
+        chain = []
+        # Public from Python 3.13 on (DER bytes); older versions only report the peer certificate
+        if hasattr(tls, 'get_verified_chain'):
+            try:
+                chain = [decode_der_names(der) for der in tls.get_verified_chain()]
+            except (ValueError, IndexError, StopIteration):
+                chain = []  # Not a certificate layout decode_der_names knows
+        return {
+            'phases': phases,
+            'total': time.perf_counter() - started,
+            'status_line': status_line,
+            'tls_version': tls.version(),
+            'cipher': tls.cipher()[0],
+            'peer_cert': tls.getpeercert(),
+            'chain': chain,
+            'proxy': proxy_url
+        }
+    finally:
+        if sock is not None:
+            sock.close()
+
+def sample_endpoint(url, samples, timeout=10):
+    """Run several timed connections to one endpoint in parallel"""
+    with ThreadPoolExecutor(max_workers=samples) as pool:
+        futures = [pool.submit(time_connection_phases, url, timeout) for _ in range(samples)]
+    results, errors = [], []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except (OSError, ssl.SSLError, ConnectionError) as e:
+            errors.append(str(e))
+    return results, errors
+
+def verify_certificate(hostname, result, pinned_issuers):
+    """List of (ok, message) findings for the peer certificate and chain"""
+    findings = []
+    cert = result['peer_cert']
+    issuer_org = cert_field(cert, 'issuer', 'organizationName')
+    issuer_cn = cert_field(cert, 'issuer', 'commonName')
+    sans = cert.get('subjectAltName', ())
+    
+    findings.append((san_matches(hostname, sans),
+                     f"SAN covers {hostname}" if san_matches(hostname, sans)
+                     else f"SAN does not list {hostname}: {', '.join(v for _, v in sans[:5])}"))
+    
+    expected = pinned_issuers.get(hostname)
+    if expected:
+        chain_orgs = {cert_field(c, 'issuer', 'organizationName') for c in result['chain']} | {issuer_org}
+        pinned_ok = any(org in expected for org in chain_orgs)
+        findings.append((pinned_ok,
+                         f"Issuer {issuer_org} ({issuer_cn}) matches pinned CA"
+                         if pinned_ok else
+                         f"Issuer {issuer_org} ({issuer_cn}) is NOT one of {', '.join(expected)} "
+                         f"- likely TLS inspection by a proxy or security product"))
+    else:
+        findings.append((True, f"Issuer {issuer_org} ({issuer_cn}) - no pin configured"))
+    
+    findings.append((True, f"Valid until {cert.get('notAfter', 'unknown')}"))
+    if result['chain']:
+        names = [cert_field(c, 'subject', 'commonName') or cert_field(c, 'subject', 'organizationName')
+                 for c in result['chain']]
+        findings.append((True, f"Chain: {' -> '.join(names)}"))
+    return findings
+
+def format_ms(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return '-'
+    return f"{statistics.median(values) * 1000:.0f}"
+
+def check_ssl_cert(url, expected_org, samples=3, pinned_issuers=PINNED_ISSUERS):
+    """Time connection phases and verify the real certificate of a URL"""
+    print(f"\n🔒 Checking SSL Certificate: {url} ({expected_org})")
+    print("-" * 80)
+    
+    hostname = urlparse(url).hostname
+    results, errors = sample_endpoint(url, samples)
+    for error in errors:
+        print(f"❌ Connection failed: {error}")
+    if not results:
         return False
+    
+    first = results[0]
+    print(f"✅ Connection successful ({len(results)}/{samples} samples)")
+    print(f"   Response: {first['status_line']}")
+    print(f"   TLS: {first['tls_version']} / {first['cipher']}")
+    if first['proxy']:
+        print(f"   Via proxy: {first['proxy']}")
+    
+    print("\n   Median phase timings (ms):")
+    print("   " + "  ".join(f"{phase:>7}" for phase in PHASES + ('total',)))
+    print("   " + "  ".join(f"{format_ms([r['phases'][phase] for r in results]):>7}" for phase in PHASES)
+          + f"  {format_ms([r['total'] for r in results]):>7}")
+    
+    all_ok = True
+    print()
+    for ok, message in verify_certificate(hostname, first, pinned_issuers):
+        all_ok = all_ok and ok
+        print(f"   {'✅' if ok else '⚠️ '} {message}")
+    return all_ok
 
 def main():
+    parser = argparse.ArgumentParser(description="Verify AI provider endpoints, certificates and connection timing")
+    parser.add_argument('--samples', type=int, default=3,
+                        help="Parallel timed connections per endpoint (default: 3)")
+    parser.add_argument('--pin', action='append', default=[], metavar='HOST=ISSUER_ORG',
+                        help="Expected certificate issuer organization for a host (repeatable)")
+    args = parser.parse_args()
+    
+    pinned_issuers = dict(PINNED_ISSUERS)
+    for pin in args.pin:
+        host, _, org = pin.partition('=')
+        pinned_issuers[host] = pinned_issuers.get(host, ()) + (org,)
+    
     print("="*80)
     print(" LEGITIMATE AI PROVIDER VERIFICATION")
     print("="*80)
@@ -83,11 +327,9 @@ def main():
     print(" TESTING API ENDPOINTS")
     print("="*80)
     
-    # Test OpenAI endpoint
-    check_ssl_cert("https://api.openai.com/v1/models", "OpenAI")
-    
-    # Test Anthropic endpoint  
-    check_ssl_cert("https://api.anthropic.com/v1/messages", "Anthropic")
+    # Test every provider endpoint (samples run in parallel per endpoint)
+    for name, url in ENDPOINTS:
+        check_ssl_cert(url, name, samples=args.samples, pinned_issuers=pinned_issuers)
     
     print("\n" + "="*80)
     print(" WHAT TO DO IF YOU ENTERED CREDENTIALS ON WRONG SITE")